@@ -0,0 +1,268 @@
+"""
+Adapter change monitor.
+
+Watches the network adapters and reports typed events (address changed, link up/down, adapter
+added/removed, SSID changed) to its listeners, so the tray only refreshes what changed instead
+of re-querying everything on a timer. Changes are found by diffing consecutive adapter snapshots
+(and Wi-Fi interface states); a change source decides when to look:
+- WindowsChangeSource keeps one PowerShell CIM event subscription open and wakes the monitor
+  when an adapter, IP address or connection profile changes.
+- linux_netlink.NetlinkChangeSource listens on an rtnetlink socket for link, address and route
+  changes; on Linux the snapshots are also read over netlink (linux_netlink.get_adapter_snapshot).
+- PollingChangeSource never signals, so the monitor checks every poll interval; it is the
+  stand-in on platforms without an event subscription.
+"""
+import os
+import subprocess
+import sys
+import threading
+from typing import NamedTuple
+
+import linux_netlink
+import network_manager
+
+ADDRESS_CHANGED = "address_changed"
+LINK_UP = "link_up"
+LINK_DOWN = "link_down"
+ADAPTER_ADDED = "adapter_added"
+ADAPTER_REMOVED = "adapter_removed"
+SSID_CHANGED = "ssid_changed"
+
+EVENT_KINDS = (ADDRESS_CHANGED, LINK_UP, LINK_DOWN, ADAPTER_ADDED, ADAPTER_REMOVED, SSID_CHANGED)
+
+# Snapshot fields compared for ADDRESS_CHANGED.
+SNAPSHOT_ADDRESS_FIELDS = ("dhcp_enabled", "ip_address", "subnet_mask", "gateway", "dns_servers")
+
+DEFAULT_POLL_INTERVAL = 5.0 # seconds between checks without an event source
+DEFAULT_SAFETY_INTERVAL = 60.0 # seconds between checks with an event source, in case one was missed
+DEFAULT_SETTLE_DELAY = 0.5 # changes arrive in bursts (link, then address, then DNS); wait before diffing
+
+# Prefix of the lines the Windows subscription prints for every change.
+EVENT_LINE_PREFIX = "CHANGE "
+
+WINDOWS_SUBSCRIPTION_SCRIPT = (
+    "$query = \"SELECT * FROM __InstanceOperationEvent WITHIN 1 WHERE TargetInstance ISA 'MSFT_NetAdapter' "
+    "OR TargetInstance ISA 'MSFT_NetIPAddress' OR TargetInstance ISA 'MSFT_NetConnectionProfile'\"; "
+    "Register-CimIndicationEvent -Namespace root/StandardCimv2 -Query $query -SourceIdentifier NetConfigSwitchChange | Out-Null; "
+    "while ($true) { "
+    "$e = Wait-Event -SourceIdentifier NetConfigSwitchChange; "
+    "Remove-Event -EventIdentifier $e.EventIdentifier; "
+    f"[Console]::Out.WriteLine('{EVENT_LINE_PREFIX}' + $e.SourceEventArgs.NewEvent.TargetInstance.CimClass.CimClassName); "
+    "[Console]::Out.Flush() }"
+)
+
+
+class AdapterEvent(NamedTuple):
+    """One change of one adapter; old and new are the values before and after it."""
+    kind: str
+    adapter_name: str
+    old: object
+    new: object
+
+
+def _address_state(entry):
+    return {field: entry.get(field) for field in SNAPSHOT_ADDRESS_FIELDS}
+
+
+def diff_snapshots(old: list[dict] | None, new: list[dict] | None) -> list[AdapterEvent]:
+    """Events turning adapter snapshot old into new (see network_manager.parse_adapter_snapshot)."""
+    old_by_name = {entry["name"]: entry for entry in old or []}
+    events = []
+    for entry in new or []:
+        name = entry["name"]
+        previous = old_by_name.pop(name, None)
+        if previous is None:
+            events.append(AdapterEvent(ADAPTER_ADDED, name, None, entry))
+            continue
+        was_up, is_up = previous.get("status") == "Up", entry.get("status") == "Up"
+        if was_up != is_up:
+            events.append(AdapterEvent(LINK_UP if is_up else LINK_DOWN, name, previous.get("status"), entry.get("status")))
+        old_address, new_address = _address_state(previous), _address_state(entry)
+        if old_address != new_address:
+            events.append(AdapterEvent(ADDRESS_CHANGED, name, old_address, new_address))
+    for name, previous in old_by_name.items():
+        events.append(AdapterEvent(ADAPTER_REMOVED, name, previous, None))
+    return events
+
+
+def diff_ssids(old: dict[str, str], new: dict[str, str]) -> list[AdapterEvent]:
+    """SSID_CHANGED events between two interface name -> connected SSID ("" if none) maps."""
+    return [
+        AdapterEvent(SSID_CHANGED, name, old.get(name, ""), new.get(name, ""))
+        for name in sorted(set(old) | set(new))
+        if old.get(name, "") != new.get(name, "")
+    ]
+
+
+class PollingChangeSource:
+    """Never signals: the monitor checks every poll interval."""
+
+    def start(self, notify):
+        pass
+
+    def stop(self):
+        pass
+
+    def is_event_driven(self) -> bool:
+        return False
+
+
+class WindowsChangeSource:
+    """Long-running PowerShell CIM event subscription; calls notify() for every change it prints."""
+
+    def __init__(self, command=None):
+        self.command = command or [
+            "powershell.exe", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass",
+            "-Command", WINDOWS_SUBSCRIPTION_SCRIPT,
+        ]
+        self._process = None
+        self._reader_thread = None
+
+    def start(self, notify):
+        try:
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                errors="ignore",
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        except OSError as e:
+            print(f"Could not start the adapter change subscription, polling instead: {e}")
+            self._process = None
+            return
+        self._reader_thread = threading.Thread(
+            target=self._read_events, args=(self._process, notify), name="adapter-change-source", daemon=True
+        )
+        self._reader_thread.start()
+
+    @staticmethod
+    def _read_events(process, notify):
+        for line in process.stdout:
+            if line.startswith(EVENT_LINE_PREFIX):
+                notify()
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def is_event_driven(self) -> bool:
+        """True while the subscription process is running; the monitor polls otherwise."""
+        return self._process is not None and self._process.poll() is None
+
+
+def default_change_source():
+    if os.name == "nt":
+        return WindowsChangeSource()
+    if sys.platform.startswith("linux") and linux_netlink.netlink_available():
+        return linux_netlink.NetlinkChangeSource()
+    return PollingChangeSource()
+
+
+def default_snapshot_func():
+    if sys.platform.startswith("linux"):
+        return linux_netlink.get_adapter_snapshot
+    # An uncached snapshot also refreshes network_manager's adapter state cache.
+    return lambda: network_manager.get_adapter_snapshot(use_cache=False)
+
+
+class AdapterMonitor:
+    """Reports adapter changes to listeners as lists of AdapterEvents, from its own thread."""
+
+    def __init__(self, change_source=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                 safety_interval=DEFAULT_SAFETY_INTERVAL, settle_delay=DEFAULT_SETTLE_DELAY,
+                 snapshot_func=None, wlan_func=None):
+        self.change_source = change_source or default_change_source()
+        self.poll_interval = poll_interval
+        self.safety_interval = safety_interval
+        self.settle_delay = settle_delay
+        self._snapshot_func = snapshot_func or default_snapshot_func()
+        self._wlan_func = wlan_func or network_manager.get_wlan_interfaces
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._listeners = []
+        self._snapshot = None
+        self._ssids = {}
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self.check_count = 0
+
+    def add_listener(self, callback, kinds=None):
+        """Register callback(events), called with the events of one check (only those of `kinds` if given)."""
+        with self._lock:
+            self._listeners.append((callback, frozenset(kinds) if kinds else None))
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = [entry for entry in self._listeners if entry[0] != callback]
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self.change_source.start(self.notify_change)
+        self._thread = threading.Thread(target=self._run, name="adapter-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        self.change_source.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def notify_change(self):
+        """Ask the monitor to check now (called by the change source, or after applying a change)."""
+        self._wake_event.set()
+
+    def connected_ssids(self) -> dict[str, str]:
+        """Interface name -> SSID it is connected to ("" if none), as of the last check."""
+        with self._lock:
+            return dict(self._ssids)
+
+    def check_now(self) -> list[AdapterEvent]:
+        """Take a snapshot, diff it against the previous one and notify listeners. The first check only records the state."""
+        with self._check_lock:
+            snapshot, error = self._snapshot_func()
+            if error or snapshot is None:
+                return []
+            ssids = {}
+            if any(entry.get("media_type") == network_manager.MEDIA_WIRELESS for entry in snapshot):
+                interfaces, wlan_error = self._wlan_func()
+                ssids = self.connected_ssids() if wlan_error else {i.name: i.ssid for i in interfaces}
+            with self._lock:
+                first_check = self._snapshot is None
+                events = [] if first_check else diff_snapshots(self._snapshot, snapshot) + diff_ssids(self._ssids, ssids)
+                self._snapshot = snapshot
+                self._ssids = ssids
+                self.check_count += 1
+                listeners = list(self._listeners)
+        for callback, kinds in listeners:
+            wanted = [event for event in events if kinds is None or event.kind in kinds]
+            if wanted:
+                try:
+                    callback(wanted)
+                except Exception as e:
+                    print(f"Adapter change listener failed: {e}")
+        return events
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.check_now()
+            except Exception as e:
+                print(f"Adapter change check failed: {e}")
+            interval = self.safety_interval if self.change_source.is_event_driven() else self.poll_interval
+            if self._wake_event.wait(interval) and not self._stop_event.is_set():
+                self._stop_event.wait(self.settle_delay) # let the rest of the burst arrive
+            self._wake_event.clear()
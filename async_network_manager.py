@@ -0,0 +1,198 @@
+"""
+asyncio front end for network_manager.
+
+Every operation here is the network_manager function of the same name run on a worker thread
+(asyncio.to_thread) under a bounded semaphore, so several adapter queries can be in flight at
+once without blocking the caller's thread, and async calls issue exactly the commands the sync
+ones do: same quoting, error handling, caches and command runner (pooled, recorded and
+replayed alike).
+
+Cancelling the awaiting task cancels the operation's deadline budget (see deadlines), so it
+stops before its next netsh/PowerShell command. A command already running is not killed; it
+ends within its own timeout.
+"""
+import asyncio
+import math
+import os
+import shlex
+import subprocess
+import threading
+import weakref
+
+import deadlines
+import network_manager
+
+# Upper bound on commands running at the same time across the whole process.
+MAX_CONCURRENT_COMMANDS = 4
+DEFAULT_COMMAND_TIMEOUT = deadlines.DEFAULT_COMMAND_TIMEOUT
+
+_semaphores = weakref.WeakKeyDictionary() # event loop -> its command semaphore
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the command semaphore bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMMANDS)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _call(func, *args, **kwargs):
+    """
+    Run a network_manager function on a worker thread under the semaphore and an open-ended
+    budget (capped by any enclosing one) that is cancelled with the awaiting task.
+    """
+    async with _get_semaphore():
+        with deadlines.budget(math.inf, func.__name__) as deadline:
+            try:
+                # to_thread copies this context, so the budget and switch traces reach the commands.
+                return await asyncio.to_thread(func, *args, **kwargs)
+            except asyncio.CancelledError:
+                deadline.cancel()
+                raise
+
+
+def _command_line(args) -> str:
+    """The command line a runner takes for an argument list (quoted the way subprocess would)."""
+    if isinstance(args, str):
+        return args
+    return subprocess.list2cmdline(args) if os.name == "nt" else shlex.join(args)
+
+
+async def run_command(args, timeout=DEFAULT_COMMAND_TIMEOUT, check=True) -> subprocess.CompletedProcess:
+    """
+    Run a command (argument list or command line) through network_manager's command runner and
+    return the completed process. Raises subprocess.CalledProcessError (if check) and
+    subprocess.TimeoutExpired like subprocess.run.
+    """
+    try:
+        return await _call(network_manager._run_command, _command_line(args), timeout)
+    except subprocess.CalledProcessError as e:
+        if check:
+            raise
+        return subprocess.CompletedProcess(e.cmd, e.returncode, stdout=e.stdout, stderr=e.stderr)
+
+
+async def run_powershell(ps_command, timeout=DEFAULT_COMMAND_TIMEOUT) -> subprocess.CompletedProcess:
+    return await _call(network_manager._run_powershell, ps_command, timeout)
+
+
+async def get_adapter_snapshot(use_cache=True):
+    """Async network_manager.get_adapter_snapshot."""
+    return await _call(network_manager.get_adapter_snapshot, use_cache)
+
+
+async def list_adapters(snapshot=None):
+    """Async network_manager.list_adapters."""
+    return await _call(network_manager.list_adapters, snapshot)
+
+
+async def get_current_adapter_config(adapter_name, snapshot=None, runner=None):
+    """Async network_manager.get_current_adapter_config."""
+    return await _call(network_manager.get_current_adapter_config, adapter_name, snapshot, runner)
+
+
+async def get_adapter_configs(adapter_names) -> dict:
+    """
+    Fetch the configuration of several adapters concurrently.
+    Returns a dictionary mapping adapter name to (config, error_message).
+    """
+    snapshot, _ = await get_adapter_snapshot()
+    results = await asyncio.gather(
+        *(get_current_adapter_config(name, snapshot=snapshot) for name in adapter_names)
+    )
+    return dict(zip(adapter_names, results))
+
+
+async def get_adapter_statuses(saved_configs, snapshot=None, profile_index=None):
+    """Async network_manager.get_adapter_statuses."""
+    return await _call(network_manager.get_adapter_statuses, saved_configs, snapshot, profile_index)
+
+
+async def apply_network_config_with_plan(adapter_name, config, dry_run=False, snapshot=None, runner=None):
+    """Async network_manager.apply_network_config_with_plan."""
+    return await _call(network_manager.apply_network_config_with_plan, adapter_name, config, dry_run, snapshot, runner)
+
+
+async def apply_network_config(adapter_name, config, dry_run=False):
+    """Async network_manager.apply_network_config."""
+    return await _call(network_manager.apply_network_config, adapter_name, config, dry_run)
+
+
+async def set_adapter_to_dhcp(adapter_name):
+    """Async network_manager.set_adapter_to_dhcp."""
+    return await _call(network_manager.set_adapter_to_dhcp, adapter_name)
+
+
+async def get_interface_index(use_cache=True):
+    """Async network_manager.get_interface_index."""
+    return await _call(network_manager.get_interface_index, use_cache)
+
+
+async def is_wifi_adapter(adapter_name, index=None):
+    """Async network_manager.is_wifi_adapter."""
+    return await _call(network_manager.is_wifi_adapter, adapter_name, index)
+
+
+async def get_available_bssids():
+    """Async network_manager.get_available_bssids."""
+    return await _call(network_manager.get_available_bssids)
+
+
+async def get_available_networks():
+    """Async network_manager.get_available_networks."""
+    return await _call(network_manager.get_available_networks)
+
+
+async def apply_wifi_profile(ssid, password, adapter_name, auth_type="WPA2PSK", bssids=None):
+    """Async network_manager.apply_wifi_profile."""
+    return await _call(network_manager.apply_wifi_profile, ssid, password, adapter_name, auth_type, bssids)
+
+
+# --- Sync shims ---
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop running in a daemon thread, starting it on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="network-manager-asyncio", daemon=True).start()
+        return _background_loop
+
+
+def submit(coro, callback=None, on_error=None):
+    """
+    Schedule a coroutine on the shared background loop without blocking the caller.
+    Returns a concurrent.futures.Future (call .cancel() to cancel the task).
+    The optional callback is invoked with the coroutine's result from the loop thread; if the
+    coroutine raises, the exception is logged and passed to on_error instead, so callers can
+    report the failure rather than leave their UI stale. Qt callers should forward both to the
+    GUI thread through a signal.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_background_loop())
+
+    def _deliver(done_future):
+        if done_future.cancelled():
+            return
+        error = done_future.exception()
+        if error is not None:
+            print(f"Background task {getattr(coro, '__qualname__', coro)} failed: {type(error).__name__}: {error}")
+            if on_error is not None:
+                on_error(error)
+        elif callback is not None:
+            callback(done_future.result())
+
+    future.add_done_callback(_deliver)
+    return future
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine to completion from synchronous code and return its result."""
+    return submit(coro).result(timeout)
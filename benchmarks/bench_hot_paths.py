@@ -0,0 +1,257 @@
+"""
+Microbenchmarks for the network_manager hot paths on synthetic inputs (hundreds of adapters,
+thousands of BSSIDs and saved profiles). Reports ops/s and memory allocated per op (tracemalloc),
+and compares against a baseline JSON so regressions show up locally.
+Runs on any platform:
+    python benchmarks/bench_hot_paths.py               # run, compare with the baseline if there is one
+    python benchmarks/bench_hot_paths.py --save        # run and store the results as the new baseline
+    python benchmarks/bench_hot_paths.py --only parse  # run benchmarks whose name contains "parse"
+Exits with status 1 if a benchmark is slower or allocates more than the baseline allows.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import network_manager
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.25 # allowed slowdown / extra allocation before a result counts as a regression
+MIN_MEASURE_TIME = 0.5 # seconds spent timing each benchmark
+
+ADAPTER_COUNT = 300
+BSSID_COUNT = 3000
+BSSIDS_PER_SSID = 4
+PROFILE_COUNT = 5000
+
+
+def synthetic_ips(count):
+    ips = []
+    for i in range(count):
+        ips.append(f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}")
+        ips.append(f"192.168.{i % 300}.{i % 7}") # every 300th octet is out of range
+        ips.append(f"not-an-ip-{i}")
+    return ips
+
+
+def synthetic_ip_config(adapter_count):
+    """'netsh interface ip show config' output for adapter_count adapters."""
+    blocks = []
+    for i in range(adapter_count):
+        if i % 3:
+            blocks.append(
+                f'Configuration for interface "Ethernet {i}"\n'
+                f"    DHCP enabled:                         No\n"
+                f"    IP Address:                           10.{i // 256}.{i % 256}.10\n"
+                f"    Subnet Prefix:                        10.{i // 256}.{i % 256}.0/24 (mask 255.255.255.0)\n"
+                f"    Default Gateway:                      10.{i // 256}.{i % 256}.1\n"
+                f"    Gateway Metric:                       0\n"
+                f"    InterfaceMetric:                      25\n"
+                f"    Statically Configured DNS Servers:    8.8.8.8\n"
+                f"                                          8.8.4.4\n"
+                f"    Register with which suffix:           Primary only\n"
+                f"    Statically Configured WINS Servers:   None\n"
+            )
+        else:
+            blocks.append(
+                f'Configuration for interface "Wi-Fi {i}"\n'
+                f"    DHCP enabled:                         Yes\n"
+                f"    InterfaceMetric:                      35\n"
+                f"    DNS servers configured through DHCP:  10.0.0.1\n"
+                f"    Register with which suffix:           Primary only\n"
+                f"    WINS servers configured through DHCP: None\n"
+            )
+    return "\n".join(blocks)
+
+
+def synthetic_bssid_scan(bssid_count, per_ssid=BSSIDS_PER_SSID):
+    """'netsh wlan show networks mode=bssid' output with bssid_count access points."""
+    ssid_count = bssid_count // per_ssid
+    lines = ["", "Interface name : Wi-Fi ", f"There are {ssid_count} networks currently visible. ", ""]
+    for s in range(ssid_count):
+        lines += [
+            f"SSID {s + 1} : Network-{s}",
+            "    Network type            : Infrastructure",
+            f"    Authentication          : {'Open' if s % 5 == 0 else 'WPA2-Personal'}",
+            f"    Encryption              : {'None' if s % 5 == 0 else 'CCMP'} ",
+        ]
+        for b in range(per_ssid):
+            lines += [
+                f"    BSSID {b + 1}                 : 02:00:{s // 256:02x}:{s % 256:02x}:00:{b:02x}",
+                f"         Signal             : {(s * 7 + b * 13) % 100}%  ",
+                "         Radio type         : 802.11ax",
+                f"         Band               : {'5 GHz' if b % 2 else '2.4 GHz'}",
+                f"         Channel            : {36 if b % 2 else 6} ",
+                "         Basic rates (Mbps) : 6 12 24",
+                "         Other rates (Mbps) : 9 18 36 48 54",
+            ]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def synthetic_snapshot(adapter_count):
+    return [
+        {
+            "name": f"Ethernet {i}",
+            "description": f"Synthetic Adapter #{i}",
+            "status": "Up",
+            "dhcp_enabled": i % 10 == 0,
+            "ip_address": f"10.{i // 256}.{i % 256}.10",
+            "prefix_length": 24,
+            "subnet_mask": "255.255.255.0",
+            "gateway": f"10.{i // 256}.{i % 256}.1",
+            "dns_servers": ["8.8.8.8"],
+        }
+        for i in range(adapter_count)
+    ]
+
+
+def synthetic_saved_configs(profile_count, adapter_count):
+    """Saved profiles; about one in five matches the live config of its adapter."""
+    networks = {}
+    for p in range(profile_count):
+        i = p % adapter_count
+        networks[f"Profile {p}"] = {
+            "adapter_name": f"Ethernet {i}",
+            "ip_address": f"10.{i // 256}.{i % 256}.{10 if p % 5 == 4 else 50 + p % 100}",
+            "subnet_mask": "255.255.255.0",
+            "gateway": f"10.{i // 256}.{i % 256}.1",
+            "dns_primary": "8.8.8.8",
+            "dns_secondary": "",
+        }
+    return {"networks": networks}
+
+
+def build_benchmarks():
+    """Name -> zero-argument callable doing one operation on prebuilt inputs."""
+    ips = synthetic_ips(1000)
+    ip_config_output = synthetic_ip_config(ADAPTER_COUNT)
+    last_adapter = f"Ethernet {ADAPTER_COUNT - 1}" if (ADAPTER_COUNT - 1) % 3 else f"Wi-Fi {ADAPTER_COUNT - 1}"
+    scan_output = synthetic_bssid_scan(BSSID_COUNT)
+    snapshot = synthetic_snapshot(ADAPTER_COUNT)
+    saved_configs = synthetic_saved_configs(PROFILE_COUNT, ADAPTER_COUNT)
+    profile_index = network_manager.build_profile_index(saved_configs)
+    return {
+        "validate_ip[3000]": lambda: [network_manager.validate_ip(ip) for ip in ips],
+        f"parse_ip_config[{ADAPTER_COUNT} adapters]": lambda: network_manager.parse_ip_config_output(
+            ip_config_output, network_manager._new_adapter_config(last_adapter)
+        ),
+        f"parse_dns_servers[{ADAPTER_COUNT} adapters]": lambda: network_manager.parse_dns_servers_output(ip_config_output),
+        f"parse_available_networks[{BSSID_COUNT} bssids]": lambda: network_manager.parse_available_networks(scan_output),
+        "generate_wifi_profile_xml[open+wpa2+wpa3]": lambda: [
+            network_manager.generate_wifi_profile_xml("Network-42", "secret-passphrase", auth_type)
+            for auth_type in ("open", "WPA2PSK", "WPA3SAE")
+        ],
+        f"get_adapter_statuses[{ADAPTER_COUNT} adapters x {PROFILE_COUNT} profiles]": lambda: network_manager.get_adapter_statuses(
+            saved_configs, snapshot=snapshot
+        ),
+        f"get_adapter_statuses[{ADAPTER_COUNT} adapters, prebuilt profile index]": lambda: network_manager.get_adapter_statuses(
+            saved_configs, snapshot=snapshot, profile_index=profile_index
+        ),
+    }
+
+
+def measure_speed(func, min_time=MIN_MEASURE_TIME):
+    """Ops/s of func, timed in growing batches until min_time has passed."""
+    func() # warm up caches and lazy imports
+    batch = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(batch):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return batch / elapsed
+        batch *= 2 if elapsed < min_time / 10 else 1 + int(min_time / max(elapsed, 1e-9))
+
+
+def measure_allocations(func):
+    """Peak bytes allocated by one call and the number of memory blocks allocated by it."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    return peak - start_current, blocks
+
+
+def run(only=None, min_time=MIN_MEASURE_TIME):
+    results = {}
+    for name, func in build_benchmarks().items():
+        if only and only not in name:
+            continue
+        peak_bytes, blocks = measure_allocations(func)
+        results[name] = {"ops_per_sec": measure_speed(func, min_time), "peak_bytes": peak_bytes, "blocks": blocks}
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Names and reasons of the results that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append((name, f"{result['ops_per_sec']:.0f} ops/s vs {base['ops_per_sec']:.0f}"))
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance) + 1024:
+            regressions.append((name, f"peak {result['peak_bytes']} B vs {base['peak_bytes']} B"))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("results", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(results, path):
+    data = {"python": sys.version.split()[0], "saved_at": time.time(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--only", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-time", type=float, default=MIN_MEASURE_TIME)
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.min_time)
+    baseline = load_baseline(args.baseline)
+    print(f"{'benchmark':60} {'ops/s':>10} {'vs base':>8} {'peak KiB':>9} {'blocks':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = f"{result['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%}" if base else "-"
+        print(f"{name:60} {result['ops_per_sec']:10.1f} {change:>8} {result['peak_bytes'] / 1024:9.1f} {result['blocks']:7d}")
+
+    if args.save:
+        save_baseline(dict(baseline, **results), args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for name, reason in regressions:
+        print(f"REGRESSION {name}: {reason}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
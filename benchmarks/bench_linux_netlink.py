@@ -0,0 +1,86 @@
+"""
+Compares the spawn-free Linux adapter backend (linux_netlink) with a spawn-based path that
+gets the same adapter snapshot by running 'ip -json address' and 'ip -json route' through
+command_runner.SubprocessRunner, the runner network_manager uses.
+Linux only:
+    python benchmarks/bench_linux_netlink.py [--min-time SECONDS]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import command_runner
+import linux_netlink
+from bench_hot_paths import MIN_MEASURE_TIME, measure_allocations, measure_speed
+
+IP_FLAGS = {"UP": linux_netlink.IFF_UP, "LOOPBACK": linux_netlink.IFF_LOOPBACK, "LOWER_UP": linux_netlink.IFF_LOWER_UP}
+IP_OPERSTATES = {"UP": linux_netlink.IF_OPER_UP, "UNKNOWN": linux_netlink.IF_OPER_UNKNOWN}
+
+
+def spawn_snapshot(runner=None):
+    """The adapter snapshot built from two 'ip' processes."""
+    runner = runner or command_runner.SubprocessRunner()
+    interfaces = json.loads(runner.run_command("ip -json address show").stdout)
+    route_entries = json.loads(runner.run_command("ip -json -4 route show table main").stdout)
+    links, addresses = [], []
+    for interface in interfaces:
+        flags = sum(IP_FLAGS.get(flag, 0) for flag in interface.get("flags", []))
+        operstate = IP_OPERSTATES.get(interface.get("operstate"), linux_netlink.IF_OPER_DOWN)
+        link_type = linux_netlink.ARPHRD_LOOPBACK if interface.get("link_type") == "loopback" else 1
+        links.append(linux_netlink.LinkInfo(interface["ifindex"], interface["ifname"], flags, operstate, link_type))
+        for info in interface.get("addr_info", []):
+            if info.get("family") == "inet":
+                address_flags = (0 if info.get("dynamic") else linux_netlink.IFA_F_PERMANENT) | (
+                    linux_netlink.IFA_F_SECONDARY if info.get("secondary") else 0)
+                addresses.append(linux_netlink.AddressInfo(interface["ifindex"], info["local"], info["prefixlen"], address_flags))
+    indexes = {link.name: link.index for link in links}
+    routes = [
+        linux_netlink.RouteInfo(indexes[entry["dev"]], "" if entry["dst"] == "default" else entry["dst"].split("/")[0],
+                                0 if entry["dst"] == "default" else int(entry["dst"].partition("/")[2] or 32),
+                                entry.get("gateway", ""), entry.get("metric", 0))
+        for entry in route_entries if entry.get("dev") in indexes
+    ]
+    media_types = {link.name: linux_netlink.classify_link(link) for link in links}
+    return linux_netlink.build_snapshot(links, addresses, routes, linux_netlink.read_dns_servers(), media_types), None
+
+
+def build_benchmarks():
+    benchmarks = {
+        "netlink snapshot": linux_netlink.get_adapter_snapshot,
+        "sysfs/proc snapshot": lambda: linux_netlink.build_snapshot(
+            *linux_netlink.read_state_sysfs(), linux_netlink.read_dns_servers()
+        ),
+    }
+    if shutil.which("ip"):
+        benchmarks["spawn 'ip -json' snapshot"] = spawn_snapshot
+    return benchmarks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=MIN_MEASURE_TIME)
+    args = parser.parse_args(argv)
+    if not sys.platform.startswith("linux"):
+        print("This benchmark needs Linux.")
+        return 1
+
+    results = {}
+    for name, func in build_benchmarks().items():
+        peak_bytes, _ = measure_allocations(func)
+        results[name] = (measure_speed(func, args.min_time), peak_bytes)
+    spawn = results.get("spawn 'ip -json' snapshot")
+    print(f"{'backend':30} {'ops/s':>10} {'ms/op':>8} {'peak KiB':>9} {'vs spawn':>9}")
+    for name, (ops_per_sec, peak_bytes) in results.items():
+        speedup = f"{ops_per_sec / spawn[0]:.1f}x" if spawn else "-"
+        print(f"{name:30} {ops_per_sec:10.1f} {1000 / ops_per_sec:8.3f} {peak_bytes / 1024:9.1f} {speedup:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
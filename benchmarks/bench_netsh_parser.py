@@ -0,0 +1,74 @@
+"""
+Throughput of the netsh parsers over the fixture corpus in tests/fixtures/netsh.
+Runs on any platform:
+    python benchmarks/bench_netsh_parser.py [--min-time SECONDS] [--baseline FILE] [--save]
+Results share the baseline file of bench_hot_paths.py (as "netsh parser: <fixture>"); exits with
+status 1 if a parser is slower or allocates more than the baseline allows.
+"""
+import argparse
+import os
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import netsh_parser
+from bench_hot_paths import (DEFAULT_BASELINE, DEFAULT_TOLERANCE, MIN_MEASURE_TIME, compare, load_baseline,
+                             measure_allocations, measure_speed, save_baseline)
+
+FIXTURES_DIR = os.path.join(project_root, "tests", "fixtures", "netsh")
+
+PARSERS = {
+    "ip_show_config": lambda text: list(netsh_parser.iter_ip_configs(text)),
+    "dnsservers": lambda text: list(netsh_parser.iter_ip_configs(text)),
+    "wlan_show_networks": lambda text: list(netsh_parser.iter_wifi_networks(text)),
+    "wlan_show_profiles": lambda text: list(netsh_parser.iter_wifi_profile_names(text)),
+    "wlan_show_profile_": lambda text: netsh_parser.parse_wifi_profile(text),
+}
+
+
+def load_corpus():
+    corpus = []
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        parser = next((p for prefix, p in PARSERS.items() if file_name.startswith(prefix)), None)
+        if parser is None:
+            continue
+        with open(os.path.join(FIXTURES_DIR, file_name), encoding="utf-8") as f:
+            corpus.append((file_name, f.read(), parser))
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the results in the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-time", type=float, default=MIN_MEASURE_TIME)
+    args = parser.parse_args(argv)
+
+    results = {}
+    baseline = load_baseline(args.baseline)
+    print(f"{'fixture':40} {'parses/s':>12} {'MB/s':>8} {'vs base':>8} {'peak KiB':>9}")
+    for file_name, text, parse in load_corpus():
+        name = f"netsh parser: {file_name}"
+        peak_bytes, blocks = measure_allocations(lambda: parse(text))
+        ops_per_sec = measure_speed(lambda: parse(text), args.min_time)
+        results[name] = {"ops_per_sec": ops_per_sec, "peak_bytes": peak_bytes, "blocks": blocks}
+        base = baseline.get(name)
+        change = f"{ops_per_sec / base['ops_per_sec'] - 1:+.0%}" if base else "-"
+        megabytes_per_sec = len(text.encode("utf-8")) * ops_per_sec / 1e6
+        print(f"{file_name:40} {ops_per_sec:12.0f} {megabytes_per_sec:8.1f} {change:>8} {peak_bytes / 1024:9.1f}")
+
+    if args.save:
+        save_baseline(dict(baseline, **results), args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for name, reason in regressions:
+        print(f"REGRESSION {name}: {reason}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Replays a recorded command fixture through network_manager to time the tray menu's data path
+(adapter snapshot, statuses, adapter list, nearby networks and profile names) offline.
+Runs on any platform:
+    python benchmarks/bench_replay.py [--fixture FILE] [--latency-scale X] [--min-time SECONDS] [--baseline FILE] [--save]
+Results share the baseline file of bench_hot_paths.py; exits with status 1 on a regression.
+
+Record a fixture on a Windows machine with:
+    runner = command_runner.RecordingRunner(network_manager.get_command_runner(), "my_machine.json")
+    network_manager.set_command_runner(runner)
+    ...  # use the app, then
+    runner.save()
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import command_runner
+import network_manager
+from bench_hot_paths import (DEFAULT_BASELINE, DEFAULT_TOLERANCE, MIN_MEASURE_TIME, compare, load_baseline,
+                             measure_allocations, save_baseline)
+
+DEFAULT_FIXTURE = os.path.join(project_root, "tests", "fixtures", "commands", "tray_menu.json")
+
+
+def build_menu_data(saved_configs):
+    """The network_manager calls TrayApp.get_pystray_menu makes, without the UI."""
+    network_manager.invalidate_adapter_state()
+    snapshot, _ = network_manager.get_adapter_snapshot()
+    statuses, _ = network_manager.get_adapter_statuses(saved_configs, snapshot=snapshot)
+    adapters, _ = network_manager.list_adapters(snapshot=snapshot)
+    networks, _ = network_manager.get_available_networks()
+    profile_names, _ = network_manager.get_wifi_profile_names()
+    return statuses, adapters, networks, profile_names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="recorded command fixture")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for the recorded latencies")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the result in the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-time", type=float, default=MIN_MEASURE_TIME)
+    args = parser.parse_args(argv)
+
+    network_manager.set_command_runner(command_runner.ReplayRunner(args.fixture, latency_scale=args.latency_scale))
+    saved_configs = {"networks": {}}
+    peak_bytes, blocks = measure_allocations(lambda: build_menu_data(saved_configs))
+    timings = []
+    profiler = cProfile.Profile()
+    while len(timings) < 3 or sum(timings) < args.min_time:
+        started = time.perf_counter()
+        profiler.runcall(build_menu_data, saved_configs)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"menu data x{len(timings)} (latency x{args.latency_scale}): min {timings[0] * 1000:.1f} ms, "
+          f"median {timings[len(timings) // 2] * 1000:.1f} ms, max {timings[-1] * 1000:.1f} ms")
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+    name = f"replay menu data: {os.path.basename(args.fixture)} (latency x{args.latency_scale})"
+    results = {name: {"ops_per_sec": 1 / timings[len(timings) // 2], "peak_bytes": peak_bytes, "blocks": blocks}}
+    baseline = load_baseline(args.baseline)
+    if args.save:
+        save_baseline(dict(baseline, **results), args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for regression_name, reason in regressions:
+        print(f"REGRESSION {regression_name}: {reason}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Hardware capability record persisted between runs.
+
+has_wifi_support() queries the adapter snapshot and enumerates the Wi-Fi profiles, which is
+too slow to run on every startup. The result is stored in CAPABILITY_FILE,
+keyed by a cheap hardware fingerprint; startup reads it instantly and a background probe
+refreshes it, reporting back only when something changed.
+"""
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+import uuid
+
+import network_manager
+
+# Next to the application modules, not wherever the tray happens to be started from.
+CAPABILITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hardware_capabilities.json")
+
+# Fields that describe the hardware; probed_at is bookkeeping and not compared.
+CAPABILITY_FIELDS = ("fingerprint", "wifi_adapters", "interface_types", "profile_count", "has_wifi_support")
+
+
+def hardware_fingerprint() -> str:
+    """Cheap identifier of this machine (host name, OS, architecture and primary MAC address)."""
+    parts = [platform.node(), platform.system(), platform.release(), platform.machine(), f"{uuid.getnode():012x}"]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def probe_capabilities() -> dict:
+    """Probe the adapters and Wi-Fi profiles now: one uncached adapter snapshot and one netsh call."""
+    index, _ = network_manager.get_interface_index(use_cache=False)
+    interface_types = {name: info.media_type for name, info in index.items()}
+    profile_names, _ = network_manager.get_wifi_profile_names()
+    wifi_adapters = sorted(
+        name for name, media_type in interface_types.items() if media_type == network_manager.MEDIA_WIRELESS
+    )
+    return {
+        "fingerprint": hardware_fingerprint(),
+        "wifi_adapters": wifi_adapters,
+        "interface_types": interface_types,
+        "profile_count": len(profile_names),
+        "has_wifi_support": bool(wifi_adapters or profile_names),
+        "probed_at": time.time(),
+    }
+
+
+def load_capabilities(path=CAPABILITY_FILE) -> dict | None:
+    """Return the stored record, or None if there is none or it was probed on different hardware."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or record.get("fingerprint") != hardware_fingerprint():
+        return None
+    return record
+
+
+def save_capabilities(record: dict, path=CAPABILITY_FILE):
+    """Write the record atomically so a crash never leaves a half-written file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def capabilities_differ(old: dict | None, new: dict | None) -> bool:
+    if old is None or new is None:
+        return old is not new
+    return any(old.get(field) != new.get(field) for field in CAPABILITY_FIELDS)
+
+
+def cached_wifi_support(path=CAPABILITY_FILE, default=False) -> bool:
+    """Wi-Fi support as last probed on this hardware, without probing."""
+    record = load_capabilities(path)
+    return bool(record["has_wifi_support"]) if record else default
+
+
+def refresh_capabilities(path=CAPABILITY_FILE, on_change=None) -> dict:
+    """Probe, store the record and call on_change(record) if it differs from the stored one."""
+    previous = load_capabilities(path)
+    record = probe_capabilities()
+    try:
+        save_capabilities(record, path)
+    except OSError as e:
+        print(f"Could not save hardware capabilities to {path}: {e}")
+    if on_change and capabilities_differ(previous, record):
+        on_change(record)
+    return record
+
+
+def refresh_capabilities_in_background(path=CAPABILITY_FILE, on_change=None) -> threading.Thread:
+    """Run refresh_capabilities on a daemon thread and return the thread."""
+    thread = threading.Thread(
+        target=refresh_capabilities, args=(path, on_change), name="capability-probe", daemon=True
+    )
+    thread.start()
+    return thread
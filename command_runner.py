@@ -0,0 +1,256 @@
+"""
+Pluggable backends for the netsh/PowerShell calls made by network_manager.
+
+A runner has two methods, run_command(command_line, timeout=None) and run_powershell(script,
+timeout=None), both returning a subprocess.CompletedProcess (non-zero exit codes are returned,
+not raised; network_manager checks them) and raising subprocess.TimeoutExpired on timeout.
+
+- SubprocessRunner spawns a process per call.
+- WorkerRunner sends the call to the long-lived PowerShell worker, falling back to a spawn.
+- RecordingRunner wraps another runner and captures command, output, exit code and latency,
+  and save() writes them to a JSON fixture file.
+- ReplayRunner answers from such a fixture, optionally sleeping for the recorded latency, so
+  the switching logic can be tested and profiled offline (e.g. on Linux CI). A call that is not
+  in the fixture raises CommandNotRecordedError instead of reaching the network.
+
+Network probes made without a command (socket connects, DNS queries, router HEAD requests) go
+through run_probe/run_probe_async, so recording and replay cover them too: the recording runner
+stores the probe's JSON-serializable result, the replay runner returns it without probing.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import threading
+import time
+
+from powershell_worker import RequestDeliveredError, WorkerError, WorkerTimeoutError, get_shared_worker
+
+FIXTURE_VERSION = 1
+
+KIND_COMMAND = "command"
+KIND_POWERSHELL = "powershell"
+KIND_PROBE = "probe"
+
+
+class CommandNotRecordedError(Exception):
+    """
+    Raised by ReplayRunner for a command or probe that is not in its fixture. network_manager's
+    command handlers re-raise it rather than turning an incomplete fixture into an ordinary error
+    message; thread workers and UI handlers still catch it like any other error.
+    """
+    pass
+
+
+def powershell_command_line(script: str) -> list[str]:
+    return ["powershell.exe", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-Command", script]
+
+
+def run_probe(runner, description, probe):
+    """Run probe() (returning a JSON-serializable result) through runner if it records or replays probes."""
+    run = getattr(runner, "run_probe", None)
+    return run(description, probe) if run is not None else probe()
+
+
+async def run_probe_async(runner, description, probe):
+    """run_probe for a probe coroutine function."""
+    run = getattr(runner, "run_probe_async", None)
+    return await (run(description, probe) if run is not None else probe())
+
+
+class SubprocessRunner:
+    """Real backend: one process per call."""
+
+    def run_command(self, command_line: str, timeout=None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            command_line,
+            shell=True,
+            capture_output=True,
+            text=True,
+            errors="ignore",
+            timeout=timeout,
+        )
+
+    def run_powershell(self, script: str, timeout=None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            powershell_command_line(script),
+            capture_output=True,
+            text=True,
+            errors="ignore",
+            timeout=timeout,
+        )
+
+
+class WorkerRunner:
+    """
+    Real backend routed through a persistent PowerShell worker (the shared one if none is given).
+    Falls back to spawning the command if it never reached the worker (the worker could not be
+    (re)started). A worker that dies after receiving the command may have run it, so the call
+    fails instead of running a second time (e.g. a 'netsh wlan connect').
+    """
+
+    def __init__(self, worker=None, fallback=None):
+        self._worker = worker
+        self.fallback = fallback or SubprocessRunner()
+
+    @property
+    def worker(self):
+        if self._worker is None:
+            self._worker = get_shared_worker()
+        return self._worker
+
+    def _run(self, method_name, text, timeout):
+        worker = self.worker
+        try:
+            return getattr(worker, method_name)(text, timeout=timeout)
+        except WorkerTimeoutError:
+            raise subprocess.TimeoutExpired(text, timeout or worker.request_timeout)
+        except RequestDeliveredError as e:
+            return subprocess.CompletedProcess(text, 1, stdout="", stderr=f"{e} It was not run again.")
+        except WorkerError:
+            return getattr(self.fallback, method_name)(text, timeout=timeout)
+
+    def run_command(self, command_line: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._run("run_command", command_line, timeout)
+
+    def run_powershell(self, script: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._run("run_powershell", script, timeout)
+
+
+class RecordingRunner:
+    """Runs every call through `inner` and records it; save() writes the recording as a fixture."""
+
+    def __init__(self, inner=None, path=None, clock=time.perf_counter):
+        self.inner = inner or SubprocessRunner()
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.records = []
+
+    def _record(self, kind, text, call, timeout):
+        started = self._clock()
+        record = {"kind": kind, "command": text}
+        try:
+            result = call(text, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            record.update(returncode=None, stdout="", stderr="", latency=self._clock() - started, timed_out=True)
+            with self._lock:
+                self.records.append(record)
+            raise
+        record.update(
+            returncode=result.returncode,
+            stdout=result.stdout or "",
+            stderr=result.stderr or "",
+            latency=self._clock() - started,
+            timed_out=False,
+        )
+        with self._lock:
+            self.records.append(record)
+        return result
+
+    def run_command(self, command_line: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._record(KIND_COMMAND, command_line, self.inner.run_command, timeout)
+
+    def run_powershell(self, script: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._record(KIND_POWERSHELL, script, self.inner.run_powershell, timeout)
+
+    def _record_probe(self, description, result, started):
+        with self._lock:
+            self.records.append({"kind": KIND_PROBE, "command": description, "result": result, "latency": self._clock() - started})
+
+    def run_probe(self, description, probe):
+        started = self._clock()
+        result = run_probe(self.inner, description, probe)
+        self._record_probe(description, result, started)
+        return result
+
+    async def run_probe_async(self, description, probe):
+        started = self._clock()
+        result = await run_probe_async(self.inner, description, probe)
+        self._record_probe(description, result, started)
+        return result
+
+    def save(self, path=None):
+        """Write the recorded calls to path (or the path given at construction), atomically."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No fixture path given.")
+        with self._lock:
+            data = {"version": FIXTURE_VERSION, "commands": list(self.records)}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, path)
+
+
+def load_fixture(path) -> list[dict]:
+    """Read the recorded calls of a fixture file written by RecordingRunner.save."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported command fixture version: {data.get('version')}")
+    return data.get("commands", [])
+
+
+class ReplayRunner:
+    """
+    Answers calls from recorded fixtures. Repeated calls of the same command get its recordings
+    in order, and the last one again once they are used up. With latency_scale > 0 every call
+    sleeps for its recorded latency times latency_scale.
+    """
+
+    def __init__(self, records_or_path, latency_scale=0.0, sleep=time.sleep):
+        records = load_fixture(records_or_path) if isinstance(records_or_path, (str, os.PathLike)) else records_or_path
+        self.latency_scale = latency_scale
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._recordings = {} # (kind, command) -> list of records
+        for record in records:
+            self._recordings.setdefault((record["kind"], record["command"]), []).append(record)
+        self._positions = {}
+        self.calls = []
+
+    def _next_record(self, kind, text):
+        key = (kind, text)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                raise CommandNotRecordedError(f"No recording for {kind}: {text}")
+            position = self._positions.get(key, 0)
+            record = recordings[min(position, len(recordings) - 1)]
+            self._positions[key] = position + 1
+            self.calls.append(key)
+        return record
+
+    def _replay(self, kind, text, timeout):
+        record = self._next_record(kind, text)
+        latency = (record.get("latency") or 0.0) * self.latency_scale
+        if record.get("timed_out"):
+            if latency:
+                self._sleep(latency if timeout is None else min(latency, timeout))
+            raise subprocess.TimeoutExpired(text, timeout)
+        if latency:
+            self._sleep(latency)
+        return subprocess.CompletedProcess(
+            text, record.get("returncode") or 0, stdout=record.get("stdout", ""), stderr=record.get("stderr", "")
+        )
+
+    def run_command(self, command_line: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._replay(KIND_COMMAND, command_line, timeout)
+
+    def run_powershell(self, script: str, timeout=None) -> subprocess.CompletedProcess:
+        return self._replay(KIND_POWERSHELL, script, timeout)
+
+    def run_probe(self, description, probe):
+        record = self._next_record(KIND_PROBE, description)
+        latency = (record.get("latency") or 0.0) * self.latency_scale
+        if latency:
+            self._sleep(latency)
+        return record.get("result")
+
+    async def run_probe_async(self, description, probe):
+        record = self._next_record(KIND_PROBE, description)
+        latency = (record.get("latency") or 0.0) * self.latency_scale
+        if latency:
+            await asyncio.sleep(latency)
+        return record.get("result")
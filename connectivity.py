@@ -0,0 +1,230 @@
+"""
+Post-switch connectivity verifier.
+
+Right after a configuration is applied, probes the new gateway, the DNS servers and optional
+extra targets concurrently, retrying each probe until it answers or the verification window
+closes:
+- TCP connect: a completed handshake or a refusal (RST) both prove the host is reachable.
+- DNS query: one UDP A-record query; any well-formed answer (even NXDOMAIN) proves DNS works.
+- ICMP ping (optional): one echo request through the system ping command.
+The report gives the time to the first answer from the network and to the first DNS answer,
+measured from the start of the verification. Ports are parameters so the probes can be tested
+against local stand-in listeners.
+"""
+import os
+import random
+import socket
+import struct
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import command_runner
+import network_manager
+
+PROBE_TCP = "tcp"
+PROBE_DNS = "dns"
+PROBE_PING = "ping"
+
+DEFAULT_WINDOW = 5.0 # seconds the whole verification may take
+DEFAULT_ATTEMPT_TIMEOUT = 1.0 # seconds a single probe attempt may take
+DEFAULT_RETRY_INTERVAL = 0.25 # pause between attempts of a probe that got no answer
+DEFAULT_GATEWAY_PORT = 80 # router admin page; a refusal counts as reachable too
+DEFAULT_DNS_PORT = 53
+DEFAULT_DNS_HOSTNAME = "www.msftconnecttest.com"
+MAX_PROBE_WORKERS = 8
+
+DNS_TYPE_A = 1
+DNS_CLASS_IN = 1
+DNS_FLAG_RESPONSE = 0x8000
+DNS_FLAG_RECURSION_DESIRED = 0x0100
+
+
+class ProbeTarget(NamedTuple):
+    kind: str # PROBE_TCP, PROBE_DNS or PROBE_PING
+    host: str
+    port: int | None
+    role: str # "gateway", "dns" or "target"
+
+
+class ProbeResult(NamedTuple):
+    target: ProbeTarget
+    success: bool
+    elapsed: float | None # seconds from the start of the verification to the first answer
+    attempts: int
+    error: str | None
+
+
+class ConnectivityReport(NamedTuple):
+    results: list
+    time_to_first_packet: float | None # first answer from any probe
+    time_to_dns: float | None # first answer from a DNS server
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.time_to_first_packet is not None and (
+            self.time_to_dns is not None or not any(r.target.kind == PROBE_DNS for r in self.results)
+        )
+
+
+def tcp_probe(host, port, timeout=DEFAULT_ATTEMPT_TIMEOUT):
+    """None if host:port answered (connected or refused), otherwise the error text."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return None
+    except ConnectionRefusedError:
+        return None # the host sent a reset: it is up and routable
+    except OSError as e:
+        return str(e) or type(e).__name__
+
+
+def build_dns_query(hostname, query_id):
+    header = struct.pack("!HHHHHH", query_id, DNS_FLAG_RECURSION_DESIRED, 1, 0, 0, 0)
+    question = b"".join(bytes([len(label)]) + label.encode("ascii") for label in hostname.strip(".").split("."))
+    return header + question + b"\0" + struct.pack("!HH", DNS_TYPE_A, DNS_CLASS_IN)
+
+
+def dns_probe(server, hostname=DEFAULT_DNS_HOSTNAME, port=DEFAULT_DNS_PORT, timeout=DEFAULT_ATTEMPT_TIMEOUT):
+    """None if server answered an A query for hostname, otherwise the error text."""
+    query_id = random.randrange(0x10000)
+    deadline = time.monotonic() + timeout
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(build_dns_query(hostname, query_id), (server, port))
+            while True:
+                sock.settimeout(max(0.001, deadline - time.monotonic()))
+                data, _ = sock.recvfrom(512)
+                if len(data) >= 12:
+                    answer_id, flags = struct.unpack("!HH", data[:4])
+                    if answer_id == query_id and flags & DNS_FLAG_RESPONSE:
+                        return None
+    except socket.timeout:
+        return "no answer"
+    except OSError as e:
+        return str(e) or type(e).__name__
+
+
+def ping_probe(host, timeout=DEFAULT_ATTEMPT_TIMEOUT):
+    """None if host answered one ICMP echo request (through the system ping command), otherwise the error text."""
+    if os.name == "nt":
+        command = f"ping -n 1 -w {max(1, int(timeout * 1000))} {host}"
+    else:
+        command = f"ping -c 1 -W {max(1, int(round(timeout)))} {host}"
+    try:
+        network_manager._run_command(command, timeout=timeout + 1.0)
+        return None
+    except subprocess.CalledProcessError:
+        return "no reply"
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return str(e) or type(e).__name__
+
+
+def _parse_target(target):
+    """(host, port) from a (host, port) tuple or a "host:port" string."""
+    if isinstance(target, (tuple, list)):
+        return target[0], int(target[1])
+    host, _, port = str(target).rpartition(":")
+    return host, int(port)
+
+
+def build_probe_targets(gateway, dns_servers, targets=(), ping=False,
+                        gateway_port=DEFAULT_GATEWAY_PORT, dns_port=DEFAULT_DNS_PORT) -> list[ProbeTarget]:
+    probes = []
+    if gateway:
+        probes.append(ProbeTarget(PROBE_TCP, gateway, gateway_port, "gateway"))
+        if ping:
+            probes.append(ProbeTarget(PROBE_PING, gateway, None, "gateway"))
+    for server in dict.fromkeys(s for s in dns_servers if s): # unique, in order
+        probes.append(ProbeTarget(PROBE_DNS, server, dns_port, "dns"))
+    for target in targets or ():
+        host, port = _parse_target(target)
+        probes.append(ProbeTarget(PROBE_TCP, host, port, "target"))
+        if ping:
+            probes.append(ProbeTarget(PROBE_PING, host, None, "target"))
+    return probes
+
+
+def _run_probe(target, started, window, attempt_timeout, retry_interval, dns_hostname, clock, sleep):
+    attempts, error = 0, None
+    while True:
+        remaining = window - (clock() - started)
+        if remaining <= 0:
+            return ProbeResult(target, False, None, attempts, error or "not attempted")
+        timeout = min(attempt_timeout, remaining)
+        attempts += 1
+        # Socket probes go through the command runner so they are recorded and replayed with the commands.
+        if target.kind == PROBE_TCP:
+            error = command_runner.run_probe(
+                network_manager.get_command_runner(), f"tcp {target.host}:{target.port}",
+                lambda: tcp_probe(target.host, target.port, timeout),
+            )
+        elif target.kind == PROBE_DNS:
+            error = command_runner.run_probe(
+                network_manager.get_command_runner(), f"dns {target.host}:{target.port} {dns_hostname}",
+                lambda: dns_probe(target.host, dns_hostname, target.port, timeout),
+            )
+        else:
+            error = ping_probe(target.host, timeout)
+        if error is None:
+            return ProbeResult(target, True, clock() - started, attempts, None)
+        sleep(min(retry_interval, max(0.0, window - (clock() - started))))
+
+
+def verify_connectivity(gateway, dns_servers, targets=(), ping=False, window=DEFAULT_WINDOW,
+                        attempt_timeout=DEFAULT_ATTEMPT_TIMEOUT, retry_interval=DEFAULT_RETRY_INTERVAL,
+                        dns_hostname=DEFAULT_DNS_HOSTNAME, gateway_port=DEFAULT_GATEWAY_PORT,
+                        dns_port=DEFAULT_DNS_PORT, clock=time.monotonic, sleep=time.sleep) -> ConnectivityReport:
+    """Probe the gateway, DNS servers and targets ("host:port" or (host, port)) concurrently."""
+    probes = build_probe_targets(gateway, dns_servers, targets, ping, gateway_port, dns_port)
+    started = clock()
+    if not probes:
+        return ConnectivityReport([], None, None, 0.0)
+    with ThreadPoolExecutor(max_workers=min(MAX_PROBE_WORKERS, len(probes))) as executor:
+        futures = [
+            executor.submit(_run_probe, target, started, window, attempt_timeout, retry_interval, dns_hostname, clock, sleep)
+            for target in probes
+        ]
+        results = [future.result() for future in futures]
+    packet_times = [r.elapsed for r in results if r.success]
+    dns_times = [r.elapsed for r in results if r.success and r.target.kind == PROBE_DNS]
+    return ConnectivityReport(
+        results,
+        min(packet_times) if packet_times else None,
+        min(dns_times) if dns_times else None,
+        clock() - started,
+    )
+
+
+def verify_adapter_connectivity(adapter_name, config=None, **kwargs) -> ConnectivityReport:
+    """Verify with the gateway and DNS servers of a profile, falling back to the adapter's live values."""
+    config = config or {}
+    gateway = config.get("gateway", "")
+    dns_servers = [config.get("dns_primary", ""), config.get("dns_secondary", "")]
+    if not gateway or not any(dns_servers):
+        live_config, _ = network_manager.get_current_adapter_config(adapter_name)
+        if live_config:
+            gateway = gateway or live_config.get("gateway", "")
+            if not any(dns_servers):
+                dns_servers = [s.strip() for s in live_config.get("dns_servers", "").split(",")]
+    return verify_connectivity(gateway, dns_servers, **kwargs)
+
+
+def describe_report(report: ConnectivityReport) -> str:
+    """One-line summary for the tray notification."""
+    if not report.results:
+        return "No gateway or DNS server to verify."
+    parts = []
+    if report.time_to_first_packet is not None:
+        parts.append(f"first packet after {report.time_to_first_packet:.2f}s")
+    else:
+        unreachable = sorted({r.target.host for r in report.results if r.target.kind != PROBE_DNS and not r.success})
+        if unreachable:
+            parts.append(f"no answer from {', '.join(unreachable)}")
+    if report.time_to_dns is not None:
+        parts.append(f"DNS after {report.time_to_dns:.2f}s")
+    elif any(r.target.kind == PROBE_DNS for r in report.results):
+        parts.append("no DNS answer")
+    status = "Network reachable" if report.ok else "Connectivity problem"
+    return network_manager._sanitize_message_for_notification(f"{status}: {', '.join(parts)} (checked in {report.elapsed:.1f}s).")
@@ -19,8 +19,13 @@ class EncryptionKeyError(Exception):
 class DBManager:
     """Manages SQLite database for network configurations, bookmarks, history, and Wi-Fi profiles."""
 
-    def __init__(self):
+    def __init__(self, on_wifi_profile_changed=None):
+        """
+        on_wifi_profile_changed(ssid) is called after a Wi-Fi profile's password or auth type is
+        changed or the profile is deleted, e.g. to drop what is cached about the installed profile.
+        """
         self.db_file = DB_FILE
+        self.on_wifi_profile_changed = on_wifi_profile_changed
         self._fernet = self._get_fernet()
         self.init_db()
 
@@ -110,6 +115,44 @@ class DBManager:
             )
         """
         )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS signal_samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL,
+                ssid TEXT,
+                bssid TEXT,
+                signal INTEGER
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_signal_samples_ssid_time ON signal_samples (ssid, timestamp)"
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS profile_sets (
+                set_name TEXT NOT NULL,
+                config_name TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (set_name, config_name),
+                FOREIGN KEY (config_name) REFERENCES configs(name) ON DELETE CASCADE
+            )
+        """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS switch_spans (
+                switch_id INTEGER NOT NULL,
+                profile TEXT NOT NULL,
+                span TEXT NOT NULL,
+                duration_us INTEGER NOT NULL
+            )
+        """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_switch_spans_profile ON switch_spans (profile, switch_id)"
+        )
         conn.commit()
         conn.close()
 
@@ -202,6 +245,66 @@ class DBManager:
         conn.commit()
         conn.close()
 
+    def load_profile_sets(self):
+        """Profile sets: set name -> names of its member configurations (one per adapter), in order."""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        cursor.execute("SELECT set_name, config_name FROM profile_sets ORDER BY set_name, position")
+        rows = cursor.fetchall()
+        conn.close()
+        profile_sets = {}
+        for set_name, config_name in rows:
+            profile_sets.setdefault(set_name, []).append(config_name)
+        return profile_sets
+
+    def save_profile_set(self, set_name, config_names):
+        """
+        Save or replace a profile set. Every member must name an existing configuration, once.
+        Returns (bool, str) for success/failure.
+        """
+        if not set_name:
+            return False, "Profile set name is required."
+        if not config_names:
+            return False, f"Profile set '{set_name}' needs at least one configuration."
+        if len(set(config_names)) != len(config_names):
+            return False, f"Profile set '{set_name}' lists a configuration more than once."
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA foreign_keys = ON")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT name FROM configs")
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [config_name for config_name in config_names if config_name not in existing]
+            if missing:
+                return False, f"Profile set '{set_name}' refers to missing configurations: {', '.join(missing)}."
+            cursor.execute("DELETE FROM profile_sets WHERE set_name = ?", (set_name,))
+            cursor.executemany(
+                "INSERT INTO profile_sets (set_name, config_name, position) VALUES (?, ?, ?)",
+                [(set_name, config_name, position) for position, config_name in enumerate(config_names)],
+            )
+            conn.commit()
+            return True, f"Profile set '{set_name}' saved successfully."
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Database error saving profile set '{set_name}': {e}")
+            return False, f"Database error saving profile set '{set_name}': {e}"
+        finally:
+            conn.close()
+
+    def delete_profile_set(self, set_name):
+        """Delete a profile set (its member configurations are kept)."""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM profile_sets WHERE set_name = ?", (set_name,))
+            conn.commit()
+            return True, f"Profile set '{set_name}' deleted."
+        except sqlite3.Error as e:
+            print(f"Database error deleting profile set '{set_name}': {e}")
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
     def add_bookmark(self, name, url, router_ip):
         """Add a bookmark."""
         conn = sqlite3.connect(self.db_file)
@@ -246,6 +349,16 @@ class DBManager:
         conn.close()
         return [(row[0], row[1]) for row in rows]
 
+    def _decrypt_stored_password(self, stored_password_str):
+        """Plaintext of a stored (encrypted, base64 encoded) password, or None if it cannot be decrypted."""
+        if not stored_password_str:
+            return ""
+        try:
+            encrypted_password_bytes = base64.urlsafe_b64decode(stored_password_str.encode('utf-8'))
+            return self._fernet.decrypt(encrypted_password_bytes).decode('utf-8')
+        except (InvalidToken, binascii.Error, ValueError):
+            return None
+
     def save_wifi_profile(self, config_name, ssid, password, auth_type):
         """Save a Wi-Fi profile associated with a config, encrypting the password."""
         if not self._fernet:
@@ -261,6 +374,11 @@ class DBManager:
         conn = sqlite3.connect(self.db_file)
         cursor = conn.cursor()
         try:
+            cursor.execute(
+                "SELECT password, auth_type FROM wifi_profiles WHERE config_name = ? AND ssid = ?",
+                (config_name, ssid),
+            )
+            previous = cursor.fetchone()
             cursor.execute(
                 """
                 INSERT OR REPLACE INTO wifi_profiles (config_name, ssid, password, auth_type)
@@ -269,6 +387,9 @@ class DBManager:
                 (config_name, ssid, encrypted_password_b64_str, auth_type),
             )
             conn.commit()
+            # The installed system profile was built from the old password/auth type; make the next apply reinstall it.
+            if previous is None or previous[1] != auth_type or self._decrypt_stored_password(previous[0]) != password:
+                self._wifi_profile_changed(ssid)
             return True, f"Wi-Fi profile for SSID '{ssid}' (config: '{config_name}') saved."
         except sqlite3.Error as e:
             print(f"Database error saving Wi-Fi profile for SSID '{ssid}': {e}")
@@ -327,6 +448,10 @@ class DBManager:
         return processed_profiles, None
 
 
+    def _wifi_profile_changed(self, ssid):
+        if self.on_wifi_profile_changed:
+            self.on_wifi_profile_changed(ssid)
+
     def delete_wifi_profile(self, config_name, ssid):
         """Delete a specific Wi-Fi profile."""
         conn = sqlite3.connect(self.db_file)
@@ -337,6 +462,7 @@ class DBManager:
                 (config_name, ssid),
             )
             conn.commit()
+            self._wifi_profile_changed(ssid)
             return True, "Wi-Fi profile deleted successfully."
         except sqlite3.Error as e:
             print(f"Database error deleting Wi-Fi profile: {e}")
@@ -344,6 +470,44 @@ class DBManager:
         finally:
             conn.close()
 
+    def save_signal_samples(self, samples):
+        """Append (timestamp, ssid, bssid, signal) samples from signal_history.SignalHistory.flush."""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                "INSERT INTO signal_samples (timestamp, ssid, bssid, signal) VALUES (?, ?, ?, ?)",
+                samples,
+            )
+            conn.commit()
+            return True, f"Saved {len(samples)} signal samples."
+        except sqlite3.Error as e:
+            print(f"Database error saving signal samples: {e}")
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
+    def get_signal_samples(self, ssid=None, since=None):
+        """Stored (timestamp, ssid, bssid, signal) samples, oldest first, optionally for one SSID and/or since a time."""
+        conn = sqlite3.connect(self.db_file)
+        cursor = conn.cursor()
+        query = "SELECT timestamp, ssid, bssid, signal FROM signal_samples WHERE 1 = 1"
+        params = []
+        if ssid is not None:
+            query += " AND ssid = ?"
+            params.append(ssid)
+        if since is not None:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        try:
+            cursor.execute(query + " ORDER BY timestamp", params)
+            return cursor.fetchall(), None
+        except sqlite3.Error as e:
+            print(f"Database error loading signal samples: {e}")
+            return [], f"Database error: {e}"
+        finally:
+            conn.close()
+
     # 3. Implement export_all_data
     def export_all_data(self) -> tuple[str | None, str | None]:
         """Exports all network and Wi-Fi configurations to a JSON string."""
@@ -359,6 +523,7 @@ class DBManager:
                 "network_configurations": configs_data.get("networks", {}),
                 # wifi_profiles_data_list is already a list of tuples
                 "wifi_profiles": wifi_profiles_data_list,
+                "profile_sets": self.load_profile_sets(),
                 # router_refresh_interval is part of network_configurations
             }
             json_string = json.dumps(export_data, indent=4)
@@ -410,6 +575,19 @@ class DBManager:
                 failed_net_configs_count += 1
                 net_config_errors.append(f"'{name}': {msg}")
 
+        # Import Profile Sets (optional: older exports have none)
+        profile_sets_to_import = data.get("profile_sets", {})
+        if not isinstance(profile_sets_to_import, dict):
+            return False, "Import failed: 'profile_sets' must be a dictionary."
+        for set_name, config_names in profile_sets_to_import.items():
+            if isinstance(config_names, list):
+                success, msg = self.save_profile_set(set_name, config_names)
+            else:
+                success, msg = False, "members must be a list of configuration names."
+            if not success:
+                failed_net_configs_count += 1
+                net_config_errors.append(f"Profile set '{set_name}': {msg}")
+
         # Import Wi-Fi Profiles
         wifi_profiles_to_import = data.get("wifi_profiles", [])
         if not isinstance(wifi_profiles_to_import, list):
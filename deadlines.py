@@ -0,0 +1,130 @@
+"""
+Deadline budgets for netsh/PowerShell calls.
+
+Every command gets a timeout: DEFAULT_COMMAND_TIMEOUT, or less inside a budget. An operation
+with a latency target runs under one, e.g.
+
+    with deadlines.budget(1.5, "menu refresh") as deadline:
+        ...
+
+and every command started in that context while it is active is limited to the remaining
+budget; once the budget is spent, commands time out without being started. Callers keep the
+results that arrived in time and check deadline.timed_out for what is missing. A cancelled
+budget (Deadline.cancel) is spent at once, so the operation stops before its next command;
+those commands are not counted as timeouts. Timeouts are
+counted per command label (e.g. "netsh wlan show" or "Get-NetAdapter"), see timeout_stats().
+"""
+import contextlib
+import contextvars
+import re
+import threading
+import time
+
+DEFAULT_COMMAND_TIMEOUT = 30.0 # seconds any single command may run outside a tighter budget
+
+_POWERSHELL_CMDLET = re.compile(r"\b([A-Z][a-z]+-[A-Za-z]+)\b")
+_PLAIN_WORD = re.compile(r"^-?[A-Za-z.]+$") # leaves out names, paths and key=value arguments
+
+_current_deadline = contextvars.ContextVar("current_deadline", default=None)
+
+
+class Deadline:
+    """A time budget; records the labels of the commands that timed out under it."""
+
+    def __init__(self, seconds: float, name: str = "", clock=time.monotonic):
+        self.name = name
+        self.seconds = seconds
+        self._clock = clock
+        self._ends_at = clock() + seconds
+        self.timed_out = []
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        return max(0.0, self._ends_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cancel(self):
+        """Spend the budget now: commands not started yet time out without being started."""
+        self.cancelled = True
+        self._ends_at = float("-inf")
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def budget(seconds: float, name: str = "", clock=time.monotonic):
+    """Run the block under a Deadline of `seconds` (never longer than an enclosing budget's remainder)."""
+    outer = _current_deadline.get()
+    if outer is not None:
+        seconds = min(seconds, outer.remaining())
+    deadline = Deadline(seconds, name, clock)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+        if outer is not None:
+            outer.timed_out.extend(deadline.timed_out)
+
+
+def command_timeout(timeout: float | None = None) -> float:
+    """Timeout for the next command: the requested one (or the default), capped by the current budget."""
+    timeout = DEFAULT_COMMAND_TIMEOUT if timeout is None else min(timeout, DEFAULT_COMMAND_TIMEOUT)
+    deadline = _current_deadline.get()
+    return timeout if deadline is None else min(timeout, deadline.remaining())
+
+
+def command_label(command) -> str:
+    """Short, secret-free name of a command line, argument list or PowerShell script for the timeout counts."""
+    text = " ".join(command) if isinstance(command, (list, tuple)) else str(command)
+    cmdlet = _POWERSHELL_CMDLET.search(text)
+    words = text.split()
+    if words and words[0].lower() in ("netsh", "netsh.exe"):
+        return " ".join(word for word in words[:3] if _PLAIN_WORD.match(word))
+    if cmdlet:
+        return cmdlet.group(1)
+    return words[0] if words else ""
+
+
+class TimeoutCounter:
+    """Per-label count of command timeouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, label: str):
+        with self._lock:
+            self._counts[label] = self._counts.get(label, 0) + 1
+
+    def counts(self) -> dict[str, int]:
+        """Label -> timeouts, most frequent first."""
+        with self._lock:
+            return dict(sorted(self._counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+
+timeout_counter = TimeoutCounter()
+
+
+def record_timeout(command, timeout: float | None = None):
+    """Count a timed-out command and note it on the current budget (unless the budget was cancelled)."""
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.cancelled:
+        return
+    label = command_label(command)
+    timeout_counter.record(label)
+    if deadline is not None:
+        deadline.timed_out.append(label)
+    print(f"Command timed out{f' after {timeout:.2f}s' if timeout is not None else ''}: {label}")
+
+
+def timeout_stats() -> dict[str, int]:
+    return timeout_counter.counts()
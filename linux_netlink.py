@@ -0,0 +1,448 @@
+"""
+Linux adapter backend that spawns no processes.
+
+Reads interfaces, IPv4 addresses, routes and link state straight from an rtnetlink socket and
+returns the same adapter snapshot entries as network_manager.parse_adapter_snapshot, so
+get_current_adapter_config and list_adapters give the same dict and tuple shapes as their
+network_manager counterparts. Used on the Linux test fleet and as a performance reference for
+the spawn-based path (see benchmarks/bench_linux_netlink.py).
+
+Where netlink sockets are unavailable (e.g. a restricted container) the same data is read from
+/sys/class/net, /proc/net/route and SIOCGIFADDR/SIOCGIFNETMASK ioctls instead.
+DNS servers come from /etc/resolv.conf, which on Linux applies to every adapter. An address is
+reported as DHCP-assigned when it has a finite lifetime (no IFA_F_PERMANENT flag), which is
+how DHCP clients install their leases.
+"""
+import os
+import socket
+import struct
+import threading
+from typing import NamedTuple
+
+import network_manager
+
+SYS_CLASS_NET = "/sys/class/net"
+PROC_NET_ROUTE = "/proc/net/route"
+RESOLV_CONF = "/etc/resolv.conf"
+
+# linux/netlink.h, linux/rtnetlink.h, linux/if_link.h, linux/if_addr.h
+NETLINK_ROUTE = 0
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_GETROUTE = 26
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLA_TYPE_MASK = 0x3FFF
+
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_FLAGS = 8
+RTA_DST = 1
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_PRIORITY = 6
+RTA_TABLE = 15
+
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+IFF_LOWER_UP = 0x10000
+IFA_F_SECONDARY = 0x1
+IFA_F_PERMANENT = 0x80
+IF_OPER_UNKNOWN = 0
+IF_OPER_DOWN = 2
+IF_OPER_UP = 6
+RT_TABLE_MAIN = 254
+ARPHRD_LOOPBACK = 772
+
+# Multicast groups a change source joins: link state, IPv4 addresses and IPv4 routes.
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+
+OPERSTATE_NAMES = {"up": IF_OPER_UP, "unknown": IF_OPER_UNKNOWN, "down": IF_OPER_DOWN} # /sys/class/net/<name>/operstate
+
+RECEIVE_BUFFER_SIZE = 65536
+
+_NLMSGHDR = struct.Struct("=IHHII") # length, type, flags, sequence, port id
+_RTATTR = struct.Struct("=HH") # length, type
+_IFINFOMSG = struct.Struct("=BxHiII") # family, device type, index, flags, change mask
+_IFADDRMSG = struct.Struct("=BBBBI") # family, prefix length, flags, scope, index
+_RTMSG = struct.Struct("=BBBBBBBBI") # family, dst/src length, tos, table, protocol, scope, type, flags
+
+
+class LinkInfo(NamedTuple):
+    index: int
+    name: str
+    flags: int # IFF_* flags
+    operstate: int # IF_OPER_*
+    link_type: int # ARPHRD_*
+
+
+class AddressInfo(NamedTuple):
+    index: int
+    address: str
+    prefix_length: int
+    flags: int # IFA_F_*
+
+
+class RouteInfo(NamedTuple):
+    index: int # output interface
+    destination: str # "" for the default route
+    prefix_length: int
+    gateway: str
+    metric: int
+
+
+def netlink_available() -> bool:
+    return hasattr(socket, "AF_NETLINK")
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def iter_messages(data: bytes):
+    """Yield (message type, payload) for each netlink message in data; raises OSError for NLMSG_ERROR."""
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        payload = data[offset + _NLMSGHDR.size:offset + length]
+        if msg_type == NLMSG_ERROR:
+            error = -struct.unpack_from("=i", payload)[0]
+            if error:
+                raise OSError(error, os.strerror(error))
+        else:
+            yield msg_type, payload
+        offset += _align(length)
+
+
+def parse_attributes(data: bytes, offset: int = 0) -> dict[int, bytes]:
+    """Map attribute type -> value for the rtattrs in data starting at offset."""
+    attributes = {}
+    while offset + _RTATTR.size <= len(data):
+        length, attr_type = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        attributes[attr_type & NLA_TYPE_MASK] = data[offset + _RTATTR.size:offset + length]
+        offset += _align(length)
+    return attributes
+
+
+def _ipv4(value: bytes | None) -> str:
+    return socket.inet_ntoa(value) if value and len(value) == 4 else ""
+
+
+def parse_link(payload: bytes) -> LinkInfo | None:
+    _, link_type, index, flags, _ = _IFINFOMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, _IFINFOMSG.size)
+    name = attributes.get(IFLA_IFNAME, b"").split(b"\0", 1)[0].decode("utf-8", "replace")
+    if not name:
+        return None
+    operstate = attributes.get(IFLA_OPERSTATE, bytes([IF_OPER_UNKNOWN]))[0]
+    return LinkInfo(index, name, flags, operstate, link_type)
+
+
+def parse_address(payload: bytes) -> AddressInfo | None:
+    family, prefix_length, flags, _, index = _IFADDRMSG.unpack_from(payload)
+    if family != socket.AF_INET:
+        return None
+    attributes = parse_attributes(payload, _IFADDRMSG.size)
+    if IFA_FLAGS in attributes: # 32-bit flags, superseding the 8-bit ones in the header
+        flags = struct.unpack("=I", attributes[IFA_FLAGS][:4])[0]
+    # IFA_LOCAL is the interface's own address; IFA_ADDRESS is the peer on point-to-point links.
+    address = _ipv4(attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS))
+    return AddressInfo(index, address, prefix_length, flags) if address else None
+
+
+def parse_route(payload: bytes) -> RouteInfo | None:
+    family, dst_length, _, _, table, _, _, _, _ = _RTMSG.unpack_from(payload)
+    if family != socket.AF_INET:
+        return None
+    attributes = parse_attributes(payload, _RTMSG.size)
+    if RTA_TABLE in attributes:
+        table = struct.unpack("=I", attributes[RTA_TABLE][:4])[0]
+    if table != RT_TABLE_MAIN or RTA_OIF not in attributes:
+        return None
+    index = struct.unpack("=i", attributes[RTA_OIF][:4])[0]
+    metric = struct.unpack("=I", attributes[RTA_PRIORITY][:4])[0] if RTA_PRIORITY in attributes else 0
+    return RouteInfo(index, _ipv4(attributes.get(RTA_DST)), dst_length, _ipv4(attributes.get(RTA_GATEWAY)), metric)
+
+
+class RouteNetlink:
+    """An rtnetlink socket for dump requests; use as a context manager."""
+
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self._socket.bind((0, 0))
+        self._sequence = 0
+
+    def close(self):
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def dump(self, request_type: int, body: bytes, reply_type: int) -> list[bytes]:
+        """Send a dump request and return the payloads of its reply_type messages."""
+        self._sequence += 1
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), request_type, NLM_F_REQUEST | NLM_F_DUMP, self._sequence, 0)
+        self._socket.sendall(header + body)
+        payloads = []
+        while True:
+            data = self._socket.recv(RECEIVE_BUFFER_SIZE)
+            if not data:
+                return payloads
+            for msg_type, payload in iter_messages(data):
+                if msg_type == NLMSG_DONE:
+                    return payloads
+                if msg_type == reply_type:
+                    payloads.append(payload)
+
+    def links(self) -> list[LinkInfo]:
+        payloads = self.dump(RTM_GETLINK, _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0), RTM_NEWLINK)
+        return [link for link in map(parse_link, payloads) if link]
+
+    def addresses(self) -> list[AddressInfo]:
+        payloads = self.dump(RTM_GETADDR, _IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0), RTM_NEWADDR)
+        return [address for address in map(parse_address, payloads) if address]
+
+    def routes(self) -> list[RouteInfo]:
+        payloads = self.dump(RTM_GETROUTE, _RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0), RTM_NEWROUTE)
+        return [route for route in map(parse_route, payloads) if route]
+
+
+def read_state_netlink():
+    """(links, addresses, routes) from one rtnetlink socket."""
+    with RouteNetlink() as netlink:
+        return netlink.links(), netlink.addresses(), netlink.routes()
+
+
+def _read_text(path, default=""):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _ioctl_ipv4(sock, request, name) -> str:
+    import fcntl # Unix only; imported here so the module loads everywhere
+    try:
+        result = fcntl.ioctl(sock.fileno(), request, struct.pack("256s", name.encode("utf-8")[:15]))
+    except OSError:
+        return ""
+    return socket.inet_ntoa(result[20:24])
+
+
+def read_state_sysfs(sys_root=SYS_CLASS_NET, route_path=PROC_NET_ROUTE):
+    """(links, addresses, routes) from sysfs, /proc/net/route and address ioctls, for hosts without netlink."""
+    links, addresses = [], []
+    names = sorted(os.listdir(sys_root)) if os.path.isdir(sys_root) else []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for name in names:
+            base = os.path.join(sys_root, name)
+            try:
+                index = int(_read_text(os.path.join(base, "ifindex"), "0"))
+                flags = int(_read_text(os.path.join(base, "flags"), "0x0"), 16)
+                link_type = int(_read_text(os.path.join(base, "type"), "0"))
+            except ValueError:
+                continue
+            if _read_text(os.path.join(base, "carrier"), "0") == "1":
+                flags |= IFF_LOWER_UP
+            operstate = OPERSTATE_NAMES.get(_read_text(os.path.join(base, "operstate")), IF_OPER_DOWN)
+            links.append(LinkInfo(index, name, flags, operstate, link_type))
+            address = _ioctl_ipv4(sock, SIOCGIFADDR, name)
+            if address:
+                mask = _ioctl_ipv4(sock, SIOCGIFNETMASK, name)
+                prefix_length = bin(struct.unpack("!I", socket.inet_aton(mask))[0]).count("1") if mask else 32
+                # The ioctls do not report lifetimes; such addresses are reported as static.
+                addresses.append(AddressInfo(index, address, prefix_length, IFA_F_PERMANENT))
+    links.sort(key=lambda link: link.index)
+    return links, addresses, parse_proc_net_route(_read_text(route_path), {link.name: link.index for link in links})
+
+
+def parse_proc_net_route(text: str, indexes: dict[str, int]) -> list[RouteInfo]:
+    """RouteInfos from /proc/net/route (addresses in hex, host byte order) for the interfaces in indexes (name -> index)."""
+    routes = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8 or fields[0] not in indexes:
+            continue
+        try:
+            destination, gateway, mask = (int(fields[i], 16) for i in (1, 2, 7))
+            metric = int(fields[6])
+        except ValueError:
+            continue
+        routes.append(RouteInfo(
+            indexes[fields[0]],
+            socket.inet_ntoa(struct.pack("=I", destination)) if destination else "",
+            bin(mask).count("1"),
+            socket.inet_ntoa(struct.pack("=I", gateway)) if gateway else "",
+            metric,
+        ))
+    return routes
+
+
+def read_dns_servers(path=RESOLV_CONF) -> list[str]:
+    servers = []
+    for line in _read_text(path).splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[0] == "nameserver" and network_manager.validate_ip(fields[1]):
+            servers.append(fields[1])
+    return servers
+
+
+def classify_link(link: LinkInfo, sys_root=SYS_CLASS_NET) -> str:
+    """network_manager.MEDIA_* type of a link, from its flags and sysfs entries."""
+    if link.link_type == ARPHRD_LOOPBACK or link.flags & IFF_LOOPBACK:
+        return network_manager.MEDIA_LOOPBACK
+    base = os.path.join(sys_root, link.name)
+    if os.path.isdir(os.path.join(base, "wireless")) or os.path.exists(os.path.join(base, "phy80211")):
+        return network_manager.MEDIA_WIRELESS
+    if not os.path.exists(os.path.join(base, "device")): # no backing hardware: bridge, veth, tun, ...
+        return network_manager.MEDIA_VIRTUAL
+    return network_manager.MEDIA_WIRED
+
+
+def _link_status(link: LinkInfo) -> str:
+    """Get-NetAdapter style status: Up, Disconnected (no carrier) or Disabled (administratively down)."""
+    if not link.flags & IFF_UP:
+        return "Disabled"
+    if link.operstate == IF_OPER_UP or (link.operstate == IF_OPER_UNKNOWN and link.flags & IFF_LOWER_UP):
+        return "Up"
+    return "Disconnected"
+
+
+def build_snapshot(links, addresses, routes, dns_servers, media_types=None) -> list[dict]:
+    """Adapter snapshot entries (see network_manager.parse_adapter_snapshot) from netlink records."""
+    first_address = {}
+    for address in sorted(addresses, key=lambda a: bool(a.flags & IFA_F_SECONDARY)):
+        first_address.setdefault(address.index, address)
+    default_gateway = {}
+    for route in sorted(routes, key=lambda r: r.metric):
+        if route.prefix_length == 0 and route.gateway:
+            default_gateway.setdefault(route.index, route.gateway)
+    media_types = media_types or {}
+
+    snapshot = []
+    for link in links:
+        media_type = media_types.get(link.name) or (
+            network_manager.MEDIA_LOOPBACK if link.flags & IFF_LOOPBACK else network_manager.MEDIA_WIRED
+        )
+        address = first_address.get(link.index)
+        status = _link_status(link)
+        snapshot.append({
+            "name": link.name,
+            "description": link.name,
+            "status": status,
+            "dhcp_enabled": bool(address) and not address.flags & IFA_F_PERMANENT,
+            "ip_address": address.address if address else "",
+            "prefix_length": address.prefix_length if address else None,
+            "subnet_mask": network_manager._prefix_to_mask(address.prefix_length) if address else "",
+            "gateway": default_gateway.get(link.index, ""),
+            "dns_servers": list(dns_servers) if address and media_type != network_manager.MEDIA_LOOPBACK else [],
+            "media_type": media_type,
+            "admin_state": "Up" if link.flags & IFF_UP else "Down",
+            "connection_state": "Connected" if status == "Up" else "Disconnected",
+        })
+    return snapshot
+
+
+def get_adapter_snapshot(sys_root=SYS_CLASS_NET, resolv_conf=RESOLV_CONF) -> tuple[list[dict] | None, str | None]:
+    """Adapter snapshot read over netlink (or sysfs), and an optional error message."""
+    try:
+        if netlink_available():
+            try:
+                links, addresses, routes = read_state_netlink()
+            except OSError:
+                links, addresses, routes = read_state_sysfs(sys_root)
+        else:
+            links, addresses, routes = read_state_sysfs(sys_root)
+    except OSError as e:
+        return None, network_manager._sanitize_message_for_notification(f"Error reading network adapters: {e}")
+    media_types = {link.name: classify_link(link, sys_root) for link in links}
+    return build_snapshot(links, addresses, routes, read_dns_servers(resolv_conf), media_types), None
+
+
+def list_adapters(snapshot: list[dict] | None = None) -> tuple[list[tuple[str, str]], str | None]:
+    """Same (short_name, detailed_name) tuples and message as network_manager.list_adapters."""
+    if snapshot is None:
+        snapshot, error_msg = get_adapter_snapshot()
+        if error_msg:
+            return [], error_msg
+    adapters = [(entry["name"], entry["description"]) for entry in snapshot if entry.get("status") == "Up"]
+    if not adapters:
+        return [], network_manager._sanitize_message_for_notification("No connected (Status 'Up') network adapters found.")
+    return adapters, None
+
+
+def get_current_adapter_config(adapter_name, snapshot: list[dict] | None = None):
+    """Same config dict as network_manager.get_current_adapter_config, and an optional error message."""
+    if snapshot is None:
+        snapshot, error_msg = get_adapter_snapshot()
+        if error_msg:
+            return None, error_msg
+    for entry in snapshot:
+        if entry["name"] == adapter_name:
+            return network_manager.snapshot_entry_to_config(entry), None
+    return None, network_manager._sanitize_message_for_notification(f"Adapter '{adapter_name}' not found.")
+
+
+class NetlinkChangeSource:
+    """adapter_monitor change source: calls notify() for every link, IPv4 address or route change."""
+
+    def __init__(self, groups=RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE):
+        self.groups = groups
+        self._socket = None
+        self._reader_thread = None
+
+    def start(self, notify):
+        try:
+            self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+            self._socket.bind((0, self.groups))
+        except (AttributeError, OSError) as e:
+            print(f"Could not subscribe to netlink changes, polling instead: {e}")
+            self._socket = None
+            return
+        self._reader_thread = threading.Thread(
+            target=self._read_events, args=(self._socket, notify), name="netlink-change-source", daemon=True
+        )
+        self._reader_thread.start()
+
+    @staticmethod
+    def _read_events(sock, notify):
+        while True:
+            try:
+                data = sock.recv(RECEIVE_BUFFER_SIZE)
+            except OSError: # closed by stop()
+                return
+            if not data:
+                return
+            notify()
+
+    def stop(self):
+        if self._socket is not None:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+        self._socket = None
+
+    def is_event_driven(self) -> bool:
+        return self._socket is not None
@@ -0,0 +1,422 @@
+"""
+Parsers for netsh output.
+
+Every parser makes a single pass over the output with precompiled patterns and yields typed
+records, so one stream may contain several adapters (netsh interface ip show config),
+several Wi-Fi interfaces and several BSSIDs per SSID (netsh wlan show networks mode=bssid).
+Authentication names are translated through the one AUTH_TYPE_MAP table, which also covers the
+names used in exported profile XML (netsh wlan export profile).
+"""
+import re
+from xml.etree import ElementTree
+from typing import Iterator, NamedTuple
+
+# netsh authentication name -> auth type used in profiles and generate_wifi_profile_xml.
+# Both the legacy (WPA2-PSK) and current (WPA2-Personal) spellings are listed.
+AUTH_TYPE_MAP = {
+    "Open": "open",
+    "WEP": "WEP",
+    "Shared": "WEP",
+    "WPA-PSK": "WPAPSK",
+    "WPA-Personal": "WPAPSK",
+    "WPA2-PSK": "WPA2PSK",
+    "WPA2-Personal": "WPA2PSK",
+    "WPA3-SAE": "WPA3SAE",
+    "WPA3-Personal": "WPA3SAE",
+    # profile XML spellings
+    "open": "open",
+    "shared": "WEP",
+    "WPAPSK": "WPAPSK",
+    "WPA2PSK": "WPA2PSK",
+    "WPA3SAE": "WPA3SAE",
+}
+DEFAULT_AUTH_TYPE = "WPA2PSK"
+
+_KEY_VALUE = re.compile(r"^\s*([^:]+?)\s*:\s*(.*?)\s*$")
+_IPV4 = re.compile(r"^(\d{1,3}(?:\.\d{1,3}){3})$")
+_SUBNET_MASK = re.compile(r"\(mask (\d{1,3}(?:\.\d{1,3}){3})\)")
+_INTERFACE_HEADER = re.compile(r'^\s*Configuration for interface "(.+)"\s*$')
+_SSID_HEADER = re.compile(r"^SSID \d+\s*:\s?(.*?)\s*$")
+_BSSID_HEADER = re.compile(r"^\s*BSSID \d+\s*:\s*([0-9A-Fa-f:]{17})\s*$")
+_SIGNAL_PERCENT = re.compile(r"(\d+)\s*%")
+_WLAN_PROFILE_NS = {"wlan": "http://www.microsoft.com/networking/WLAN/profile/v1"}
+
+
+class AdapterIPConfig(NamedTuple):
+    """IPv4 settings of one adapter from 'netsh interface ip show config' (or show dnsservers)."""
+    adapter_name: str
+    dhcp_enabled: bool | None
+    ip_address: str
+    subnet_mask: str
+    gateway: str
+    dns_servers: tuple[str, ...]
+
+
+class BssidRecord(NamedTuple):
+    """One access point (BSSID) from 'netsh wlan show networks mode=bssid'."""
+    interface_name: str
+    ssid: str
+    network_type: str
+    authentication: str
+    auth_type: str
+    encryption: str
+    bssid: str # empty for an SSID listed without BSSID details
+    signal: int # percent, -1 if unknown
+    radio_type: str
+    band: str
+    channel: int | None
+    basic_rates: tuple[float, ...] # Mbps
+
+
+class WifiNetwork(NamedTuple):
+    """One SSID from 'netsh wlan show networks mode=bssid', aggregated over its BSSIDs."""
+    interface_name: str
+    ssid: str
+    network_type: str
+    authentication: str
+    auth_type: str
+    encryption: str
+    signal: str # strongest BSSID, e.g. "90%", or "Unknown"
+    bssid_count: int
+    best_bssid: str
+
+
+class WlanInterfaceState(NamedTuple):
+    """One interface of 'netsh wlan show interfaces'."""
+    name: str
+    state: str # e.g. "connected", "disconnected"
+    ssid: str # "" when not connected
+    bssid: str
+    signal: int # percent, -1 if unknown
+
+
+class WifiProfileDetails(NamedTuple):
+    """One profile from 'netsh wlan show profile name=... key=clear' or an exported profile XML."""
+    name: str
+    authentication: str
+    auth_type: str
+    key_content: str | None
+
+
+def map_auth_type(authentication: str | None) -> str:
+    """Translate a netsh authentication name into an auth type (defaults to WPA2PSK)."""
+    if not authentication:
+        return DEFAULT_AUTH_TYPE
+    authentication = authentication.strip()
+    auth_type = AUTH_TYPE_MAP.get(authentication)
+    if auth_type:
+        return auth_type
+    for netsh_name, mapped in AUTH_TYPE_MAP.items(): # e.g. "WPA2-PSK (TKIP)"
+        if netsh_name.lower() != "open" and netsh_name in authentication:
+            return mapped
+    return DEFAULT_AUTH_TYPE
+
+
+def signal_to_percent(signal: str | None) -> int:
+    """Convert a netsh signal string such as '85%' to an int (-1 if unknown)."""
+    match = _SIGNAL_PERCENT.search(signal or "")
+    return int(match.group(1)) if match else -1
+
+
+def _split(line):
+    match = _KEY_VALUE.match(line)
+    if match:
+        return match.group(1), match.group(2)
+    return None, None
+
+
+# --- netsh interface ip show config / netsh interface ipv4 show dnsservers ---
+
+_IP_CONFIG_FIELDS = {
+    "DHCP enabled": "dhcp_enabled",
+    "IP Address": "ip_address",
+    "Subnet Prefix": "subnet_mask",
+    "Subnet Mask": "subnet_mask",
+    "Default Gateway": "gateway",
+    "Statically Configured DNS Servers": "dns_servers",
+    "DNS servers configured through DHCP": "dns_servers",
+}
+
+
+def _first_ipv4(value):
+    match = _IPV4.match(value)
+    return match.group(1) if match else ""
+
+
+def _build_ip_config(name, fields, dns_servers):
+    return AdapterIPConfig(
+        adapter_name=name,
+        dhcp_enabled=fields.get("dhcp_enabled"),
+        ip_address=fields.get("ip_address", ""),
+        subnet_mask=fields.get("subnet_mask", ""),
+        gateway=fields.get("gateway", ""),
+        dns_servers=tuple(dns_servers),
+    )
+
+
+def iter_ip_configs(output: str) -> Iterator[AdapterIPConfig]:
+    """Yield one AdapterIPConfig per 'Configuration for interface' block."""
+    name = None
+    fields = {}
+    dns_servers = []
+    continuation = None # field whose value may continue on the following bare lines
+
+    for line in output.splitlines():
+        header = _INTERFACE_HEADER.match(line)
+        if header:
+            if name is not None:
+                yield _build_ip_config(name, fields, dns_servers)
+            name, fields, dns_servers, continuation = header.group(1), {}, [], None
+            continue
+        if name is None:
+            continue
+
+        key, value = _split(line)
+        field = _IP_CONFIG_FIELDS.get(key) if key else None
+        if field is None:
+            if key is None and continuation:
+                address = _first_ipv4(line.strip())
+                if address:
+                    if continuation == "dns_servers":
+                        dns_servers.append(address)
+                    elif not fields.get(continuation):
+                        fields[continuation] = address
+                    continue
+            continuation = None
+            continue
+
+        continuation = field
+        if field == "dhcp_enabled":
+            fields[field] = value.lower().startswith("yes")
+        elif field == "subnet_mask":
+            mask = _SUBNET_MASK.search(value)
+            fields[field] = mask.group(1) if mask else _first_ipv4(value)
+        elif field == "dns_servers":
+            address = _first_ipv4(value)
+            if address:
+                dns_servers.append(address)
+        elif not fields.get(field): # keep the first IP address / gateway
+            fields[field] = _first_ipv4(value)
+
+    if name is not None:
+        yield _build_ip_config(name, fields, dns_servers)
+
+
+def parse_ip_config(output: str, adapter_name: str | None = None) -> AdapterIPConfig | None:
+    """Return the block for adapter_name (or the first block) from ip config output."""
+    for record in iter_ip_configs(output):
+        if adapter_name is None or record.adapter_name == adapter_name:
+            return record
+    return None
+
+
+# --- netsh wlan show networks mode=bssid ---
+
+def _parse_rates(value):
+    rates = []
+    for rate in value.split():
+        try:
+            rates.append(float(rate))
+        except ValueError:
+            pass
+    return tuple(rates)
+
+
+def _band_from_channel(channel):
+    if channel is None:
+        return ""
+    return "2.4 GHz" if channel <= 14 else "5 GHz"
+
+
+def _build_bssid(network, bssid):
+    channel = bssid.get("channel")
+    return BssidRecord(
+        interface_name=network["interface_name"],
+        ssid=network["ssid"],
+        network_type=network.get("Network type", ""),
+        authentication=network.get("Authentication", ""),
+        auth_type=map_auth_type(network.get("Authentication")),
+        encryption=network.get("Encryption", ""),
+        bssid=bssid.get("bssid", ""),
+        signal=bssid.get("signal", -1),
+        radio_type=bssid.get("radio_type", ""),
+        band=bssid.get("band") or _band_from_channel(channel),
+        channel=channel,
+        basic_rates=bssid.get("basic_rates", ()),
+    )
+
+
+_BSSID_FIELDS = {
+    "Signal": ("signal", signal_to_percent),
+    "Radio type": ("radio_type", str),
+    "Band": ("band", str),
+    "Channel": ("channel", lambda value: int(value) if value.isdigit() else None),
+    "Basic rates (Mbps)": ("basic_rates", _parse_rates),
+}
+
+
+def iter_bssids(output: str) -> Iterator[BssidRecord]:
+    """
+    Yield one BssidRecord per access point, across all SSIDs and interfaces in the output.
+    An SSID listed without any BSSID block yields a single record with an empty bssid.
+    """
+    interface_name = ""
+    network = None # SSID-level fields of the block being parsed
+    bssid = None # fields of the BSSID being parsed
+
+    def finish_ssid():
+        if bssid is not None:
+            return _build_bssid(network, bssid)
+        if network is not None and not network["bssid_seen"]:
+            return _build_bssid(network, {})
+        return None
+
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        ssid_header = _SSID_HEADER.match(stripped)
+        if ssid_header:
+            record = finish_ssid()
+            if record:
+                yield record
+            network = {"interface_name": interface_name, "ssid": ssid_header.group(1), "bssid_seen": False}
+            bssid = None
+            continue
+        bssid_header = _BSSID_HEADER.match(line)
+        if bssid_header:
+            if bssid is not None:
+                yield _build_bssid(network, bssid)
+            if network is not None:
+                network["bssid_seen"] = True
+                bssid = {"bssid": bssid_header.group(1).lower()}
+            continue
+        key, value = _split(line)
+        if key == "Interface name":
+            record = finish_ssid()
+            if record:
+                yield record
+            network, bssid = None, None
+            interface_name = value
+        elif network is None:
+            continue
+        elif bssid is not None:
+            field = _BSSID_FIELDS.get(key)
+            if field:
+                bssid[field[0]] = field[1](value)
+        elif key in ("Network type", "Authentication", "Encryption"):
+            network[key] = value
+
+    record = finish_ssid()
+    if record:
+        yield record
+
+
+def aggregate_networks(bssids) -> Iterator[WifiNetwork]:
+    """Group BssidRecords by interface and SSID (in order of appearance) into WifiNetworks."""
+    groups = {}
+    for record in bssids:
+        groups.setdefault((record.interface_name, record.ssid), []).append(record)
+    for (interface_name, ssid), records in groups.items():
+        access_points = [record for record in records if record.bssid]
+        strongest = max(records, key=lambda record: record.signal)
+        first = records[0]
+        yield WifiNetwork(
+            interface_name=interface_name,
+            ssid=ssid,
+            network_type=first.network_type,
+            authentication=first.authentication,
+            auth_type=first.auth_type,
+            encryption=first.encryption,
+            signal=f"{strongest.signal}%" if strongest.signal >= 0 else "Unknown",
+            bssid_count=len(access_points),
+            best_bssid=strongest.bssid,
+        )
+
+
+def iter_wifi_networks(output: str) -> Iterator[WifiNetwork]:
+    """Yield one WifiNetwork per SSID block, across all interfaces in the output."""
+    return aggregate_networks(iter_bssids(output))
+
+
+# --- netsh wlan show interfaces ---
+
+def iter_wlan_interfaces(output: str) -> Iterator[WlanInterfaceState]:
+    """Yield the state of every interface listed by 'netsh wlan show interfaces'."""
+    fields = None
+    for line in output.splitlines():
+        key, value = _split(line)
+        if key == "Name":
+            if fields is not None:
+                yield _build_wlan_interface(fields)
+            fields = {"Name": value}
+        elif fields is not None and key in ("State", "SSID", "BSSID", "AP BSSID", "Signal"):
+            fields.setdefault(key, value)
+    if fields is not None:
+        yield _build_wlan_interface(fields)
+
+
+def _build_wlan_interface(fields):
+    state = fields.get("State", "").lower()
+    connected = state == "connected"
+    return WlanInterfaceState(
+        fields["Name"],
+        state,
+        fields.get("SSID", "") if connected else "",
+        (fields.get("BSSID") or fields.get("AP BSSID", "")) if connected else "",
+        signal_to_percent(fields.get("Signal")) if connected else -1,
+    )
+
+
+# --- netsh wlan show profiles / show profile name=... key=clear ---
+
+def iter_wifi_profile_names(output: str) -> Iterator[str]:
+    """Yield the profile names listed by 'netsh wlan show profiles'."""
+    for line in output.splitlines():
+        key, value = _split(line)
+        if key in ("All User Profile", "User Profile") and value:
+            yield value
+
+
+def parse_wifi_profile(output: str) -> WifiProfileDetails:
+    """Parse 'netsh wlan show profile name=... key=clear'; the first Authentication line wins."""
+    name = ""
+    authentication = ""
+    key_content = None
+    for line in output.splitlines():
+        key, value = _split(line)
+        if key == "Name" and not name:
+            name = value
+        elif key == "Authentication" and not authentication:
+            authentication = value
+        elif key == "Key Content" and key_content is None:
+            key_content = value
+    return WifiProfileDetails(
+        name=name,
+        authentication=authentication,
+        auth_type=map_auth_type(authentication),
+        key_content=key_content,
+    )
+
+
+def parse_wifi_profile_xml(xml_data: str | bytes) -> WifiProfileDetails:
+    """Parse one profile XML written by 'netsh wlan export profile key=clear'."""
+    root = ElementTree.fromstring(xml_data)
+    security = root.find("wlan:MSM/wlan:security", _WLAN_PROFILE_NS)
+    authentication = ""
+    encryption = ""
+    key_content = None
+    if security is not None:
+        authentication = security.findtext("wlan:authEncryption/wlan:authentication", "", _WLAN_PROFILE_NS).strip()
+        encryption = security.findtext("wlan:authEncryption/wlan:encryption", "", _WLAN_PROFILE_NS).strip()
+        shared_key = security.find("wlan:sharedKey", _WLAN_PROFILE_NS)
+        # Without key=clear (or elevation) the key is exported encrypted; treat it as absent.
+        if shared_key is not None and shared_key.findtext("wlan:protected", "", _WLAN_PROFILE_NS).strip() != "true":
+            key_content = shared_key.findtext("wlan:keyMaterial", None, _WLAN_PROFILE_NS)
+    auth_type = "WEP" if encryption == "WEP" else map_auth_type(authentication)
+    return WifiProfileDetails(
+        name=root.findtext("wlan:name", "", _WLAN_PROFILE_NS).strip(),
+        authentication=authentication,
+        auth_type=auth_type,
+        key_content=key_content,
+    )
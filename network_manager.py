@@ -2,7 +2,19 @@ import subprocess
 import re
 import tempfile
 import os
+import threading
+import time
 import json # For parsing PowerShell JSON output
+import collections
+import contextvars
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+import command_runner
+import deadlines
+import netsh_parser
+import switch_timing
 
 # Maximum message length for pystray notifications (Windows Shell_NotifyIcon szInfo limit is 256 WCHARs)
 MAX_MESSAGE_LENGTH_FOR_NOTIFY = 250
@@ -13,6 +25,77 @@ def _sanitize_message_for_notification(message: str) -> str:
         return message[:MAX_MESSAGE_LENGTH_FOR_NOTIFY - 3] + "..."
     return message
 
+# Route netsh/PowerShell calls through a long-lived PowerShell worker instead of paying
+# interpreter startup on every call. Enabled by default on Windows.
+USE_POWERSHELL_WORKER = os.name == "nt"
+# Backend every netsh/PowerShell call goes through (see command_runner); None selects the
+# default from USE_POWERSHELL_WORKER on first use.
+_command_runner = None
+
+
+def set_command_runner(runner):
+    """
+    Route every command through runner, e.g. a command_runner.RecordingRunner to capture a
+    fixture or a ReplayRunner to answer from one. None restores the default backend.
+    """
+    global _command_runner
+    _command_runner = runner
+
+
+def get_command_runner():
+    global _command_runner
+    if _command_runner is None:
+        _command_runner = command_runner.WorkerRunner() if USE_POWERSHELL_WORKER else command_runner.SubprocessRunner()
+    return _command_runner
+
+
+def enable_powershell_worker(worker=None):
+    """Route all commands through a persistent worker (the shared PowerShell worker if none is given)."""
+    global USE_POWERSHELL_WORKER
+    USE_POWERSHELL_WORKER = True
+    set_command_runner(command_runner.WorkerRunner(worker))
+
+
+def disable_powershell_worker():
+    """Run every command in its own process again."""
+    global USE_POWERSHELL_WORKER
+    USE_POWERSHELL_WORKER = False
+    set_command_runner(command_runner.SubprocessRunner())
+
+
+def _check_completed(result: subprocess.CompletedProcess) -> subprocess.CompletedProcess:
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args, output=result.stdout, stderr=result.stderr)
+    return result
+
+
+def _run_with_deadline(run, text, timeout):
+    """Run through a runner method with a timeout capped by the current deadline budget (see deadlines)."""
+    timeout = deadlines.command_timeout(timeout)
+    try:
+        if timeout <= 0: # budget already spent: do not start the command
+            raise subprocess.TimeoutExpired(text, 0)
+        with switch_timing.timed_command(text):
+            return _check_completed(run(text, timeout=timeout))
+    except subprocess.TimeoutExpired:
+        deadlines.record_timeout(text, timeout)
+        raise
+
+
+def _run_command(command: str, timeout=None, runner=None) -> subprocess.CompletedProcess:
+    """
+    Run a shell command line (e.g. netsh) through the command runner (or the given runner) and
+    return the completed process.
+    Raises subprocess.CalledProcessError on a non-zero exit code and subprocess.TimeoutExpired on timeout.
+    """
+    return _run_with_deadline((runner or get_command_runner()).run_command, command, timeout)
+
+
+def _run_powershell(ps_command: str, timeout=None) -> subprocess.CompletedProcess:
+    """Run a PowerShell script through the command runner (the worker when enabled, otherwise a fresh powershell.exe)."""
+    return _run_with_deadline(get_command_runner().run_powershell, ps_command, timeout)
+
+
 def validate_ip(ip):
     """Validate IP address: each octet must be 0–255."""
     if not ip:
@@ -21,42 +104,275 @@ def validate_ip(ip):
     return bool(re.match(pattern, ip))
 
 
-def apply_network_config(adapter_name, config):
-    """Apply network configuration using netsh."""
-    try:
-        for field in ["ip_address", "subnet_mask", "gateway", "dns_primary"]:
-            if not validate_ip(config[field]):
-                raise ValueError(f"Invalid {field}: {config[field]}")
-        if config["dns_secondary"] and not validate_ip(config["dns_secondary"]):
-            raise ValueError(f"Invalid dns_secondary: {config['dns_secondary']}")
-        if config["router_ip"] and not validate_ip(config["router_ip"]):
-            raise ValueError(f"Invalid router_ip: {config['router_ip']}")
+def validate_network_config(config):
+    """Validate the address fields of a network configuration. Raises ValueError on the first invalid field."""
+    for field in ["ip_address", "subnet_mask", "gateway", "dns_primary"]:
+        if not validate_ip(config[field]):
+            raise ValueError(f"Invalid {field}: {config[field]}")
+    if config["dns_secondary"] and not validate_ip(config["dns_secondary"]):
+        raise ValueError(f"Invalid dns_secondary: {config['dns_secondary']}")
+    if config["router_ip"] and not validate_ip(config["router_ip"]):
+        raise ValueError(f"Invalid router_ip: {config['router_ip']}")
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_netsh_script(adapter_name, ip_address, subnet_mask, gateway, dns_primary, dns_secondary,
+                          set_address=True, set_dns=True):
+    lines = []
+    if set_address:
+        lines.append(f'interface ip set address name="{adapter_name}" source=static addr={ip_address} mask={subnet_mask} gateway={gateway}')
+    if set_dns:
+        lines.append(f'interface ip set dns name="{adapter_name}" source=static addr={dns_primary}')
+        if dns_secondary:
+            lines.append(f'interface ip add dns name="{adapter_name}" addr={dns_secondary} index=2')
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def compile_network_config_script(adapter_name, config, set_address=True, set_dns=True) -> str:
+    """
+    Compile a network configuration into a netsh script (for 'netsh -f').
+    Scripts are cached on the fields they are built from, so a profile is only recompiled after it changes.
+    Raises ValueError if the configuration is invalid.
+    """
+    validate_network_config(config)
+    return _compile_netsh_script(
+        adapter_name,
+        config["ip_address"],
+        config["subnet_mask"],
+        config["gateway"],
+        config["dns_primary"],
+        config.get("dns_secondary") or "",
+        set_address,
+        set_dns,
+    )
+
+
+ADDRESS_FIELDS = ("ip_address", "subnet_mask", "gateway")
+DNS_FIELDS = ("dns_primary", "dns_secondary")
+
+
+class NetworkConfigPlan(NamedTuple):
+    """What apply_network_config has to change to move an adapter to a profile."""
+    adapter_name: str
+    changed_fields: tuple[str, ...]
+    skipped_fields: tuple[str, ...]
+    script: str # empty when the adapter already matches the profile
+
+
+def _current_dns_servers(current):
+    if current.get("dns_servers"):
+        return [server.strip() for server in current["dns_servers"].split(",") if server.strip()]
+    return [server for server in (current.get("dns_primary"), current.get("dns")) if server]
+
 
-        ip_cmd = f'netsh interface ip set address name="{adapter_name}" source=static addr={config["ip_address"]} mask={config["subnet_mask"]} gateway={config["gateway"]}'
-        subprocess.run(ip_cmd, shell=True, check=True, capture_output=True, text=True)
+def plan_network_config(adapter_name, config, current) -> NetworkConfigPlan:
+    """
+    Diff a profile against the adapter's live configuration (as returned by get_current_adapter_config).
+    Only the netsh commands for the differing settings end up in the plan's script; with current=None
+    (live configuration unknown) everything is applied. Raises ValueError if the profile is invalid.
+    """
+    validate_network_config(config)
+    if current is None:
+        changed = list(ADDRESS_FIELDS + DNS_FIELDS)
+        set_address = set_dns = True
+    else:
+        # A DHCP adapter has to be switched to static even if it happens to hold the same values.
+        from_dhcp = bool(current.get("dhcp_enabled"))
+        changed = [field for field in ADDRESS_FIELDS if (config[field] or "") != (current.get(field) or "")]
+        set_address = bool(changed) or from_dhcp
+
+        target_dns = [server for server in (config["dns_primary"], config.get("dns_secondary")) if server]
+        live_dns = _current_dns_servers(current)
+        live_dns_padded = live_dns + ["", ""]
+        changed += [
+            field for field, live in zip(DNS_FIELDS, live_dns_padded)
+            if (config.get(field) or "") != live
+        ]
+        set_dns = target_dns != live_dns or from_dhcp
+        if from_dhcp:
+            changed.insert(0, "dhcp_enabled")
+        elif set_dns and not any(field in changed for field in DNS_FIELDS):
+            changed.append("dns_servers") # same first two servers, but extra ones to drop
+
+    skipped = tuple(field for field in ADDRESS_FIELDS + DNS_FIELDS if field not in changed)
+    script = compile_network_config_script(adapter_name, config, set_address, set_dns) if set_address or set_dns else ""
+    return NetworkConfigPlan(adapter_name, tuple(changed), skipped, script)
+
+
+def _read_live_adapter_config(adapter_name, snapshot=None, runner=None):
+    """Read an adapter's configuration bypassing the cache (or from a fresh snapshot); None if it cannot be read."""
+    if snapshot is None:
+        snapshot, _ = get_adapter_snapshot(use_cache=False)
+    current, _ = get_current_adapter_config(adapter_name, snapshot=snapshot or [], runner=runner)
+    return current
+
+
+def describe_network_config_plan(plan: NetworkConfigPlan) -> str:
+    """Short notification text for an applied plan."""
+    if not plan.script:
+        return f"{plan.adapter_name} already uses this configuration; nothing was changed."
+    message = f"Network configuration applied (changed: {', '.join(plan.changed_fields)}"
+    if plan.skipped_fields:
+        message += f"; unchanged: {', '.join(plan.skipped_fields)}"
+    return message + ")."
 
-        dns_cmd = f'netsh interface ip set dns name="{adapter_name}" source=static addr={config["dns_primary"]}'
-        subprocess.run(dns_cmd, shell=True, check=True, capture_output=True, text=True)
 
-        if config.get("dns_secondary"):
-            dns_sec_cmd = f'netsh interface ip add dns name="{adapter_name}" addr={config["dns_secondary"]} index=2'
-            subprocess.run(dns_sec_cmd, shell=True, check=True, capture_output=True, text=True)
+def _write_netsh_script(script: str) -> str:
+    """Write a netsh script to a temp file and return its path; the caller removes it."""
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".netsh", delete=False) as f:
+        f.write(script)
+        return f.name
 
-        return True, "Network configuration applied successfully."
+
+def apply_network_config_with_plan(adapter_name, config, dry_run=False, snapshot=None, runner=None):
+    """
+    Apply network configuration using netsh, changing only the settings that differ from the live ones.
+    The needed commands are compiled into one script and run by a single 'netsh -f' process.
+    With dry_run the plan is printed and nothing is run. A fresh snapshot may be passed to skip
+    reading the live configuration, and a runner to run the netsh calls (the script, and the
+    queries for an adapter missing from the snapshot) through instead of the default one.
+    Returns (success, message, plan); plan is None if the profile is invalid.
+    """
+    try:
+        validate_network_config(config) # before touching the adapter
+        plan = plan_network_config(adapter_name, config, _read_live_adapter_config(adapter_name, snapshot, runner))
+    except ValueError as e:
+        return False, _sanitize_message_for_notification(f"Invalid configuration value: {e}"), None
+
+    if dry_run:
+        print(f"netsh plan for {adapter_name}: changed={list(plan.changed_fields)} skipped={list(plan.skipped_fields)}")
+        print(plan.script or "(nothing to run)")
+        return True, plan.script, plan
+    if not plan.script:
+        return True, describe_network_config_plan(plan), plan
+
+    script_path = None
+    try:
+        script_path = _write_netsh_script(plan.script)
+        _run_command(f'netsh -f "{script_path}"', runner=runner)
+        return True, describe_network_config_plan(plan), plan
     except subprocess.CalledProcessError as e:
         error_message = f"Error applying configuration: {e}."
         if e.stderr:
             error_message += f" Details: {e.stderr.strip()}"
         elif e.stdout: # Some commands might output errors to stdout
             error_message += f" Details: {e.stdout.strip()}"
-        return False, _sanitize_message_for_notification(error_message)
-    except ValueError as e:
-        return False, _sanitize_message_for_notification(f"Invalid configuration value: {e}")
+        return False, _sanitize_message_for_notification(error_message), plan
+    except subprocess.TimeoutExpired as e:
+        return False, _sanitize_message_for_notification(f"Timed out applying configuration: {e}"), plan
+    finally:
+        if script_path and os.path.exists(script_path):
+            os.unlink(script_path)
+        adapter_state_cache.invalidate(adapter_name)
+
+
+def apply_network_config(adapter_name, config, dry_run=False):
+    """Apply network configuration using netsh (see apply_network_config_with_plan)."""
+    success, message, _ = apply_network_config_with_plan(adapter_name, config, dry_run=dry_run)
+    return success, message
+
+
+class ProfileSetResult(NamedTuple):
+    """Outcome of one member of a profile set."""
+    config_name: str
+    adapter_name: str
+    success: bool
+    message: str
+
+
+def _concurrent_runner():
+    """
+    Runner for commands issued from several threads at once (every netsh call of a profile set
+    member, the live-config queries included). The PowerShell worker handles one request at a
+    time, so its spawning fallback is used instead; other runners are used as they are.
+    """
+    runner = get_command_runner()
+    return runner.fallback if isinstance(runner, command_runner.WorkerRunner) else runner
+
+
+def profile_set_members(set_name, config_names, network_configs):
+    """
+    The (config_name, config) members of a profile set, or None and an error message naming the
+    members whose configuration was deleted or renamed: a set is applied whole or not at all.
+    """
+    missing = [config_name for config_name in config_names if config_name not in network_configs]
+    if missing:
+        return None, _sanitize_message_for_notification(
+            f"Profile set '{set_name}' refers to missing profiles {', '.join(missing)}; nothing was changed."
+        )
+    return [(config_name, network_configs[config_name]) for config_name in config_names], None
+
+
+def apply_profile_set(set_name, members, max_workers=None):
+    """
+    Apply the (config_name, config) members of a profile set concurrently, one worker per adapter,
+    so the switch takes about as long as the slowest adapter. Every member is validated, and the
+    adapters read with one snapshot, before any adapter is touched; the set succeeds only if
+    every member does.
+    Returns (success, message, list of ProfileSetResult in member order).
+    """
+    if not members:
+        return False, _sanitize_message_for_notification(f"Profile set '{set_name}' has no profiles."), []
+    adapters = [config["adapter_name"] for _, config in members]
+    duplicates = sorted(adapter for adapter, count in collections.Counter(adapters).items() if count > 1)
+    if duplicates:
+        return False, _sanitize_message_for_notification(
+            f"Profile set '{set_name}' has several profiles for {', '.join(duplicates)}; nothing was changed."
+        ), []
+    for config_name, config in members:
+        try:
+            validate_network_config(config)
+        except ValueError as e:
+            return False, _sanitize_message_for_notification(
+                f"Invalid configuration value in '{config_name}': {e}; nothing was changed."
+            ), []
+
+    snapshot, _ = get_adapter_snapshot(use_cache=False)
+    runner = _concurrent_runner()
+    with ThreadPoolExecutor(max_workers=max_workers or len(members)) as executor:
+        futures = [
+            # Each worker runs in a copy of this context, so deadline budgets and switch traces apply to it.
+            executor.submit(
+                contextvars.copy_context().run, apply_network_config_with_plan,
+                config["adapter_name"], config, False, snapshot, runner,
+            )
+            for _, config in members
+        ]
+        outcomes = [future.result() for future in futures]
+
+    results = [
+        ProfileSetResult(config_name, config["adapter_name"], success, message)
+        for (config_name, config), (success, message, _) in zip(members, outcomes)
+    ]
+    failed = [result for result in results if not result.success]
+    if not failed:
+        message = f"Profile set '{set_name}' applied to {', '.join(adapters)}."
+    else:
+        applied = [result.adapter_name for result in results if result.success]
+        message = f"Profile set '{set_name}' failed on {', '.join(f'{r.adapter_name} ({r.message})' for r in failed)}"
+        message += f"; applied on {', '.join(applied)}." if applied else "."
+    return not failed, _sanitize_message_for_notification(message), results
     
 
-def get_current_adapter_config(adapter_name):
-    """Get current IP, subnet, gateway, and DNS settings for an adapter."""
-    config = {
+def get_current_adapter_config(adapter_name, snapshot: list[dict] | None = None, runner=None):
+    """
+    Get current IP, subnet, gateway, and DNS settings for an adapter.
+    Served from the adapter snapshot; falls back to netsh (through runner, if given) if the
+    snapshot is unavailable or does not contain the adapter.
+    """
+    if snapshot is None:
+        cached_entry = adapter_state_cache.get_entry(adapter_name)
+        if cached_entry is not None:
+            return snapshot_entry_to_config(cached_entry), None
+        snapshot, _ = get_adapter_snapshot(use_cache=False)
+    for entry in snapshot or []:
+        if entry["name"] == adapter_name:
+            return snapshot_entry_to_config(entry), None
+    return _get_current_adapter_config_netsh(adapter_name, runner)
+
+
+def _new_adapter_config(adapter_name):
+    return {
         "adapter_name": adapter_name,
         "ip_address": "",
         "subnet_mask": "",
@@ -66,62 +382,46 @@ def get_current_adapter_config(adapter_name):
         "dns_servers": "",
     }
 
+
+def parse_ip_config_output(output, config):
+    """Fill DHCP flag, IP address, subnet mask and gateway in config from 'netsh interface ip show config' output."""
+    record = netsh_parser.parse_ip_config(output, config.get("adapter_name")) or netsh_parser.parse_ip_config(output)
+    if record is None:
+        return config
+    if record.dhcp_enabled is not None:
+        config["dhcp_enabled"] = record.dhcp_enabled
+    for key in ("ip_address", "subnet_mask", "gateway"):
+        if getattr(record, key) and not config.get(key):
+            config[key] = getattr(record, key)
+    return config
+
+
+def parse_dns_servers_output(output):
+    """Return the IPv4 DNS servers listed in 'netsh interface ipv4 show dnsservers' output."""
+    record = netsh_parser.parse_ip_config(output)
+    return list(record.dns_servers) if record else []
+
+
+def _set_config_dns_servers(config, dns_servers):
+    if dns_servers:
+        config["dns_primary"] = dns_servers[0]
+        if len(dns_servers) > 1:
+            config["dns"] = dns_servers[1]
+    return config
+
+
+def _get_current_adapter_config_netsh(adapter_name, runner=None):
+    """Get current IP, subnet, gateway, and DNS settings for an adapter by parsing netsh output."""
+    config = _new_adapter_config(adapter_name)
+
     try:
         ip_config_cmd = f'netsh interface ip show config name="{adapter_name}"'
-        result = subprocess.run(
-            ip_config_cmd,
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore",
-        )
-
-        for line in result.stdout.splitlines():
-            line = line.strip()
-            if "DHCP enabled:" in line:
-                config["dhcp_enabled"] = "Yes" in line
-            elif "IP Address:" in line and "IPv6" not in line and "Default" not in line:
-                match = re.search(r"IP Address:\s+([\d\.]+)", line)
-                if match and not config["ip_address"]:
-                    config["ip_address"] = match.group(1)
-            elif "Subnet Mask:" in line or "Subnet Prefix:" in line:
-                match = re.search(r"Subnet Mask:\s+([\d\.]+)", line)
-                if not match:
-                    match_prefix = re.search(r"\(mask ([\d\.]+)\)", line)
-                    if match_prefix:
-                        config["subnet_mask"] = match_prefix.group(1)
-                elif match:
-                    config["subnet_mask"] = match.group(1)
-            elif "Default Gateway:" in line:
-                match = re.search(r"Default Gateway:\s+([\d\.]+)", line)
-                if match and not config["gateway"]:
-                    config["gateway"] = match.group(1)
+        result = _run_command(ip_config_cmd, runner=runner)
+        parse_ip_config_output(result.stdout, config)
 
         dns_config_cmd = f'netsh interface ipv4 show dnsservers name="{adapter_name}"'
-        result_dns = subprocess.run(
-            dns_config_cmd,
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore",
-        )
-        dns_servers = []
-        for line in result_dns.stdout.splitlines():
-            line = line.strip()
-            match = re.search(r"DHCP:\s+([\d\.]+)", line)
-            if not match:
-                match = re.search(r"Servers:\s+([\d\.]+)", line)
-            if not match:
-                match = re.match(r"([\d\.]+)", line)
-            if match and validate_ip(match.group(1).strip()):
-                dns_servers.append(match.group(1).strip())
-
-        if dns_servers:
-            config["dns_primary"] = dns_servers[0]
-            if len(dns_servers) > 1:
-                config["dns"] = dns_servers[1]
+        result_dns = _run_command(dns_config_cmd, runner=runner)
+        _set_config_dns_servers(config, parse_dns_servers_output(result_dns.stdout))
 
         return config, None
     except subprocess.CalledProcessError as e:
@@ -131,6 +431,8 @@ def get_current_adapter_config(adapter_name):
         elif e.stdout:
             error_message += f" Details: {e.stdout.strip()}"
         return None, _sanitize_message_for_notification(error_message)
+    except command_runner.CommandNotRecordedError:
+        raise # an incomplete replay fixture, not a command failure
     except Exception as e:
         return None, _sanitize_message_for_notification(f"Unexpected error getting current config for {adapter_name}: {e}")
     
@@ -138,20 +440,8 @@ def get_current_adapter_config(adapter_name):
 def set_adapter_to_dhcp(adapter_name):
     """Set the specified network adapter to obtain IP and DNS automatically (DHCP)."""
     try:
-        subprocess.run(
-            f'netsh interface ip set address name="{adapter_name}" source=dhcp',
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-        subprocess.run(
-            f'netsh interface ipv4 set dnsservers name="{adapter_name}" source=dhcp',
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
+        _run_command(f'netsh interface ip set address name="{adapter_name}" source=dhcp')
+        _run_command(f'netsh interface ipv4 set dnsservers name="{adapter_name}" source=dhcp')
         return True, f"Adapter {adapter_name} set to DHCP successfully."
     except subprocess.CalledProcessError as e:
         error_message = f"Error setting {adapter_name} to DHCP: {e}."
@@ -160,232 +450,549 @@ def set_adapter_to_dhcp(adapter_name):
         elif e.stdout:
             error_message += f" Details: {e.stdout.strip()}"
         return False, _sanitize_message_for_notification(error_message)
+    except subprocess.TimeoutExpired as e:
+        return False, _sanitize_message_for_notification(f"Timed out setting {adapter_name} to DHCP: {e}")
+    finally:
+        adapter_state_cache.invalidate(adapter_name)
+
+# Seconds an adapter snapshot is served from the cache before it is queried again.
+ADAPTER_STATE_CACHE_TTL = 5.0
+
+
+class AdapterStateCache:
+    """
+    Process-wide cache of adapter state, filled from adapter snapshots.
+    Entries expire after `ttl` seconds and can be invalidated per adapter; a snapshot is only
+    served while it is complete, i.e. no adapter in it has been invalidated since it was stored.
+    """
+
+    def __init__(self, ttl=ADAPTER_STATE_CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {} # adapter name -> (snapshot entry, stored_at)
+        self._snapshot_order = None # adapter names of the last complete snapshot
+        self._snapshot_stored_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, stored_at):
+        return self._clock() - stored_at < self.ttl
+
+    def get_snapshot(self) -> list[dict] | None:
+        """Return the cached snapshot, or None (a miss) if it is missing, stale or incomplete."""
+        with self._lock:
+            if self._snapshot_order is not None and self._is_fresh(self._snapshot_stored_at):
+                self.hits += 1
+                return [dict(self._entries[name][0]) for name in self._snapshot_order]
+            self.misses += 1
+            return None
+
+    def get_entry(self, adapter_name) -> dict | None:
+        """Return the cached snapshot entry for one adapter, or None (a miss)."""
+        with self._lock:
+            cached = self._entries.get(adapter_name)
+            if cached and self._is_fresh(cached[1]):
+                self.hits += 1
+                return dict(cached[0])
+            self.misses += 1
+            return None
+
+    def put_snapshot(self, snapshot: list[dict]):
+        with self._lock:
+            now = self._clock()
+            self._entries = {entry["name"]: (dict(entry), now) for entry in snapshot}
+            self._snapshot_order = [entry["name"] for entry in snapshot]
+            self._snapshot_stored_at = now
+
+    def invalidate(self, adapter_name=None):
+        """Drop the entry for one adapter (and with it the complete snapshot), or everything if no name is given."""
+        with self._lock:
+            if adapter_name is None:
+                self._entries = {}
+            else:
+                self._entries.pop(adapter_name, None)
+            self._snapshot_order = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "cached_adapters": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
 
-def _get_adapter_details_powershell() -> tuple[list[dict] | None, str | None]:
+
+adapter_state_cache = AdapterStateCache()
+
+
+def set_adapter_cache_ttl(ttl: float):
+    """Configure how long adapter state is served from the cache (0 disables caching)."""
+    adapter_state_cache.ttl = ttl
+
+
+def get_adapter_cache_stats() -> dict:
+    """Hit/miss counters of the adapter state cache; every miss costs one snapshot query."""
+    return adapter_state_cache.stats()
+
+
+def invalidate_adapter_state(adapter_name=None):
+    """Forget cached state for one adapter, or for all adapters if no name is given."""
+    adapter_state_cache.invalidate(adapter_name)
+
+
+# Single PowerShell query returning every adapter together with its IPv4 state.
+# Served as one JSON document so list_adapters, get_current_adapter_config and
+# get_adapter_statuses never need a per-adapter netsh round trip.
+ADAPTER_SNAPSHOT_PS_COMMAND = (
+    "$ErrorActionPreference = 'SilentlyContinue'; "
+    "@(Get-NetAdapter | ForEach-Object { "
+    "$ipif = Get-NetIPInterface -InterfaceIndex $_.ifIndex -AddressFamily IPv4; "
+    "$addr = Get-NetIPAddress -InterfaceIndex $_.ifIndex -AddressFamily IPv4 | Select-Object -First 1; "
+    "$gw = Get-NetRoute -InterfaceIndex $_.ifIndex -DestinationPrefix '0.0.0.0/0' | Sort-Object RouteMetric | Select-Object -First 1; "
+    "$dns = (Get-DnsClientServerAddress -InterfaceIndex $_.ifIndex -AddressFamily IPv4).ServerAddresses; "
+    "[PSCustomObject]@{ "
+    "Name = $_.Name; InterfaceDescription = $_.InterfaceDescription; Status = [string]$_.Status; "
+    "Dhcp = [string]$ipif.Dhcp; IPAddress = $addr.IPAddress; PrefixLength = $addr.PrefixLength; "
+    "Gateway = $gw.NextHop; DnsServers = @($dns); "
+    "MediaType = [string]$_.PhysicalMediaType; InterfaceType = $_.InterfaceType; Virtual = [bool]$_.Virtual; "
+    "AdminStatus = [string]$_.AdminStatus; MediaConnectionState = [string]$_.MediaConnectionState } "
+    "}) | ConvertTo-Json -Compress -Depth 3"
+)
+
+
+def _parse_powershell_json(output: str) -> list[dict]:
+    """Decode PowerShell ConvertTo-Json output into a list of dictionaries. Raises json.JSONDecodeError."""
+    if not output.strip(): # Handle empty output (no adapters found)
+        return []
+    data = json.loads(output)
+    # If PowerShell returns a single object not in a list, wrap it
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+
+def _run_powershell_json(ps_command: str) -> tuple[list[dict] | None, str | None]:
     """
-    Fetches detailed network adapter information using PowerShell.
-    Returns a list of dictionaries (each with 'Name' and 'InterfaceDescription')
-    for connected adapters, or None and an error message.
+    Runs a PowerShell command whose output is JSON and returns it as a list of dictionaries,
+    or None and an error message.
     """
+    result = None
     try:
-        # PowerShell command to get connected adapters and select Name and InterfaceDescription
-        # Output is converted to JSON for easy parsing in Python
-        ps_command = (
-            "Get-NetAdapter | "
-            "Where-Object {$_.Status -eq 'Up'} | "
-            "Select-Object Name, InterfaceDescription | "
-            "ConvertTo-Json -Compress"
-        )
-        full_command = [
-            "powershell.exe",
-            "-NoProfile",
-            "-NonInteractive",
-            "-ExecutionPolicy", "Bypass",
-            "-Command", ps_command
-        ]
+        result = _run_powershell(ps_command) # Raises CalledProcessError for non-zero exit codes
+        return _parse_powershell_json(result.stdout), None
 
-        result = subprocess.run(
-            full_command,
-            capture_output=True,
-            text=True,
-            check=True, # Raises CalledProcessError for non-zero exit codes
-            errors="ignore"
-        )
-        
-        if not result.stdout.strip(): # Handle empty output (no adapters found)
-            return [], None
-
-        adapters_data = json.loads(result.stdout)
-        # If PowerShell returns a single object not in a list, wrap it
-        if isinstance(adapters_data, dict):
-            adapters_data = [adapters_data]
-        return adapters_data, None
-        
     except FileNotFoundError:
         return None, _sanitize_message_for_notification("PowerShell executable not found. Please ensure it's in your system PATH.")
+    except subprocess.TimeoutExpired:
+        return None, f"PowerShell query ({deadlines.command_label(ps_command)}) timed out."
     except subprocess.CalledProcessError as e:
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return None, _sanitize_message_for_notification(f"PowerShell command failed: {e}. Details: {error_detail}")
     except json.JSONDecodeError as e:
         return None, _sanitize_message_for_notification(f"Failed to parse PowerShell output as JSON: {e}. Output: {result.stdout[:100]}...") # Show partial output
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
-        return None, _sanitize_message_for_notification(f"An unexpected error occurred while fetching adapter details via PowerShell: {e}")
+        return None, _sanitize_message_for_notification(f"An unexpected error occurred while running PowerShell: {e}")
+
+
+def _prefix_to_mask(prefix_length) -> str:
+    """Convert an IPv4 prefix length (e.g. 24) to a dotted subnet mask (e.g. 255.255.255.0)."""
+    try:
+        prefix_length = int(prefix_length)
+    except (TypeError, ValueError):
+        return ""
+    if not 0 <= prefix_length <= 32:
+        return ""
+    mask = (0xFFFFFFFF << (32 - prefix_length)) & 0xFFFFFFFF
+    return ".".join(str((mask >> shift) & 0xFF) for shift in (24, 16, 8, 0))
+
+
+MEDIA_WIRED = "wired"
+MEDIA_WIRELESS = "wireless"
+MEDIA_VIRTUAL = "virtual"
+MEDIA_LOOPBACK = "loopback"
+
+# IANA ifType values reported by Get-NetAdapter as InterfaceType.
+IF_TYPE_SOFTWARE_LOOPBACK = 24
+IF_TYPE_IEEE80211 = 71
+
+# Fallback for snapshots without PhysicalMediaType/InterfaceType (e.g. older PowerShell builds).
+WIRELESS_DESCRIPTION_KEYWORDS = ("wi-fi", "wifi", "wireless", "wlan", "802.11")
+
+
+def classify_media_type(raw_entry: dict) -> str:
+    """Classify a raw snapshot entry as MEDIA_WIRED, MEDIA_WIRELESS, MEDIA_VIRTUAL or MEDIA_LOOPBACK."""
+    physical_media_type = str(raw_entry.get("MediaType") or "").lower()
+    try:
+        interface_type = int(raw_entry.get("InterfaceType"))
+    except (TypeError, ValueError):
+        interface_type = None
+    description = f"{raw_entry.get('Name') or ''} {raw_entry.get('InterfaceDescription') or ''}".lower()
+
+    if interface_type == IF_TYPE_SOFTWARE_LOOPBACK or "loopback" in description:
+        return MEDIA_LOOPBACK
+    if interface_type == IF_TYPE_IEEE80211 or "802.11" in physical_media_type or "wireless" in physical_media_type:
+        return MEDIA_WIRELESS
+    if not physical_media_type and interface_type is None and any(
+        keyword in description for keyword in WIRELESS_DESCRIPTION_KEYWORDS
+    ):
+        return MEDIA_WIRELESS
+    if raw_entry.get("Virtual") is True or str(raw_entry.get("Virtual")).lower() == "true":
+        return MEDIA_VIRTUAL
+    return MEDIA_WIRED
+
+
+def parse_adapter_snapshot(raw_entries: list[dict]) -> list[dict]:
+    """
+    Normalize the raw PowerShell snapshot entries into adapter state dictionaries with the keys
+    name, description, status, dhcp_enabled, ip_address, prefix_length, subnet_mask, gateway,
+    dns_servers (list of IPv4 strings), media_type (see classify_media_type), admin_state
+    and connection_state.
+    """
+    snapshot = []
+    for entry in raw_entries or []:
+        name = entry.get("Name")
+        if not name:
+            continue
+        dns_servers = entry.get("DnsServers") or []
+        if isinstance(dns_servers, str): # A single server may be serialized as a plain string
+            dns_servers = [dns_servers]
+        prefix_length = entry.get("PrefixLength")
+        snapshot.append({
+            "name": name,
+            "description": entry.get("InterfaceDescription") or name,
+            "status": entry.get("Status") or "",
+            "dhcp_enabled": str(entry.get("Dhcp", "")).lower() in ("enabled", "1", "true"),
+            "ip_address": entry.get("IPAddress") or "",
+            "prefix_length": prefix_length,
+            "subnet_mask": _prefix_to_mask(prefix_length) if prefix_length is not None else "",
+            "gateway": entry.get("Gateway") or "",
+            "dns_servers": [dns for dns in dns_servers if dns and validate_ip(dns)],
+            "media_type": classify_media_type(entry),
+            "admin_state": entry.get("AdminStatus") or "",
+            "connection_state": entry.get("MediaConnectionState") or "",
+        })
+    return snapshot
+
+
+def get_adapter_snapshot(use_cache=True) -> tuple[list[dict] | None, str | None]:
+    """
+    Fetch the state of every network adapter with a single structured PowerShell query.
+    Served from the adapter state cache while it is fresh unless use_cache is False.
+    Returns a list of adapter state dictionaries (see parse_adapter_snapshot) and an optional error message.
+    """
+    if use_cache:
+        cached_snapshot = adapter_state_cache.get_snapshot()
+        if cached_snapshot is not None:
+            return cached_snapshot, None
+    raw_entries, error_msg = _run_powershell_json(ADAPTER_SNAPSHOT_PS_COMMAND)
+    if error_msg:
+        return None, error_msg
+    snapshot = parse_adapter_snapshot(raw_entries)
+    adapter_state_cache.put_snapshot(snapshot)
+    return snapshot, None
+
 
-def list_adapters() -> tuple[list[tuple[str, str]], str | None]:
+def snapshot_entry_to_config(entry: dict) -> dict:
+    """Convert one adapter snapshot entry into the dictionary shape returned by get_current_adapter_config."""
+    dns_servers = entry.get("dns_servers", [])
+    return {
+        "adapter_name": entry["name"],
+        "ip_address": entry.get("ip_address", ""),
+        "subnet_mask": entry.get("subnet_mask", ""),
+        "gateway": entry.get("gateway", ""),
+        "dns_primary": dns_servers[0] if dns_servers else "",
+        "dns": dns_servers[1] if len(dns_servers) > 1 else "",
+        "dns_servers": ", ".join(dns_servers),
+        "dhcp_enabled": entry.get("dhcp_enabled", False),
+    }
+
+
+def list_adapters(snapshot: list[dict] | None = None) -> tuple[list[tuple[str, str]], str | None]:
     """
     List available and connected network adapters.
-    Uses PowerShell to get adapter names (short_name, detailed_name).
+    Served from the adapter snapshot; pass an already fetched snapshot to avoid another query.
     Returns a list of tuples (short_name, detailed_name) and an optional message string.
     """
-    result_adapters_list = []
-    
-    adapters_data, error_msg = _get_adapter_details_powershell()
+    if snapshot is None:
+        snapshot, error_msg = get_adapter_snapshot()
+        if error_msg:
+            return [], error_msg
 
-    if error_msg:
-        return [], error_msg
-    
-    if adapters_data is None: # Should be caught by error_msg, but as a safeguard
+    if snapshot is None: # Should be caught by error_msg, but as a safeguard
         return [], _sanitize_message_for_notification("Failed to retrieve adapter details from PowerShell (no data).")
 
-    for adapter_info in adapters_data:
-        # Ensure 'Name' and 'InterfaceDescription' keys exist, though Select-Object should guarantee them
-        short_name = adapter_info.get("Name")
-        detailed_name = adapter_info.get("InterfaceDescription")
-        if short_name and detailed_name:
-            result_adapters_list.append((short_name, detailed_name))
-        elif short_name: # Fallback if InterfaceDescription is missing for some reason
-            result_adapters_list.append((short_name, short_name))
+    result_adapters_list = [
+        (entry["name"], entry["description"]) for entry in snapshot if entry.get("status") == "Up"
+    ]
 
     final_message = None
-    if not result_adapters_list and not error_msg:
+    if not result_adapters_list:
         final_message = _sanitize_message_for_notification("No connected (Status 'Up') network adapters found via PowerShell.")
-        
+
     return result_adapters_list, final_message
 
 
-def is_wifi_adapter(adapter_name):
-    """Check if an adapter is a Wi-Fi adapter."""
-    # This function might also benefit from WMI for more robust checking,
-    # but for now, it uses netsh as per original.
-    # Adapter name here is the 'short_name'.
-    try:
-        result = subprocess.run(
-            f'netsh interface show interface name="{adapter_name}"',
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=True, # Check=True to catch errors if adapter name is invalid for this command
-            errors="ignore"
+class InterfaceInfo(NamedTuple):
+    """Classification of one adapter in the interface index."""
+    name: str
+    media_type: str # MEDIA_WIRED, MEDIA_WIRELESS, MEDIA_VIRTUAL or MEDIA_LOOPBACK
+    admin_state: str # "Up" or "Down"
+    connection_state: str # "Connected", "Disconnected" or "" if unknown
+
+
+def build_interface_index(snapshot: list[dict] | None) -> dict[str, InterfaceInfo]:
+    """Map every adapter short name in a snapshot to its InterfaceInfo."""
+    return {
+        entry["name"]: InterfaceInfo(
+            entry["name"],
+            entry.get("media_type", MEDIA_WIRED),
+            entry.get("admin_state", ""),
+            entry.get("connection_state") or ("Connected" if entry.get("status") == "Up" else ""),
         )
+        for entry in snapshot or []
+    }
+
+
+def get_interface_index(use_cache=True) -> tuple[dict[str, InterfaceInfo], str | None]:
+    """
+    Interface index built from the adapter snapshot, so it is refreshed (and cached) together
+    with the adapter state. Returns the index and an optional error message.
+    """
+    snapshot, error_msg = get_adapter_snapshot(use_cache=use_cache)
+    if error_msg:
+        return {}, error_msg
+    return build_interface_index(snapshot), None
+
+
+def wifi_adapter_names(index: dict[str, InterfaceInfo]) -> list[str]:
+    """Names of the enabled (admin state not Down) wireless adapters in an interface index."""
+    return [
+        info.name for info in index.values()
+        if info.media_type == MEDIA_WIRELESS and info.admin_state.lower() != "down"
+    ]
+
+
+def is_wifi_adapter(adapter_name, index: dict[str, InterfaceInfo] | None = None):
+    """
+    Check if an adapter (short name) is a Wi-Fi adapter with a lookup in the interface index.
+    Pass an index to check several adapters against one snapshot.
+    """
+    if index is None:
+        index, error_msg = get_interface_index()
+        if error_msg: # No snapshot available; ask netsh about this adapter instead.
+            return _is_wifi_adapter_netsh(adapter_name)
+    info = index.get(adapter_name)
+    return info is not None and info.media_type == MEDIA_WIRELESS
+
+
+def _is_wifi_adapter_netsh(adapter_name):
+    """Check one adapter with 'netsh interface show interface'."""
+    try:
+        result = _run_command(f'netsh interface show interface name="{adapter_name}"')
         return result.stdout is not None and "Wireless" in result.stdout
     except subprocess.CalledProcessError:
         # This can happen if adapter_name is not recognized by 'netsh interface show interface'
         # or other command errors.
         return False
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception:
         return False
 
-# 4. Update has_wifi_support()
-def get_available_networks():
-    """Retrieve nearby Wi-Fi networks with SSID, auth type, and signal strength."""
+def parse_available_bssids(output):
+    """Parse 'netsh wlan show networks mode=bssid' output into one BssidRecord per access point."""
+    return list(netsh_parser.iter_bssids(output))
+
+
+def networks_from_bssids(bssids):
+    """Aggregate BssidRecords into (ssid, auth_type, signal) tuples; signal is the strongest BSSID's."""
+    return [
+        (network.ssid, network.auth_type, network.signal)
+        for network in netsh_parser.aggregate_networks(bssids)
+        if network.authentication
+    ]
+
+
+def parse_available_networks(output):
+    """Parse 'netsh wlan show networks mode=bssid' output into (ssid, auth_type, signal) tuples."""
+    return networks_from_bssids(netsh_parser.iter_bssids(output))
+
+
+def get_available_bssids():
+    """Retrieve every visible access point (BSSID) with signal, radio type, band, channel and basic rates."""
     try:
-        result = subprocess.run(
-            "netsh wlan show networks mode=bssid",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore",
-        )
-        networks = []
-        current_ssid = None
-        auth_type = None
-        signal = None
-
-        for line in result.stdout.splitlines():
-            line = line.strip()
-            if line.startswith("SSID"):
-                if current_ssid and auth_type:
-                    networks.append((current_ssid, auth_type, signal or "Unknown"))
-                current_ssid = line.split(":", 1)[1].strip()
-                auth_type = None
-                signal = None
-            elif "Authentication" in line:
-                auth = line.split(":", 1)[1].strip()
-                if auth == "Open":
-                    auth_type = "open"
-                elif auth == "WEP":
-                    auth_type = "WEP"
-                elif "WPA-PSK" in auth:
-                    auth_type = "WPAPSK"
-                elif "WPA2-PSK" in auth:
-                    auth_type = "WPA2PSK"
-                elif "WPA3-SAE" in auth:
-                    auth_type = "WPA3SAE"
-                else:
-                    auth_type = "WPA2PSK"
-            elif "Signal" in line:
-                signal = line.split(":", 1)[1].strip()
-
-        if current_ssid and auth_type:
-            networks.append((current_ssid, auth_type, signal or "Unknown"))
-
-        return networks, None
+        result = _run_command("netsh wlan show networks mode=bssid")
+        return parse_available_bssids(result.stdout), None
     except subprocess.CalledProcessError as e:
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return [], _sanitize_message_for_notification(f"Error retrieving Wi-Fi networks: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
         return [], _sanitize_message_for_notification(f"Unexpected error retrieving Wi-Fi networks: {e}")
 
+
+def get_available_networks():
+    """Retrieve nearby Wi-Fi networks with SSID, auth type, and signal strength."""
+    bssids, error_message = get_available_bssids()
+    return networks_from_bssids(bssids), error_message
+
+
+def get_wlan_interfaces():
+    """Connection state (and SSID, BSSID, signal when connected) of every Wi-Fi interface."""
+    try:
+        result = _run_command("netsh wlan show interfaces")
+        return list(netsh_parser.iter_wlan_interfaces(result.stdout)), None
+    except subprocess.CalledProcessError as e:
+        error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
+        return [], _sanitize_message_for_notification(f"Error retrieving Wi-Fi interfaces: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
+    except Exception as e:
+        return [], _sanitize_message_for_notification(f"Unexpected error retrieving Wi-Fi interfaces: {e}")
+
+
+def select_strongest_bssid(bssids, ssid, adapter_names=None):
+    """Return the BssidRecord of ssid with the best signal (optionally only as seen by adapter_names), or None."""
+    candidates = [
+        record for record in bssids or []
+        if record.ssid == ssid and record.bssid and (adapter_names is None or record.interface_name in adapter_names)
+    ]
+    return max(candidates, key=lambda record: record.signal, default=None)
+
+
+def choose_wifi_adapter(wifi_adapters, ssid, bssids=None):
+    """Pick the Wi-Fi adapter that hears the strongest BSSID of ssid, or the first adapter if none does."""
+    if not wifi_adapters:
+        return None
+    strongest = select_strongest_bssid(bssids, ssid, wifi_adapters)
+    return strongest.interface_name if strongest else wifi_adapters[0]
+
+
+def describe_bssid(record) -> str:
+    """Short text for a BssidRecord, e.g. 'aa:bb:cc:dd:ee:02 (90%, 5 GHz channel 36)'."""
+    radio = " ".join(part for part in (record.band, f"channel {record.channel}" if record.channel is not None else "") if part)
+    details = [f"{record.signal}%"] + ([radio] if radio else [])
+    return f"{record.bssid} ({', '.join(details)})"
+
+
 def has_wifi_support():
     """Check if the system has Wi-Fi support (Wi-Fi adapter or profiles)."""
-    adapters_tuples, _ = list_adapters() # list_adapters now returns list of tuples and msg
-    has_wifi_adapter_flag = False
-    if adapters_tuples: # Check if list is not empty
-        has_wifi_adapter_flag = any(is_wifi_adapter(adapter_tuple[0]) for adapter_tuple in adapters_tuples)
-
-    # get_wifi_profiles still returns (list, msg_or_none)
-    profiles, _ = get_wifi_profiles()
-    has_profiles_flag = bool(profiles) # True if profiles list is not empty
+    index, _ = get_interface_index()
+    if any(info.media_type == MEDIA_WIRELESS for info in index.values()):
+        return True
 
-    return has_wifi_adapter_flag or has_profiles_flag
+    # Only the profile names are needed here, which takes a single netsh call.
+    profile_names, _ = get_wifi_profile_names()
+    return bool(profile_names)
 
 
-def get_wifi_profiles():
-    """Retrieve available Wi-Fi profiles from the system with auth types."""
+def get_wifi_profile_names():
+    """Retrieve the names of the Wi-Fi profiles stored on the system."""
     try:
-        result = subprocess.run(
-            "netsh wlan show profiles",
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore"
-        )
-        profiles = []
-        for line in result.stdout.splitlines():
-            if "All User Profile" in line:
-                ssid = line.split(":")[1].strip()
-                auth_type, _ = get_wifi_auth_type(ssid)
-                profiles.append((ssid, auth_type))
-        return profiles, None
+        result = _run_command("netsh wlan show profiles")
+        return list(netsh_parser.iter_wifi_profile_names(result.stdout)), None
     except subprocess.CalledProcessError as e:
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return [], _sanitize_message_for_notification(f"Error retrieving Wi-Fi profiles: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
         return [], _sanitize_message_for_notification(f"Unexpected error retrieving Wi-Fi profiles: {e}")
 
 
+def _load_wifi_profile_xml(path):
+    with open(path, "rb") as f:
+        return netsh_parser.parse_wifi_profile_xml(f.read())
+
+
+def export_wifi_profiles(max_workers: int | None = None):
+    """
+    Export every Wi-Fi profile with one 'netsh wlan export profile key=clear' call and parse the XML files.
+    Returns WifiProfileDetails records (one per profile name) or None, and an optional error message.
+    With max_workers the XML files are parsed on a thread pool.
+    """
+    try:
+        with tempfile.TemporaryDirectory(prefix="ncs_wlan_export_") as export_folder:
+            _run_command(f'netsh wlan export profile folder="{export_folder}" key=clear')
+            xml_paths = sorted(
+                os.path.join(export_folder, file_name)
+                for file_name in os.listdir(export_folder)
+                if file_name.lower().endswith(".xml")
+            )
+            if max_workers and max_workers > 1 and len(xml_paths) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    records = list(pool.map(_load_wifi_profile_xml, xml_paths))
+            else:
+                records = [_load_wifi_profile_xml(path) for path in xml_paths]
+    except subprocess.CalledProcessError as e:
+        error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
+        return None, _sanitize_message_for_notification(f"Error exporting Wi-Fi profiles: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
+    except Exception as e:
+        return None, _sanitize_message_for_notification(f"Unexpected error exporting Wi-Fi profiles: {e}")
+
+    # A profile stored on several interfaces is exported once per interface.
+    profiles = {}
+    for record in records:
+        if record.name and record.name not in profiles:
+            profiles[record.name] = record
+    return sorted(profiles.values(), key=lambda record: record.name.lower()), None
+
+
+def get_wifi_profile_details(max_workers: int | None = None):
+    """
+    Retrieve auth type and key of every Wi-Fi profile.
+    Uses the bulk export and falls back to one 'netsh wlan show profile' call per profile if it fails.
+    """
+    profiles, _ = export_wifi_profiles(max_workers)
+    if profiles is not None:
+        return profiles, None
+
+    profile_names, error_message = get_wifi_profile_names()
+    if error_message:
+        return [], error_message
+    profiles = []
+    for name in profile_names:
+        try:
+            result = _run_command(f'netsh wlan show profile name="{name}" key=clear')
+            profiles.append(netsh_parser.parse_wifi_profile(result.stdout)._replace(name=name))
+        except command_runner.CommandNotRecordedError:
+            raise
+        except Exception:
+            profiles.append(netsh_parser.WifiProfileDetails(name, "", netsh_parser.DEFAULT_AUTH_TYPE, None))
+    return profiles, None
+
+
+def get_wifi_profiles():
+    """Retrieve available Wi-Fi profiles from the system with auth types."""
+    profiles, error_message = get_wifi_profile_details()
+    return [(profile.name, profile.auth_type) for profile in profiles], error_message
+
+
 def get_wifi_auth_type(ssid):
     """Retrieve the authentication type for a Wi-Fi profile."""
     try:
-        result = subprocess.run(
-            f'netsh wlan show profile name="{ssid}" key=clear',
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore",
-        )
-        auth_type = "WPA2PSK"
-        for line in result.stdout.splitlines():
-            if "Authentication" in line:
-                auth = line.split(":")[1].strip()
-                if auth == "Open":
-                    auth_type = "open"
-                elif auth == "WEP":
-                    auth_type = "WEP"
-                elif "WPA-PSK" in auth:
-                    auth_type = "WPAPSK"
-                elif "WPA2-PSK" in auth:
-                    auth_type = "WPA2PSK"
-                elif "WPA3-SAE" in auth:
-                    auth_type = "WPA3SAE"
-                break
+        result = _run_command(f'netsh wlan show profile name="{ssid}" key=clear')
+        auth_type = netsh_parser.parse_wifi_profile(result.stdout).auth_type
         return auth_type, None
     except subprocess.CalledProcessError as e:
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return "WPA2PSK", _sanitize_message_for_notification(f"Error retrieving Wi-Fi auth type for {ssid}: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
          return "WPA2PSK", _sanitize_message_for_notification(f"Unexpected error retrieving Wi-Fi auth type for {ssid}: {e}")
 
@@ -393,50 +1000,127 @@ def get_wifi_auth_type(ssid):
 def get_wifi_password(ssid):
     """Retrieve the password for a Wi-Fi profile."""
     try:
-        result = subprocess.run(
-            f'netsh wlan show profile name="{ssid}" key=clear',
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-            errors="ignore",
-        )
-        for line in result.stdout.splitlines():
-            if "Key Content" in line:
-                password = line.split(":")[1].strip()
-                return password, None
+        result = _run_command(f'netsh wlan show profile name="{ssid}" key=clear')
+        password = netsh_parser.parse_wifi_profile(result.stdout).key_content
+        if password is not None:
+            return password, None
         return None, _sanitize_message_for_notification(f"Key Content not found for Wi-Fi profile {ssid}.")
     except subprocess.CalledProcessError as e:
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return None, _sanitize_message_for_notification(f"Error retrieving Wi-Fi password for {ssid}: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
         return None, _sanitize_message_for_notification(f"Unexpected error retrieving Wi-Fi password for {ssid}: {e}")
 
 
-def apply_wifi_profile(ssid, password, adapter_name, auth_type="WPA2PSK"):
-    """Apply a Wi-Fi profile to connect to a network."""
+class WifiProfileHashCache:
+    """
+    Content hash of the profile XML last installed per (SSID, interface). When the XML for a
+    reconnect hashes the same, the profile on the system is already current and
+    'netsh wlan add profile' can be skipped. Kept in memory only, so no password-derived data
+    is written to disk.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = {} # (ssid, adapter_name) -> sha256 hex digest
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(profile_xml: str) -> str:
+        return hashlib.sha256(profile_xml.encode("utf-8")).hexdigest()
+
+    def matches(self, ssid, adapter_name, profile_xml) -> bool:
+        with self._lock:
+            matched = self._hashes.get((ssid, adapter_name)) == self.content_hash(profile_xml)
+            if matched:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return matched
+
+    def store(self, ssid, adapter_name, profile_xml):
+        with self._lock:
+            self._hashes[(ssid, adapter_name)] = self.content_hash(profile_xml)
+
+    def invalidate(self, ssid=None, adapter_name=None):
+        """Forget one SSID (on one interface, or all of them), or everything if no SSID is given."""
+        with self._lock:
+            if ssid is None:
+                self._hashes = {}
+            else:
+                self._hashes = {
+                    key: value for key, value in self._hashes.items()
+                    if not (key[0] == ssid and adapter_name in (None, key[1]))
+                }
+
+
+wifi_profile_cache = WifiProfileHashCache()
+
+
+def invalidate_wifi_profile_cache(ssid=None, adapter_name=None):
+    """Make the next apply of ssid (or of every SSID) reinstall its system profile."""
+    wifi_profile_cache.invalidate(ssid, adapter_name)
+
+
+def _install_wifi_profile(ssid, adapter_name, profile_xml):
+    """Add the profile with 'netsh wlan add profile' and remember its content hash."""
     temp_file_path = None
     try:
         with tempfile.NamedTemporaryFile(mode="w", suffix=".xml", delete=False) as f:
-            profile_xml = generate_wifi_profile_xml(ssid, password, auth_type)
             f.write(profile_xml)
             temp_file_path = f.name
-
         add_profile_cmd = f'netsh wlan add profile filename="{temp_file_path}" interface="{adapter_name}"'
-        subprocess.run(add_profile_cmd, shell=True, check=True, capture_output=True, text=True, errors="ignore")
+        _run_command(add_profile_cmd)
+        wifi_profile_cache.store(ssid, adapter_name, profile_xml)
+    finally:
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+
+
+def apply_wifi_profile(ssid, password, adapter_name, auth_type="WPA2PSK", bssids=None):
+    """
+    Apply a Wi-Fi profile to connect to a network.
+    The profile is only (re)installed when its XML differs from the one last installed for this
+    SSID and adapter (see WifiProfileHashCache); otherwise the call goes straight to connecting.
+    netsh cannot pin a BSSID; with scan records (bssids) the strongest access point the adapter hears
+    is reported, and callers pick the adapter with the best signal through choose_wifi_adapter.
+    """
+    try:
+        profile_xml = generate_wifi_profile_xml(ssid, password, auth_type)
+        profile_unchanged = wifi_profile_cache.matches(ssid, adapter_name, profile_xml)
+        if not profile_unchanged:
+            _install_wifi_profile(ssid, adapter_name, profile_xml)
 
         connect_cmd = f'netsh wlan connect name="{ssid}" interface="{adapter_name}"'
-        subprocess.run(connect_cmd, shell=True, check=True, capture_output=True, text=True, errors="ignore")
+        try:
+            _run_command(connect_cmd)
+        except subprocess.CalledProcessError:
+            if not profile_unchanged:
+                raise
+            # The system profile may have been removed outside the app; install it and retry once.
+            wifi_profile_cache.invalidate(ssid, adapter_name)
+            _install_wifi_profile(ssid, adapter_name, profile_xml)
+            _run_command(connect_cmd)
 
-        return True, _sanitize_message_for_notification(f"Wi-Fi profile for {ssid} applied and connected successfully.")
+        message = f"Wi-Fi profile for {ssid} applied and connected successfully."
+        strongest = select_strongest_bssid(bssids, ssid, [adapter_name])
+        if strongest:
+            message += f" Strongest access point: {describe_bssid(strongest)}."
+        return True, _sanitize_message_for_notification(message)
     except subprocess.CalledProcessError as e:
+        wifi_profile_cache.invalidate(ssid, adapter_name)
         error_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
         return False, _sanitize_message_for_notification(f"Error applying Wi-Fi profile for {ssid}: {e}. Details: {error_detail}")
+    except command_runner.CommandNotRecordedError:
+        raise
     except Exception as e:
+        wifi_profile_cache.invalidate(ssid, adapter_name)
         return False, _sanitize_message_for_notification(f"Unexpected error applying Wi-Fi profile for {ssid}: {e}")
     finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        adapter_state_cache.invalidate(adapter_name)
 
 
 def generate_wifi_profile_xml(ssid, password, auth_type):
@@ -503,33 +1187,191 @@ def generate_wifi_profile_xml(ssid, password, auth_type):
     </MSM>
 </WLANProfile>"""
 
-def get_adapter_statuses(saved_configs):
+
+# Passwords DBManager.get_wifi_profiles returns when a stored password could not be decrypted.
+UNDECRYPTABLE_PASSWORDS = ("DECRYPTION_FAILED", "DECRYPTION_ERROR")
+
+_PROFILE_ADDED_LINE = re.compile(r"^\s*Profile (.+) is (?:added|updated) on interface (.+?)\.?\s*$")
+
+
+class WifiProvisionResult(NamedTuple):
+    """Outcome of one entry of provision_wifi_profiles."""
+    ssid: str
+    success: bool
+    message: str
+
+
+def _wifi_entry_error(ssid, password, auth_type):
+    if not ssid:
+        return "SSID is empty."
+    if password in UNDECRYPTABLE_PASSWORDS:
+        return "The stored password could not be decrypted."
+    if auth_type != "open" and not password:
+        return f"A password is required for {auth_type}."
+    return None
+
+
+def compile_wifi_provisioning_script(profile_paths, adapter_name=None) -> str:
+    """netsh script adding every profile XML file in profile_paths (to adapter_name only, if given)."""
+    interface = f' interface="{adapter_name}"' if adapter_name else ""
+    return "\n".join(f'wlan add profile filename="{path}"{interface}' for path in profile_paths) + "\n"
+
+
+def _confirm_installed_wifi_profiles(batch):
+    """
+    SSIDs of batch ((position, ssid, xml) tuples) whose profile the system now holds with the
+    same authentication and key, read back with a 'netsh wlan export'. The exported XML does not
+    depend on the display language, unlike the "Profile ... is added" lines netsh prints.
+    """
+    exported, _ = export_wifi_profiles()
+    if not exported:
+        return set()
+    exported_by_name = {record.name: record for record in exported}
+    confirmed = set()
+    for _, ssid, profile_xml in batch:
+        expected = netsh_parser.parse_wifi_profile_xml(profile_xml)
+        record = exported_by_name.get(ssid)
+        if record is not None and (record.auth_type, record.key_content) == (expected.auth_type, expected.key_content):
+            confirmed.add(ssid)
+    return confirmed
+
+
+def provision_wifi_profiles(entries, adapter_name=None):
+    """
+    Add many Wi-Fi profiles without connecting to any of them. entries are (ssid, password,
+    auth_type) tuples; their XML is rendered in memory with generate_wifi_profile_xml, written
+    to one temp directory and added with a single 'netsh -f' call. Profiles netsh does not
+    confirm in English output (e.g. on a localized Windows) are checked with one export.
+    Returns one WifiProvisionResult per entry (in order) and an optional error message for the
+    batch as a whole. Invalid and duplicate entries are reported without being sent to netsh.
+    """
+    results = {}
+    batch = [] # (position, ssid, xml)
+    seen_ssids = set()
+    for position, (ssid, password, auth_type) in enumerate(entries):
+        error = _wifi_entry_error(ssid, password, auth_type)
+        if error is None and ssid in seen_ssids:
+            error = "Duplicate SSID; the first entry was used."
+        if error:
+            results[position] = WifiProvisionResult(ssid, False, error)
+            continue
+        seen_ssids.add(ssid)
+        batch.append((position, ssid, generate_wifi_profile_xml(ssid, password, auth_type or "WPA2PSK")))
+
+    batch_error = None
+    if batch:
+        output = ""
+        try:
+            with tempfile.TemporaryDirectory(prefix="wifi_profiles_") as temp_dir:
+                profile_paths = []
+                for position, _, profile_xml in batch:
+                    path = os.path.join(temp_dir, f"profile_{position:04d}.xml")
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(profile_xml)
+                    profile_paths.append(path)
+                script_path = os.path.join(temp_dir, "add_profiles.netsh")
+                with open(script_path, "w", encoding="utf-8") as f:
+                    f.write(compile_wifi_provisioning_script(profile_paths, adapter_name))
+                try:
+                    output = _run_command(f'netsh -f "{script_path}"').stdout or ""
+                except subprocess.CalledProcessError as e:
+                    # Some profiles may still have been added; the output says which.
+                    output = (e.stdout or "") + (e.stderr or "")
+        except command_runner.CommandNotRecordedError:
+            raise
+        except Exception as e:
+            batch_error = _sanitize_message_for_notification(f"Error adding Wi-Fi profiles: {e}")
+
+        added = set()
+        unmatched_lines = []
+        for line in output.splitlines():
+            match = _PROFILE_ADDED_LINE.match(line)
+            if match:
+                added.add(match.group(1))
+            elif line.strip():
+                unmatched_lines.append(line.strip())
+        unconfirmed = [item for item in batch if item[1] not in added]
+        # Without a batch run there is nothing to confirm: profiles an export finds were there before.
+        if unconfirmed and batch_error is None:
+            added |= _confirm_installed_wifi_profiles(unconfirmed)
+        details = " ".join(unmatched_lines) or "netsh did not confirm the profile."
+        for position, ssid, profile_xml in batch:
+            if ssid in added:
+                if adapter_name:
+                    wifi_profile_cache.store(ssid, adapter_name, profile_xml)
+                results[position] = WifiProvisionResult(ssid, True, f"Wi-Fi profile for {ssid} added.")
+            else:
+                results[position] = WifiProvisionResult(
+                    ssid, False, _sanitize_message_for_notification(batch_error or f"Could not add Wi-Fi profile for {ssid}. Details: {details}")
+                )
+    return [results[position] for position in sorted(results)], batch_error
+
+
+def wifi_entries_from_profiles(profiles):
+    """(ssid, password, auth_type) entries from DBManager.get_wifi_profiles rows (config_name, ssid, password, auth_type)."""
+    return [(ssid, password, auth_type) for _, ssid, password, auth_type in profiles]
+
+
+def provision_wifi_profiles_from_db(db, config_name=None, adapter_name=None):
+    """Provision the Wi-Fi profiles stored in the database (all, or those of one configuration)."""
+    profiles, error_msg = db.get_wifi_profiles(config_name)
+    if error_msg:
+        return [], error_msg
+    return provision_wifi_profiles(wifi_entries_from_profiles(profiles), adapter_name)
+
+
+STATIC_STATUS_PREFIX = "Static: "
+UNSAVED_PROFILE_NAME = "(Custom/Unsaved)"
+
+
+def _profile_match_key(config: dict) -> tuple:
+    return (config.get('adapter_name'), config.get('ip_address'), config.get('subnet_mask'), config.get('gateway'))
+
+
+def build_profile_index(saved_configs) -> dict[tuple, str]:
+    """
+    Map (adapter_name, ip_address, subnet_mask, gateway) to the saved profile with those values
+    (the first one if several share them). Build it once per config load and pass it to
+    get_adapter_statuses so each adapter is matched with one lookup.
+    """
+    index = {}
+    for profile_name, saved_profile_data in saved_configs.get("networks", {}).items():
+        index.setdefault(_profile_match_key(saved_profile_data), profile_name)
+    return index
+
+
+def active_profiles(adapter_statuses: dict) -> dict[str, str]:
+    """Reverse of the get_adapter_statuses result: saved profile name -> adapter it is active on."""
+    return {
+        status[len(STATIC_STATUS_PREFIX):]: adapter_name
+        for adapter_name, status in adapter_statuses.items()
+        if status.startswith(STATIC_STATUS_PREFIX) and status != STATIC_STATUS_PREFIX + UNSAVED_PROFILE_NAME
+    }
+
+
+def get_adapter_statuses(saved_configs, snapshot: list[dict] | None = None, profile_index: dict | None = None):
     """
     Fetch the statuses of all active adapters and compare them with saved configurations.
+    All adapters are resolved from a single adapter snapshot (fetched if not provided), and
+    matched against profile_index (see build_profile_index; built from saved_configs if not given).
     Returns a dictionary of adapter statuses and an optional error message.
     """
     adapter_statuses = {}
-    active_adapters, list_err = list_adapters()
-    if list_err:
-        return adapter_statuses, list_err
-
-    for short_name, detailed_name in active_adapters:
-        live_config, get_err = get_current_adapter_config(short_name)
-        if get_err and not live_config:
-            adapter_statuses[short_name] = _sanitize_message_for_notification(f"Error: {get_err}")
-        elif live_config:
-            if live_config.get('dhcp_enabled'):
-                adapter_statuses[short_name] = "DHCP"
-            else:
-                status_found = False
-                for profile_name, saved_profile_data in saved_configs.get("networks", {}).items():
-                    if (saved_profile_data.get('adapter_name') == short_name and
-                        saved_profile_data.get('ip_address') == live_config.get('ip_address') and
-                        saved_profile_data.get('subnet_mask') == live_config.get('subnet_mask') and
-                        saved_profile_data.get('gateway') == live_config.get('gateway')):
-                        adapter_statuses[short_name] = f"Static: {profile_name}"
-                        status_found = True
-                        break
-                if not status_found:
-                    adapter_statuses[short_name] = "Static: (Custom/Unsaved)"
+    if snapshot is None:
+        snapshot, snapshot_err = get_adapter_snapshot()
+        if snapshot_err:
+            return adapter_statuses, snapshot_err
+    if profile_index is None:
+        profile_index = build_profile_index(saved_configs)
+
+    for entry in snapshot:
+        if entry.get("status") != "Up":
+            continue
+        short_name = entry["name"]
+        live_config = snapshot_entry_to_config(entry)
+        if live_config.get('dhcp_enabled'):
+            adapter_statuses[short_name] = "DHCP"
+        else:
+            profile_name = profile_index.get(_profile_match_key(live_config), UNSAVED_PROFILE_NAME)
+            adapter_statuses[short_name] = STATIC_STATUS_PREFIX + profile_name
     return adapter_statuses, None
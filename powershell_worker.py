@@ -0,0 +1,352 @@
+import atexit
+import base64
+import itertools
+import json
+import queue
+import subprocess
+import threading
+import time
+
+# Every response line written by the worker starts with this marker, so stray output
+# (banners, progress records) on stdout can never be mistaken for a response.
+FRAME_PREFIX = "@@NCS@@ "
+
+DEFAULT_REQUEST_TIMEOUT = 30.0
+DEFAULT_STARTUP_TIMEOUT = 15.0
+DEFAULT_HEALTH_CHECK_INTERVAL = 60.0
+
+# Worker loop run inside powershell.exe. Protocol (one JSON document per line):
+#   request:  {"id": 1, "op": "ping" | "ps" | "exec", "script": "...", "file": "netsh", "arguments": "..."}
+#   response: @@NCS@@ {"id": 1, "ok": true, "stdout": "...", "stderr": "...", "exit_code": 0}
+# "ps" evaluates a PowerShell script inside the worker, in a child scope of its own so the script's
+# variables and preferences (e.g. $ErrorActionPreference) neither leak into later requests nor
+# touch the loop's $req/$resp/$prefix, "exec" starts the executable directly
+# (no cmd.exe in between) with the rest of the command line passed verbatim, keeping netsh
+# quoting intact, and "ping" is the health check.
+WORKER_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$prefix = '@@NCS@@ '
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    if (-not $line.Trim()) { continue }
+    try { $req = $line | ConvertFrom-Json } catch { continue }
+    $resp = @{ id = $req.id; ok = $true; stdout = ''; stderr = ''; exit_code = 0 }
+    try {
+        switch ($req.op) {
+            'ping' { $resp.pong = $true }
+            'ps' {
+                $out = & ([scriptblock]::Create($req.script)) 2>&1
+                $errs = @($out | Where-Object { $_ -is [System.Management.Automation.ErrorRecord] })
+                $resp.stdout = $out | Where-Object { $_ -isnot [System.Management.Automation.ErrorRecord] } | Out-String -Width 4096
+                if ($errs) { $resp.stderr = ($errs | Out-String -Width 4096) }
+            }
+            'exec' {
+                $psi = New-Object System.Diagnostics.ProcessStartInfo
+                $psi.FileName = $req.file
+                $psi.Arguments = $req.arguments
+                $psi.RedirectStandardOutput = $true
+                $psi.RedirectStandardError = $true
+                $psi.UseShellExecute = $false
+                $psi.CreateNoWindow = $true
+                $proc = [System.Diagnostics.Process]::Start($psi)
+                $stdoutTask = $proc.StandardOutput.ReadToEndAsync()
+                $resp.stderr = $proc.StandardError.ReadToEnd()
+                $proc.WaitForExit()
+                $resp.stdout = $stdoutTask.Result
+                $resp.exit_code = $proc.ExitCode
+            }
+            default { $resp.ok = $false; $resp.stderr = "Unknown op: $($req.op)"; $resp.exit_code = 1 }
+        }
+    } catch {
+        $resp.ok = $false
+        $resp.stderr = $_.ToString()
+        $resp.exit_code = 1
+    }
+    [Console]::Out.WriteLine($prefix + ($resp | ConvertTo-Json -Compress))
+    [Console]::Out.Flush()
+}
+"""
+
+
+class WorkerError(Exception):
+    """Raised when the worker process cannot be started or dies while handling a request."""
+    pass
+
+
+class WorkerTimeoutError(WorkerError):
+    """Raised when the worker does not answer a request within its timeout."""
+    pass
+
+
+class RequestDeliveredError(WorkerError):
+    """
+    Raised when the worker dies after a request was written to it. The request may have run,
+    so it must not be sent again elsewhere.
+    """
+    pass
+
+
+class RequestAbandonedError(WorkerTimeoutError):
+    """
+    Raised when a caller's own (shorter) timeout expires before the worker answers. The worker
+    is left running; its late reply is discarded.
+    """
+    pass
+
+
+def split_command_line(command_line: str) -> tuple[str, str]:
+    """Split a command line into the executable (unquoted) and the rest of the line, verbatim."""
+    command_line = command_line.strip()
+    if command_line.startswith('"'):
+        executable, _, arguments = command_line[1:].partition('"')
+    else:
+        executable, _, arguments = command_line.partition(" ")
+    return executable, arguments.strip()
+
+
+def default_worker_command() -> list[str]:
+    """Command line that starts the PowerShell worker loop."""
+    encoded_script = base64.b64encode(WORKER_SCRIPT.encode("utf-16-le")).decode("ascii")
+    return [
+        "powershell.exe",
+        "-NoProfile",
+        "-NonInteractive",
+        "-ExecutionPolicy", "Bypass",
+        "-EncodedCommand", encoded_script,
+    ]
+
+
+class PowerShellWorker:
+    """
+    Keeps one shell process open and sends it framed requests over stdin/stdout.
+    Requests are serialized; a crashed worker is restarted on the next request and a
+    worker that misses its request_timeout is killed, since its state is unknown. A request
+    given a shorter timeout (e.g. capped by a deadline budget) is abandoned when it expires
+    instead: the worker keeps running and the late reply is dropped, unless the worker is
+    still busy with it after request_timeout.
+    """
+
+    def __init__(self, command=None, request_timeout=DEFAULT_REQUEST_TIMEOUT,
+                 startup_timeout=DEFAULT_STARTUP_TIMEOUT,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        self.command = command or default_worker_command()
+        self.request_timeout = request_timeout
+        self.startup_timeout = startup_timeout
+        self.health_check_interval = health_check_interval
+        self.restart_count = 0
+        self._process = None
+        self._responses = None
+        self._reader_thread = None
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._last_activity = 0.0
+        self._started_once = False
+        self._abandoned = {} # request id -> time.monotonic() it was sent
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, timeout=None):
+        """
+        Start the worker process and wait until it answers a health check. A timeout shorter than
+        startup_timeout (the caller's remaining budget) abandons the wait when it expires
+        (RequestAbandonedError) and leaves the worker starting for later requests.
+        """
+        with self._lock:
+            if self.is_alive():
+                return
+            try:
+                self._process = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    encoding="utf-8",
+                    errors="ignore",
+                    bufsize=1,
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+                )
+            except OSError as e:
+                self._process = None
+                raise WorkerError(f"Could not start worker process: {e}")
+            if self._started_once:
+                self.restart_count += 1
+            self._started_once = True
+            self._abandoned.clear()
+            self._responses = queue.Queue()
+            self._reader_thread = threading.Thread(
+                target=self._read_responses,
+                args=(self._process, self._responses),
+                daemon=True,
+            )
+            self._reader_thread.start()
+            abandon = timeout is not None and timeout < self.startup_timeout
+            try:
+                response = self._send({"op": "ping"}, timeout if abandon else self.startup_timeout, restart=False, abandon=abandon)
+            except RequestAbandonedError:
+                raise
+            except WorkerError:
+                response = {}
+            if not response.get("pong"):
+                self.stop(force=True)
+                raise WorkerError("Worker process did not answer the startup health check.")
+
+    def stop(self, force=False):
+        """Terminate the worker process; force kills it without waiting for a clean exit."""
+        with self._lock:
+            process, self._process = self._process, None
+            if process is None:
+                return
+            if force:
+                process.kill()
+                process.wait()
+                return
+            try:
+                if process.stdin:
+                    process.stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def ping(self, timeout=5.0) -> bool:
+        """Health check: True if the worker answered a ping within the timeout."""
+        with self._lock: # requests must not interleave their frames
+            try:
+                response = self._send({"op": "ping"}, timeout, restart=False)
+            except WorkerError:
+                return False
+        return bool(response.get("pong"))
+
+    def ensure_healthy(self):
+        """Restart the worker if it is dead or no longer answering pings."""
+        with self._lock:
+            if not self.is_alive() or not self.ping():
+                self.stop(force=True)
+                self.start()
+
+    def request(self, payload: dict, timeout=None) -> dict:
+        """
+        Send one request and return the decoded response dictionary. A timeout shorter than
+        request_timeout abandons the request when it expires (RequestAbandonedError) rather than
+        killing the worker.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._drop_abandoned_replies()
+            if self._abandoned and time.monotonic() - min(self._abandoned.values()) > self.request_timeout:
+                self.stop(force=True) # still busy with an abandoned request: hung
+            if not self.is_alive():
+                self.start(timeout) # a cold start counts against the caller's timeout
+            elif not self._abandoned and time.monotonic() - self._last_activity > self.health_check_interval:
+                self.ensure_healthy()
+            if timeout is None:
+                return self._send(payload, self.request_timeout, restart=True)
+            remaining = max(0.0, timeout - (time.monotonic() - started))
+            return self._send(payload, remaining, restart=True, abandon=timeout < self.request_timeout)
+
+    def run_powershell(self, script: str, timeout=None) -> subprocess.CompletedProcess:
+        """Evaluate a PowerShell script inside the worker."""
+        response = self.request({"op": "ps", "script": script}, timeout)
+        return self._to_completed_process(script, response)
+
+    def run_command(self, command_line: str, timeout=None) -> subprocess.CompletedProcess:
+        """Run a command line (e.g. a netsh call) through the worker, which starts the executable directly."""
+        executable, arguments = split_command_line(command_line)
+        response = self.request({"op": "exec", "file": executable, "arguments": arguments}, timeout)
+        return self._to_completed_process(command_line, response)
+
+    def _drop_abandoned_replies(self):
+        """Consume the replies to abandoned requests that arrived since the last request."""
+        responses = self._responses
+        while self._abandoned and responses is not None:
+            try:
+                response = responses.get_nowait()
+            except queue.Empty:
+                return
+            if response is None: # the worker exited; the next request restarts it
+                responses.put(None)
+                return
+            self._abandoned.pop(response.get("id"), None)
+
+    def _send(self, payload, timeout, restart, abandon=False):
+        process, responses = self._process, self._responses
+        if process is None or process.poll() is not None:
+            raise WorkerError("Worker process is not running.")
+        request_id = next(self._ids)
+        line = json.dumps(dict(payload, id=request_id)) + "\n"
+        try:
+            process.stdin.write(line)
+            process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.stop(force=True)
+            if not restart:
+                raise WorkerError(f"Could not write to worker process: {e}")
+            # Nothing reached the worker, so the request can safely be resent once.
+            self.start()
+            return self._send(payload, timeout, restart=False, abandon=abandon)
+
+        sent_at = time.monotonic()
+        deadline = sent_at + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if abandon:
+                    self._abandoned[request_id] = sent_at
+                    raise RequestAbandonedError(f"No answer within {timeout:.1f}s; request abandoned.")
+                self.stop(force=True)
+                raise WorkerTimeoutError(f"Worker did not answer within {timeout:.1f}s.")
+            try:
+                response = responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if response is None:
+                self.stop(force=True)
+                raise RequestDeliveredError("Worker process exited while handling a request.")
+            if response.get("id") == request_id:
+                self._last_activity = time.monotonic()
+                return response
+            self._abandoned.pop(response.get("id"), None) # late reply to an abandoned request
+
+    @staticmethod
+    def _read_responses(process, responses):
+        for line in process.stdout:
+            if not line.startswith(FRAME_PREFIX):
+                continue
+            try:
+                responses.put(json.loads(line[len(FRAME_PREFIX):]))
+            except json.JSONDecodeError:
+                continue
+        responses.put(None) # EOF: the worker exited
+
+    @staticmethod
+    def _to_completed_process(args, response) -> subprocess.CompletedProcess:
+        exit_code = response.get("exit_code")
+        if exit_code is None:
+            exit_code = 0 if response.get("ok", True) else 1
+        return subprocess.CompletedProcess(
+            args,
+            int(exit_code),
+            stdout=response.get("stdout") or "",
+            stderr=response.get("stderr") or "",
+        )
+
+
+_shared_worker = None
+_shared_worker_lock = threading.Lock()
+
+
+def get_shared_worker() -> PowerShellWorker:
+    """Return the process-wide worker, creating it on first use."""
+    global _shared_worker
+    with _shared_worker_lock:
+        if _shared_worker is None:
+            _shared_worker = PowerShellWorker()
+            atexit.register(_shared_worker.stop)
+        return _shared_worker
@@ -6,19 +6,22 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEngineSettings, QWebEngineProfile, QWebEnginePage
-from PyQt6.QtCore import QUrl, QTimer, QDir
+from PyQt6.QtCore import QUrl, QTimer, QDir, pyqtSignal
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtGui import QAction
 import socket
 import keyring
 from db_manager import DBManager
-from network_manager import get_current_adapter_config, list_adapters # Import list_adapters
+import async_network_manager as async_nm
+from network_manager import list_adapters
 from datetime import datetime
 
 
 class RouterBrowser(QMainWindow):
     """Custom browser for router login with navigation, credentials, and HTTPS support."""
 
+    network_status_ready = pyqtSignal(str)
+
     def __init__(self, router_ip, router_port=None, refresh_interval=5000, preferred_protocol="http"):
         super().__init__()
         if not router_ip: # Ensure router_ip is provided
@@ -147,6 +150,7 @@ class RouterBrowser(QMainWindow):
         """Creates and configures the status bar."""
         self.status_bar = QStatusBar()
         self.network_status_label = QLabel("Network Status: Unknown")
+        self.network_status_ready.connect(self.network_status_label.setText)
         self.status_bar.addWidget(self.network_status_label)
         self.setStatusBar(self.status_bar)
 
@@ -425,17 +429,26 @@ class RouterBrowser(QMainWindow):
         self.status_bar.showMessage(f"Switched to credential for: {username}", 5000)
 
     def update_network_status(self):
-        """Update the network status in the status bar."""
-        active_adapters_tuples, msg = list_adapters() # list_adapters returns list of tuples
+        """Update the network status in the status bar without blocking the GUI thread."""
+        async_nm.submit(
+            self._fetch_network_status_text(),
+            callback=self.network_status_ready.emit,
+            on_error=lambda error: self.network_status_ready.emit(f"Network Status: Error - {error}"),
+        )
+
+    async def _fetch_network_status_text(self):
+        """Build the network status text from one adapter snapshot."""
+        snapshot, msg = await async_nm.get_adapter_snapshot() # One query serves the list and every adapter config
+        if not msg:
+            active_adapters_tuples, msg = list_adapters(snapshot=snapshot) # Served from the snapshot, no extra query
         if msg:
-            self.network_status_label.setText(f"Network Status: Error listing adapters - {msg}")
-            return
+            return f"Network Status: Error listing adapters - {msg}"
 
         status_text = "Network Status: Unknown or No Active Configured Connection"
         if active_adapters_tuples:
             for adapter_short_name, adapter_detailed_name in active_adapters_tuples:
                 # Use adapter_short_name for get_current_adapter_config
-                config, config_msg = get_current_adapter_config(adapter_short_name)
+                config, config_msg = await async_nm.get_current_adapter_config(adapter_short_name, snapshot=snapshot)
                 if config_msg and not config:
                     print(f"Could not get config for {adapter_short_name} ({adapter_detailed_name}): {config_msg}")
                     continue
@@ -443,7 +456,7 @@ class RouterBrowser(QMainWindow):
                     # Display adapter_detailed_name for user-friendliness
                     status_text = f"Adapter: {adapter_detailed_name} | IP: {config.get('ip_address', 'N/A')} | Gateway: {config.get('gateway', 'N/A')}"
                     break
-        self.network_status_label.setText(status_text)
+        return status_text
 
 
     def show(self):
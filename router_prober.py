@@ -0,0 +1,232 @@
+"""
+Router reachability prober.
+
+Checks the router page (router_ip, router_port, router_protocol) of every saved profile from the
+current link, without switching. Profiles with no router_ip are checked at their gateway. Each
+distinct router is probed once however many profiles point at it: a TCP connect, then a HEAD
+request on the same connection. At most MAX_CONCURRENT_PROBES probes are in flight on the shared
+asyncio loop and a refused connection answers at once, so hundreds of profiles take a fraction
+of a second when hosts refuse quickly. Results are cached for `ttl` seconds and shown by the
+tray next to the profile names.
+"""
+import asyncio
+import ssl
+import threading
+import time
+from typing import NamedTuple
+
+import async_network_manager
+import command_runner
+import network_manager
+
+STATUS_UP = "up" # the router page answered the HEAD request
+STATUS_OPEN = "open" # connected, but no HTTP answer
+STATUS_REFUSED = "refused" # the host sent a reset: it is up, nothing listens on the port
+STATUS_UNREACHABLE = "unreachable"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+DEFAULT_TTL = 60.0 # seconds a probe result is served before the router is probed again
+DEFAULT_CONNECT_TIMEOUT = 0.5
+DEFAULT_HEAD_TIMEOUT = 1.0
+MAX_CONCURRENT_PROBES = 64
+
+
+class RouterTarget(NamedTuple):
+    host: str
+    port: int
+    protocol: str # "http" or "https"
+
+
+class RouterStatus(NamedTuple):
+    target: RouterTarget
+    status: str # one of the STATUS_ constants
+    http_status: int | None
+    latency: float | None # seconds to connect (or be refused)
+    error: str | None
+    checked_at: float
+
+    @property
+    def reachable(self) -> bool:
+        return self.status != STATUS_UNREACHABLE
+
+
+def router_target(config) -> RouterTarget | None:
+    """The router a profile points at, or None if it has neither a router_ip nor a gateway."""
+    host = (config.get("router_ip") or config.get("gateway") or "").strip()
+    if not host:
+        return None
+    protocol = (config.get("router_protocol") or "http").lower()
+    if protocol not in DEFAULT_PORTS:
+        protocol = "http"
+    port = str(config.get("router_port") or "").strip()
+    return RouterTarget(host, int(port) if port.isdigit() else DEFAULT_PORTS[protocol], protocol)
+
+
+def router_targets(network_configs) -> dict[str, RouterTarget]:
+    """Profile name -> RouterTarget for the profiles that have one."""
+    targets = {}
+    for name, config in network_configs.items():
+        target = router_target(config)
+        if target is not None:
+            targets[name] = target
+    return targets
+
+
+def _ssl_context() -> ssl.SSLContext:
+    # Router admin pages use self-signed certificates; the probe only checks that one answers.
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _parse_status_line(line: bytes) -> int | None:
+    parts = line.decode("latin-1").split()
+    if len(parts) >= 2 and parts[0].startswith("HTTP/") and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+async def probe_router(target, connect_timeout=DEFAULT_CONNECT_TIMEOUT, head_timeout=DEFAULT_HEAD_TIMEOUT,
+                       clock=time.monotonic) -> RouterStatus:
+    """
+    Connect to a router and send HEAD / on the same connection. Runs through the command runner,
+    so router probes are recorded and replayed with the commands.
+    """
+    async def probe():
+        status = await _probe_router(target, connect_timeout, head_timeout, clock)
+        return [status.status, status.http_status, status.latency, status.error]
+
+    status, http_status, latency, error = await command_runner.run_probe_async(
+        network_manager.get_command_runner(), f"router {target.protocol}://{target.host}:{target.port}", probe
+    )
+    return RouterStatus(target, status, http_status, latency, error, clock())
+
+
+async def _probe_router(target, connect_timeout, head_timeout, clock) -> RouterStatus:
+    started = clock()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                target.host, target.port, ssl=_ssl_context() if target.protocol == "https" else None
+            ),
+            connect_timeout,
+        )
+    except ConnectionRefusedError:
+        return RouterStatus(target, STATUS_REFUSED, None, clock() - started, None, clock())
+    except ssl.SSLError as e: # the port answered, but not with TLS
+        return RouterStatus(target, STATUS_OPEN, None, clock() - started, str(e), clock())
+    except asyncio.TimeoutError:
+        return RouterStatus(target, STATUS_UNREACHABLE, None, None, "timed out", clock())
+    except OSError as e:
+        return RouterStatus(target, STATUS_UNREACHABLE, None, None, str(e) or type(e).__name__, clock())
+
+    latency = clock() - started
+    try:
+        writer.write(f"HEAD / HTTP/1.1\r\nHost: {target.host}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        http_status = _parse_status_line(await asyncio.wait_for(reader.readline(), head_timeout))
+        if http_status is None:
+            return RouterStatus(target, STATUS_OPEN, None, latency, "no HTTP answer", clock())
+        return RouterStatus(target, STATUS_UP, http_status, latency, None, clock())
+    except asyncio.TimeoutError:
+        return RouterStatus(target, STATUS_OPEN, None, latency, "no HTTP answer", clock())
+    except OSError as e:
+        return RouterStatus(target, STATUS_OPEN, None, latency, str(e) or type(e).__name__, clock())
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def probe_routers(targets, concurrency=MAX_CONCURRENT_PROBES, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                        head_timeout=DEFAULT_HEAD_TIMEOUT, clock=time.monotonic) -> dict[RouterTarget, RouterStatus]:
+    """Probe each distinct target once, at most `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(target):
+        async with semaphore:
+            return await probe_router(target, connect_timeout, head_timeout, clock)
+
+    unique_targets = list(dict.fromkeys(targets))
+    statuses = await asyncio.gather(*(probe(target) for target in unique_targets))
+    return dict(zip(unique_targets, statuses))
+
+
+def describe_status(status: RouterStatus) -> str:
+    """Short annotation for the tray menu."""
+    if status.status == STATUS_UP:
+        return f"router up, {status.latency * 1000:.0f} ms"
+    if status.status == STATUS_OPEN:
+        return "router port open, no page"
+    if status.status == STATUS_REFUSED:
+        return "router port closed"
+    return "router unreachable"
+
+
+class RouterProber:
+    """Router reachability of the saved profiles, cached per router for `ttl` seconds."""
+
+    def __init__(self, ttl=DEFAULT_TTL, concurrency=MAX_CONCURRENT_PROBES, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 head_timeout=DEFAULT_HEAD_TIMEOUT, clock=time.monotonic):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.connect_timeout = connect_timeout
+        self.head_timeout = head_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._statuses = {} # RouterTarget -> RouterStatus
+        self._pending = None # future of the background refresh in flight
+
+    def _is_fresh(self, status):
+        return self._clock() - status.checked_at < self.ttl
+
+    def invalidate(self):
+        """Forget every result, e.g. after the link changed."""
+        with self._lock:
+            self._statuses.clear()
+
+    def cached_statuses(self, network_configs) -> dict[str, RouterStatus]:
+        """Profile name -> last known status (fresh or not) of its router."""
+        with self._lock:
+            return {
+                name: self._statuses[target]
+                for name, target in router_targets(network_configs).items()
+                if target in self._statuses
+            }
+
+    def stale_targets(self, network_configs) -> set[RouterTarget]:
+        with self._lock:
+            return {
+                target for target in router_targets(network_configs).values()
+                if target not in self._statuses or not self._is_fresh(self._statuses[target])
+            }
+
+    async def probe(self, network_configs, force=False) -> dict[str, RouterStatus]:
+        """Probe the routers whose results are missing or expired (all with force); returns cached_statuses."""
+        targets = set(router_targets(network_configs).values()) if force else self.stale_targets(network_configs)
+        if targets:
+            statuses = await probe_routers(targets, self.concurrency, self.connect_timeout, self.head_timeout, self._clock)
+            with self._lock:
+                self._statuses.update(statuses)
+        return self.cached_statuses(network_configs)
+
+    def refresh_in_background(self, network_configs, callback=None):
+        """
+        Probe the stale routers on the shared asyncio loop; callback gets the statuses when done.
+        Returns the future, or None if every result is fresh or a refresh is already running.
+        """
+        with self._refresh_lock:
+            if self._pending is not None and not self._pending.done():
+                return None
+            if not self.stale_targets(network_configs):
+                return None
+            self._pending = async_network_manager.submit(self.probe(network_configs), callback)
+            return self._pending
+
+    def annotations(self, network_configs) -> dict[str, str]:
+        """Profile name -> describe_status text."""
+        return {name: describe_status(status) for name, status in self.cached_statuses(network_configs).items()}
@@ -2,16 +2,19 @@ from PyQt6.QtWidgets import (
     QMainWindow, QVBoxLayout, QWidget, QLineEdit, QComboBox, QPushButton,
     QCheckBox, QLabel, QMessageBox, QDialog, QTableWidget, QTableWidgetItem,
     QDialogButtonBox, QHBoxLayout, QInputDialog, QStatusBar, QScrollArea,
-    QFileDialog
+    QFileDialog, QListWidget, QListWidgetItem
 )
+from PyQt6.QtCore import Qt
 # Ensure aliased imports are used if function names clash
 from network_manager import (
     list_adapters, validate_ip,
-    get_wifi_profiles as nm_get_wifi_profiles,
+    get_wifi_profile_details as nm_get_wifi_profile_details,
     get_wifi_password as nm_get_wifi_password,
-    has_wifi_support, get_available_networks, apply_wifi_profile, is_wifi_adapter
+    apply_wifi_profile, is_wifi_adapter, invalidate_wifi_profile_cache
 )
 from db_manager import DBManager
+import capability_probe
+import wifi_scanner
 class SettingsGUI(QMainWindow):
     """GUI for managing network configurations using PyQt6."""
     # Declare attributes for QLineEdit fields and other UI elements for type hinting
@@ -36,6 +39,11 @@ class SettingsGUI(QMainWindow):
     nearby_networks_combo: QComboBox
     wifi_ssid: QLineEdit
     wifi_password: QLineEdit
+
+    # Profile sets section
+    profile_set_select: QComboBox
+    profile_set_name: QLineEdit
+    profile_set_members: QListWidget
     auth_type_combo: QComboBox
     apply_wifi_btn: QPushButton
 
@@ -43,7 +51,7 @@ class SettingsGUI(QMainWindow):
         super().__init__()
         self.main_app_controller = main_app_controller
         try:
-            self.db = DBManager()
+            self.db = DBManager(on_wifi_profile_changed=invalidate_wifi_profile_cache)
         except Exception as e:
             QMessageBox.critical(self, "Database Error", f"Failed to initialize database manager: {e}\nSettings GUI cannot function properly.")
             print(f"CRITICAL: DBManager failed to initialize: {e}")
@@ -56,10 +64,16 @@ class SettingsGUI(QMainWindow):
                 def delete_wifi_profile(self, cn, s): return (False, "DB not initialized")
                 def export_all_data(self): return (None, "DB not initialized")
                 def import_all_data(self, js): return (False, "DB not initialized")
+                def load_profile_sets(self): return {}
+                def save_profile_set(self, s, c): return (False, "DB not initialized")
+                def delete_profile_set(self, s): return (False, "DB not initialized")
             self.db = DummyDB() if not hasattr(self, 'db') else self.db
 
 
-        self.wifi_supported = has_wifi_support()
+        # The tray keeps the probed capabilities current; fall back to the stored probe result.
+        self.wifi_supported = getattr(main_app_controller, "wifi_supported", None)
+        if self.wifi_supported is None:
+            self.wifi_supported = capability_probe.cached_wifi_support()
 
         self.setWindowTitle("Network Configuration Settings")
         initial_height = 680 if self.wifi_supported else 610 # Adjusted height for new field + buttons
@@ -213,6 +227,8 @@ class SettingsGUI(QMainWindow):
         config_select_layout.addWidget(self.config_select, 1)
         main_layout.addLayout(config_select_layout)
 
+        self.add_profile_set_section(main_layout)
+
         main_layout.addStretch(1)
 
         self.update_config_list()
@@ -221,6 +237,122 @@ class SettingsGUI(QMainWindow):
         if self.wifi_supported:
             self.update_wifi_controls_state()
 
+    def add_profile_set_section(self, main_layout):
+        """Controls to create, edit and delete profile sets (one configuration per adapter)."""
+        main_layout.addWidget(QLabel("Profile Sets:"))
+
+        profile_set_select_layout = QHBoxLayout()
+        profile_set_select_layout.setSpacing(10)
+        self.profile_set_select = QComboBox()
+        self.profile_set_select.currentTextChanged.connect(self.load_profile_set_to_fields)
+        self.profile_set_name = QLineEdit()
+        self.profile_set_name.setPlaceholderText("Set name")
+        profile_set_select_layout.addWidget(QLabel("Select Set to Edit:"))
+        profile_set_select_layout.addWidget(self.profile_set_select, 1)
+        profile_set_select_layout.addWidget(QLabel("Name:"))
+        profile_set_select_layout.addWidget(self.profile_set_name, 1)
+        main_layout.addLayout(profile_set_select_layout)
+
+        self.profile_set_members = QListWidget()
+        self.profile_set_members.setMaximumHeight(110)
+        main_layout.addWidget(self.profile_set_members)
+
+        profile_set_buttons_layout = QHBoxLayout()
+        profile_set_buttons_layout.setSpacing(10)
+        save_set_button = QPushButton("Save Profile Set")
+        save_set_button.clicked.connect(self.save_profile_set)
+        delete_set_button = QPushButton("Delete Profile Set")
+        delete_set_button.clicked.connect(self.delete_profile_set)
+        profile_set_buttons_layout.addStretch(1)
+        profile_set_buttons_layout.addWidget(save_set_button)
+        profile_set_buttons_layout.addWidget(delete_set_button)
+        profile_set_buttons_layout.addStretch(1)
+        main_layout.addLayout(profile_set_buttons_layout)
+
+    def update_profile_set_list(self):
+        """Refresh the set selector and the checkable list of configurations a set can contain."""
+        current_selection = self.profile_set_select.currentText()
+        self.profile_set_select.blockSignals(True)
+        self.profile_set_select.clear()
+        self.profile_set_select.addItem("") # new set
+        self.profile_set_select.addItems(list(self.db.load_profile_sets().keys()))
+        self.profile_set_select.blockSignals(False)
+
+        self.profile_set_members.clear()
+        for config_name, config_data in self.db.load_configs().get("networks", {}).items():
+            item = QListWidgetItem(f"{config_name} ({config_data.get('adapter_name', '')})")
+            item.setData(Qt.ItemDataRole.UserRole, config_name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.profile_set_members.addItem(item)
+
+        if self.profile_set_select.findText(current_selection) != -1:
+            self.profile_set_select.setCurrentText(current_selection)
+        self.load_profile_set_to_fields(self.profile_set_select.currentText())
+
+    def load_profile_set_to_fields(self, set_name):
+        config_names = set(self.db.load_profile_sets().get(set_name, [])) if set_name else set()
+        self.profile_set_name.setText(set_name)
+        for row in range(self.profile_set_members.count()):
+            item = self.profile_set_members.item(row)
+            checked = item.data(Qt.ItemDataRole.UserRole) in config_names
+            item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+
+    def save_profile_set(self):
+        set_name = self.profile_set_name.text().strip()
+        config_names = [
+            self.profile_set_members.item(row).data(Qt.ItemDataRole.UserRole)
+            for row in range(self.profile_set_members.count())
+            if self.profile_set_members.item(row).checkState() == Qt.CheckState.Checked
+        ]
+        if not set_name:
+            self.status_bar.showMessage("Save profile set failed: Set name is required.", 5000)
+            QMessageBox.critical(self, "Validation Error", "Profile set name is required.")
+            return
+        configs = self.db.load_configs().get("networks", {})
+        adapters = [configs[name]["adapter_name"] for name in config_names if name in configs]
+        if len(set(adapters)) != len(adapters):
+            self.status_bar.showMessage("Save profile set failed: One configuration per adapter.", 5000)
+            QMessageBox.critical(self, "Validation Error", "A profile set can contain only one configuration per adapter.")
+            return
+        try:
+            success, message = self.db.save_profile_set(set_name, config_names)
+            if success:
+                previous_name = self.profile_set_select.currentText()
+                if previous_name and previous_name != set_name: # renamed
+                    self.db.delete_profile_set(previous_name)
+                self.update_profile_set_list()
+                self.profile_set_select.setCurrentText(set_name)
+                self.main_app_controller.update_tray_menu()
+                self.status_bar.showMessage(f"Profile set '{set_name}' saved.", 3000)
+                QMessageBox.information(self, "Success", message)
+            else:
+                self.status_bar.showMessage(f"Failed to save profile set: {message}", 5000)
+                QMessageBox.critical(self, "DB Error", message)
+        except Exception as e:
+            self.status_bar.showMessage(f"Save profile set error: {e}", 5000)
+            QMessageBox.critical(self, "Save Profile Set Error", f"An unexpected error occurred: {e}")
+
+    def delete_profile_set(self):
+        set_name = self.profile_set_select.currentText()
+        if not set_name:
+            self.status_bar.showMessage("Delete profile set failed: No set selected.", 5000)
+            QMessageBox.critical(self, "Selection Error", "Please select a profile set to delete.")
+            return
+        reply = QMessageBox.question(self, 'Delete Profile Set',
+                                     f"Are you sure you want to delete the profile set '{set_name}'?\nIts configurations are kept.",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            success, message = self.db.delete_profile_set(set_name)
+            if success:
+                self.update_profile_set_list()
+                self.main_app_controller.update_tray_menu()
+                self.status_bar.showMessage(f"Profile set '{set_name}' deleted.", 3000)
+            else:
+                self.status_bar.showMessage(f"Failed to delete profile set: {message}", 5000)
+                QMessageBox.critical(self, "DB Error", message)
+
     def add_wifi_section_content(self, wifi_main_layout):
         wifi_label = QLabel("Wi-Fi Settings:")
         wifi_main_layout.addWidget(wifi_label)
@@ -250,6 +382,9 @@ class SettingsGUI(QMainWindow):
         nearby_layout.addWidget(self.nearby_networks_combo, 1)
         nearby_layout.addWidget(scan_btn)
         wifi_main_layout.addLayout(nearby_layout)
+        cached_scan = wifi_scanner.get_shared_scanner().get_results()
+        if cached_scan.networks: # show the tray's last background scan without rescanning
+            self._show_nearby_networks(cached_scan, announce=False)
 
         wifi_ssid_layout = QHBoxLayout()
         wifi_ssid_layout.setSpacing(10)
@@ -329,8 +464,12 @@ class SettingsGUI(QMainWindow):
             self.auth_type_combo.setCurrentText("WPA2PSK")
 
     def scan_nearby_networks(self):
-        networks, message = get_available_networks()
-        if message:
+        """Scan button: the user asked for fresh results, so scan now instead of using the cache."""
+        self._show_nearby_networks(wifi_scanner.get_shared_scanner().scan_now())
+
+    def _show_nearby_networks(self, scan_result, announce=True):
+        networks, message = scan_result.networks, scan_result.error
+        if message and announce:
             self.status_bar.showMessage(f"Scan info: {message}", 5000)
             QMessageBox.warning(self, "Scan Info", message)
 
@@ -339,8 +478,10 @@ class SettingsGUI(QMainWindow):
         if networks:
             for ssid, auth_type, signal in networks:
                 self.nearby_networks_combo.addItem(f"{ssid} ({auth_type}, {signal})")
-            self.status_bar.showMessage(f"Found {len(networks)} nearby networks.", 3000)
-        elif not message:
+            self.status_bar.showMessage(
+                f"Found {len(networks)} nearby networks (scanned {wifi_scanner.format_age(scan_result.age)}).", 3000
+            )
+        elif not message and announce:
              QMessageBox.information(self, "Info", "No nearby Wi-Fi networks found.")
              self.status_bar.showMessage("No nearby Wi-Fi networks found.", 3000)
 
@@ -364,7 +505,7 @@ class SettingsGUI(QMainWindow):
                 self.wifi_profile_combo.setCurrentText(current_selection)
 
     def import_system_wifi(self):
-        profiles, message = nm_get_wifi_profiles()
+        profiles, message = nm_get_wifi_profile_details()
         if message:
             self.status_bar.showMessage(f"System Wi-Fi import error: {message}", 5000)
             QMessageBox.warning(self, "Import Info", f"Could not retrieve system Wi-Fi profiles: {message}")
@@ -374,7 +515,8 @@ class SettingsGUI(QMainWindow):
             QMessageBox.information(self, "Info", "No Wi-Fi profiles found on the system.")
             return
 
-        profile_items = [f"{p_ssid} ({p_auth_type})" for p_ssid, p_auth_type in profiles]
+        profile_items = [f"{profile.name} ({profile.auth_type})" for profile in profiles]
+        keys_by_ssid = {profile.name: profile.key_content for profile in profiles}
         selected_item, ok = QInputDialog.getItem(
             self, "Select Wi-Fi Profile", "Choose a Wi-Fi profile:", profile_items, 0, False
         )
@@ -382,7 +524,10 @@ class SettingsGUI(QMainWindow):
             ssid = selected_item.split(" (")[0]
             auth_type_from_selected = selected_item.split("(")[1].rstrip(")")
 
-            password, pwd_message = nm_get_wifi_password(ssid)
+            # The key usually comes with the bulk export; look it up only if it is missing.
+            password, pwd_message = keys_by_ssid.get(ssid), None
+            if password is None and auth_type_from_selected != "open":
+                password, pwd_message = nm_get_wifi_password(ssid)
             if pwd_message and not password:
                  self.status_bar.showMessage(f"Password retrieval for {ssid}: {pwd_message}", 5000)
                  QMessageBox.warning(self, "Password Retrieval", pwd_message)
@@ -519,7 +664,10 @@ class SettingsGUI(QMainWindow):
                 QMessageBox.critical(self, "Selection Error", "Select a Wi-Fi profile or a nearby network to apply.")
                 return
 
-            success, message = apply_wifi_profile(ssid_to_apply, password_to_apply, adapter_name, auth_type_to_apply)
+            latest_bssids = wifi_scanner.get_shared_scanner().get_results().bssids
+            success, message = apply_wifi_profile(
+                ssid_to_apply, password_to_apply, adapter_name, auth_type_to_apply, bssids=latest_bssids
+            )
             if success:
                 self.status_bar.showMessage(f"Successfully applied Wi-Fi: {ssid_to_apply}", 3000)
                 QMessageBox.information(self, "Success", message or f"Successfully connected to Wi-Fi '{ssid_to_apply}'.")
@@ -567,6 +715,7 @@ class SettingsGUI(QMainWindow):
                 self.config_select.setCurrentText(current_selection)
             elif self.config_select.count() > 0:
                 self.config_select.setCurrentIndex(0)
+        self.update_profile_set_list() # its member list offers the configurations
 
     def load_config_to_fields(self, config_name):
         if self._loading_config:
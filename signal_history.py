@@ -0,0 +1,210 @@
+"""
+Signal-strength history of Wi-Fi scans.
+
+Samples are kept in a fixed-size ring buffer of typed array columns (timestamp, BSSID id, signal %),
+so memory stays flat however long the tray runs: appending is O(1) and overwrites the oldest
+sample once the buffer is full. BSSIDs are interned to small integer ids. Statistics per SSID or
+BSSID are computed with NumPy when it is installed (vectorized over the columns, no copies) and
+with plain Python otherwise. Samples can be flushed to SQLite periodically (DBManager.save_signal_samples).
+"""
+import threading
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError: # optional
+    np = None
+
+DEFAULT_CAPACITY = 100_000 # 13 bytes per sample, about 1.3 MB
+DEFAULT_FLUSH_INTERVAL = 300.0 # seconds
+MAX_TRACKED_BSSIDS = 4096 # ids are compacted when more BSSIDs than this have been seen
+
+
+def _percentile(sorted_values, q):
+    """Linear-interpolated percentile of a sorted list (same definition as numpy.percentile)."""
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class SignalHistory:
+    """Fixed-size ring buffer of (timestamp, BSSID, signal %) scan samples."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_tracked_bssids=MAX_TRACKED_BSSIDS):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.max_tracked_bssids = max_tracked_bssids
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._bssid_ids = array("i", bytes(4 * capacity))
+        self._signals = array("b", bytes(capacity))
+        self._next = 0 # slot the next sample is written to
+        self._size = 0
+        self._total = 0 # samples appended since creation
+        self._flushed_total = 0
+        self._ids = {} # (ssid, bssid) -> id
+        self._keys = [] # id -> (ssid, bssid)
+        self._lock = threading.Lock()
+        self._flush_thread = None
+        self._flush_stop = threading.Event()
+
+    def __len__(self):
+        return self._size
+
+    def _intern(self, ssid, bssid):
+        key = (ssid, bssid)
+        bssid_id = self._ids.get(key)
+        if bssid_id is None:
+            if len(self._keys) >= self.max_tracked_bssids:
+                self._compact_ids()
+            bssid_id = len(self._keys)
+            self._ids[key] = bssid_id
+            self._keys.append(key)
+        return bssid_id
+
+    def _compact_ids(self):
+        """Forget BSSIDs that no longer have samples in the buffer and renumber the rest."""
+        remap = {}
+        keys = []
+        for slot in range(self._size):
+            old_id = self._bssid_ids[slot]
+            if old_id not in remap:
+                remap[old_id] = len(keys)
+                keys.append(self._keys[old_id])
+        for slot in range(self._size):
+            self._bssid_ids[slot] = remap[self._bssid_ids[slot]]
+        self._keys = keys
+        self._ids = {key: bssid_id for bssid_id, key in enumerate(keys)}
+        if len(keys) >= self.max_tracked_bssids: # all still in use; avoid compacting on every new BSSID
+            self.max_tracked_bssids = 2 * len(keys)
+
+    def append(self, timestamp, ssid, bssid, signal):
+        """Add one sample, overwriting the oldest one when the buffer is full."""
+        with self._lock:
+            slot = self._next
+            self._timestamps[slot] = timestamp
+            self._bssid_ids[slot] = self._intern(ssid, bssid)
+            self._signals[slot] = max(0, min(100, int(signal)))
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._total += 1
+
+    def record_scan(self, scan_result):
+        """Add a sample for every BSSID of a wifi_scanner.ScanResult."""
+        timestamp = scan_result.scanned_at or time.time()
+        for record in scan_result.bssids:
+            if record.bssid and record.signal >= 0:
+                self.append(timestamp, record.ssid, record.bssid, record.signal)
+
+    def _matching_ids(self, ssid, bssid):
+        return [
+            bssid_id for bssid_id, (key_ssid, key_bssid) in enumerate(self._keys)
+            if (ssid is None or key_ssid == ssid) and (bssid is None or key_bssid == bssid)
+        ]
+
+    def _select_signals(self, ssid=None, bssid=None, since=None):
+        """Signals of the matching samples (a NumPy array when available, else a list)."""
+        ids = self._matching_ids(ssid, bssid)
+        size = self._size
+        if np is not None:
+            signals = np.frombuffer(self._signals, dtype=np.int8, count=size)
+            mask = np.isin(np.frombuffer(self._bssid_ids, dtype=np.int32, count=size), ids)
+            if since is not None:
+                mask &= np.frombuffer(self._timestamps, dtype=np.float64, count=size) >= since
+            return signals[mask].astype(np.float64)
+        wanted = set(ids)
+        timestamps, bssid_ids, all_signals = self._timestamps, self._bssid_ids, self._signals
+        return [
+            all_signals[slot] for slot in range(size)
+            if bssid_ids[slot] in wanted and (since is None or timestamps[slot] >= since)
+        ]
+
+    def stats(self, ssid=None, bssid=None, since=None, percentiles=(50, 90)) -> dict | None:
+        """
+        Count, mean, min, max and percentiles of the signal for an SSID and/or BSSID (all samples if
+        neither is given), optionally only samples taken at or after `since`. None if there are none.
+        """
+        with self._lock:
+            signals = self._select_signals(ssid, bssid, since)
+            if len(signals) == 0:
+                return None
+            if np is not None:
+                result = {
+                    "count": int(signals.size),
+                    "mean": float(signals.mean()),
+                    "min": float(signals.min()),
+                    "max": float(signals.max()),
+                }
+                for q, value in zip(percentiles, np.percentile(signals, percentiles)):
+                    result[f"p{q}"] = float(value)
+                return result
+        ordered = sorted(signals)
+        result = {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "min": float(ordered[0]),
+            "max": float(ordered[-1]),
+        }
+        for q in percentiles:
+            result[f"p{q}"] = float(_percentile(ordered, q))
+        return result
+
+    def pending_samples(self) -> list[tuple[float, str, str, int]]:
+        """(timestamp, ssid, bssid, signal) of the samples not flushed yet that are still in the buffer, oldest first."""
+        with self._lock:
+            return self._pending_samples_locked()[0]
+
+    def _pending_samples_locked(self):
+        pending = min(self._total - self._flushed_total, self._size)
+        samples = []
+        for offset in range(pending, 0, -1):
+            slot = (self._next - offset) % self.capacity
+            ssid, bssid = self._keys[self._bssid_ids[slot]]
+            samples.append((self._timestamps[slot], ssid, bssid, self._signals[slot]))
+        return samples, self._total
+
+    def flush(self, save_samples) -> int:
+        """
+        Hand the pending samples to save_samples(samples), e.g. DBManager.save_signal_samples, which
+        returns (success, message). Returns the number of samples flushed.
+        """
+        with self._lock:
+            samples, total = self._pending_samples_locked()
+        if not samples:
+            return 0
+        success, message = save_samples(samples)
+        if not success:
+            print(f"Signal history flush failed: {message}")
+            return 0
+        with self._lock:
+            self._flushed_total = max(self._flushed_total, total)
+        return len(samples)
+
+    def start_periodic_flush(self, save_samples, interval=DEFAULT_FLUSH_INTERVAL):
+        """Flush every `interval` seconds on a daemon thread until stop_periodic_flush is called."""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        self._flush_stop.clear()
+
+        def run():
+            while not self._flush_stop.wait(interval):
+                try:
+                    self.flush(save_samples)
+                except Exception as e:
+                    print(f"Signal history flush failed: {e}")
+
+        self._flush_thread = threading.Thread(target=run, name="signal-history-flush", daemon=True)
+        self._flush_thread.start()
+
+    def stop_periodic_flush(self, save_samples=None):
+        """Stop the flush thread; flush one last time if save_samples is given."""
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(5.0)
+            self._flush_thread = None
+        if save_samples is not None:
+            self.flush(save_samples)
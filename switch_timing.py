@@ -0,0 +1,194 @@
+"""
+Profile-switch latency instrumentation.
+
+A SwitchTrace follows one profile switch from the tray click to the rebuilt menu. Its spans
+(monotonic perf_counter timings) are kept in memory while the switch runs, so recording them
+costs no I/O inside the spans being measured, and are written to the switch_spans table (created
+by DBManager.init_db; one row per span in microseconds) in one transaction when the switch span
+finishes. Spans that finish later on other threads (the menu rebuild, the router page) are
+written as they arrive, under the same switch. TimingStore.rollups gives p50/p95/p99 per
+profile and span.
+
+Code on the switch path marks spans with timed(name); it records into the trace active in the
+current context (see SwitchTrace.activate) and costs nothing when no switch is being traced.
+network_manager records every netsh/PowerShell command this way.
+"""
+import contextlib
+import contextvars
+import itertools
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+import deadlines
+
+SPAN_SWITCH = "switch" # the whole apply, from the click to the result notification
+SPAN_LOAD_CONFIGS = "load_configs"
+SPAN_APPLY = "apply_network_config"
+SPAN_COMMAND_PREFIX = "command: "
+SPAN_CONNECTIVITY = "connectivity_check"
+SPAN_MENU_REBUILD = "menu_rebuild"
+SPAN_OPEN_ROUTER = "open_router_page"
+
+MAX_SWITCHES_PER_PROFILE = 200 # older switches are pruned from the timing table
+PERCENTILES = (50, 95, 99)
+
+_current_trace = contextvars.ContextVar("current_switch_trace", default=None)
+_switch_ids = itertools.count()
+
+
+class Span(NamedTuple):
+    name: str
+    duration: float # seconds
+
+
+class SpanStats(NamedTuple):
+    count: int
+    p50: float # milliseconds
+    p95: float
+    p99: float
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100)) # ceil
+    return sorted_values[int(rank) - 1]
+
+
+class TimingStore:
+    """switch_spans table (see DBManager.init_db): one row per span, durations in microseconds."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+
+    def save_spans(self, switch_id, profile, spans):
+        """Write the Spans of one switch in one transaction, pruning old switches if the switch span is among them."""
+        with self._lock:
+            conn = sqlite3.connect(self.db_file)
+            try:
+                conn.executemany(
+                    "INSERT INTO switch_spans (switch_id, profile, span, duration_us) VALUES (?, ?, ?, ?)",
+                    [(switch_id, profile, span.name, round(span.duration * 1_000_000)) for span in spans],
+                )
+                if any(span.name == SPAN_SWITCH for span in spans):
+                    conn.execute(
+                        """
+                        DELETE FROM switch_spans WHERE profile = ? AND switch_id NOT IN (
+                            SELECT switch_id FROM switch_spans WHERE profile = ? AND span = ?
+                            ORDER BY switch_id DESC LIMIT ?
+                        )
+                    """,
+                        (profile, profile, SPAN_SWITCH, MAX_SWITCHES_PER_PROFILE),
+                    )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Database error saving switch timing: {e}")
+            finally:
+                conn.close()
+
+    def rollups(self, profile=None) -> dict[str, dict[str, SpanStats]]:
+        """Profile -> span -> SpanStats (milliseconds) over the stored switches."""
+        query = "SELECT profile, span, duration_us FROM switch_spans"
+        params = ()
+        if profile is not None:
+            query += " WHERE profile = ?"
+            params = (profile,)
+        conn = sqlite3.connect(self.db_file)
+        try:
+            rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error reading switch timings: {e}")
+            return {}
+        finally:
+            conn.close()
+        durations = {}
+        for profile_name, span, duration_us in rows:
+            durations.setdefault(profile_name, {}).setdefault(span, []).append(duration_us / 1000.0)
+        rollups = {}
+        for profile_name, spans in durations.items():
+            rollups[profile_name] = {}
+            for span, values in spans.items():
+                values.sort()
+                rollups[profile_name][span] = SpanStats(len(values), *(percentile(values, p) for p in PERCENTILES))
+        return rollups
+
+
+class SwitchTrace:
+    """Span timings of one profile switch, saved to the store when the switch span finishes (later spans as they finish)."""
+
+    def __init__(self, profile, store=None, clock=time.perf_counter):
+        self.profile = profile
+        self.store = store
+        self.switch_id = time.time_ns() // 1000 + next(_switch_ids) # unique and increasing
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.spans = []
+        self._unsaved = []
+        self._switch_finished = False
+
+    def add(self, name, duration):
+        span = Span(name, duration)
+        with self._lock:
+            self.spans.append(span)
+            self._unsaved.append(span)
+            self._switch_finished = self._switch_finished or name == SPAN_SWITCH
+            finished = self._switch_finished
+        if finished:
+            self.flush()
+
+    def flush(self):
+        """Write the spans not saved yet to the store."""
+        with self._lock:
+            spans, self._unsaved = self._unsaved, []
+        if spans and self.store is not None:
+            self.store.save_spans(self.switch_id, self.profile, spans)
+
+    @contextlib.contextmanager
+    def span(self, name):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.add(name, self._clock() - started)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this the trace timed() records into for the block (in this context)."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def total(self) -> float | None:
+        with self._lock:
+            return next((span.duration for span in self.spans if span.name == SPAN_SWITCH), None)
+
+    def breakdown(self) -> list[str]:
+        """'name: N ms' lines, the whole switch first, then the other spans in the order they finished."""
+        with self._lock:
+            spans = list(self.spans)
+        spans.sort(key=lambda span: span.name != SPAN_SWITCH)
+        return [f"{span.name}: {span.duration * 1000:.0f} ms" for span in spans]
+
+
+def current_trace() -> SwitchTrace | None:
+    return _current_trace.get()
+
+
+def timed(name):
+    """Record the block as a span of the active switch trace, if there is one."""
+    trace = _current_trace.get()
+    return trace.span(name) if trace is not None else contextlib.nullcontext()
+
+
+def timed_command(command):
+    """timed() for one netsh/PowerShell command, named by its deadlines.command_label."""
+    trace = _current_trace.get()
+    if trace is None:
+        return contextlib.nullcontext()
+    return trace.span(SPAN_COMMAND_PREFIX + deadlines.command_label(command))
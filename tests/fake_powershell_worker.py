@@ -0,0 +1,64 @@
+"""
+Stand-in for the PowerShell worker loop, speaking the same framed protocol.
+Used by the tests to exercise powershell_worker.PowerShellWorker on Linux.
+
+Supported "ps" scripts:
+    echo <text>   -> returns <text> on stdout
+    fail <text>   -> returns <text> on stderr with exit code 1
+    sleep <secs>  -> sleeps before answering
+    noise         -> writes an unframed line before answering
+    crash         -> exits without answering
+"exec" requests (file and arguments) are run through the local shell.
+With --startup-delay SECS the worker waits that long before reading its first request.
+"""
+import json
+import subprocess
+import sys
+import time
+
+PREFIX = "@@NCS@@ "
+
+
+def handle(request):
+    response = {"id": request.get("id"), "ok": True, "stdout": "", "stderr": "", "exit_code": 0}
+    op = request.get("op")
+    if op == "ping":
+        response["pong"] = True
+    elif op == "ps":
+        verb, _, argument = request.get("script", "").partition(" ")
+        if verb == "echo":
+            response["stdout"] = argument
+        elif verb == "fail":
+            response["stderr"] = argument
+            response["exit_code"] = 1
+        elif verb == "sleep":
+            time.sleep(float(argument))
+        elif verb == "noise":
+            sys.stdout.write("WARNING: unframed output\n")
+        elif verb == "crash":
+            sys.exit(3)
+    elif op == "exec":
+        command_line = f"{request.get('file', '')} {request.get('arguments', '')}".strip()
+        result = subprocess.run(command_line, shell=True, capture_output=True, text=True)
+        response.update(stdout=result.stdout, stderr=result.stderr, exit_code=result.returncode)
+    else:
+        response.update(ok=False, stderr=f"Unknown op: {op}", exit_code=1)
+    return response
+
+
+def main():
+    if sys.argv[1:2] == ["--startup-delay"]:
+        time.sleep(float(sys.argv[2]))
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        sys.stdout.write(PREFIX + json.dumps(handle(request)) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
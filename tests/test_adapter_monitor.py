@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import adapter_monitor
+from adapter_monitor import AdapterEvent, AdapterMonitor, PollingChangeSource, diff_snapshots, diff_ssids
+from netsh_parser import WlanInterfaceState
+
+
+def make_entry(name, status="Up", ip_address="192.168.1.100", media_type="wired"):
+    return {
+        "name": name, "status": status, "dhcp_enabled": False, "ip_address": ip_address,
+        "subnet_mask": "255.255.255.0", "gateway": "192.168.1.1", "dns_servers": ["8.8.8.8"],
+        "media_type": media_type,
+    }
+
+
+class TestSnapshotDiff(unittest.TestCase):
+    """Tests for turning consecutive snapshots into typed events."""
+
+    def test_diff_snapshots(self):
+        old = [make_entry("Ethernet"), make_entry("Wi-Fi", media_type="wireless"), make_entry("VPN")]
+        new = [
+            make_entry("Ethernet", ip_address="192.168.1.101"),
+            make_entry("Wi-Fi", status="Disconnected", media_type="wireless"),
+            make_entry("Ethernet 2"),
+        ]
+        events = diff_snapshots(old, new)
+        self.assertEqual(
+            [(event.kind, event.adapter_name) for event in events],
+            [
+                (adapter_monitor.ADDRESS_CHANGED, "Ethernet"),
+                (adapter_monitor.LINK_DOWN, "Wi-Fi"),
+                (adapter_monitor.ADAPTER_ADDED, "Ethernet 2"),
+                (adapter_monitor.ADAPTER_REMOVED, "VPN"),
+            ],
+        )
+        self.assertEqual((events[0].old["ip_address"], events[0].new["ip_address"]), ("192.168.1.100", "192.168.1.101"))
+        self.assertEqual(diff_snapshots(new, new), [])
+
+    def test_diff_ssids(self):
+        events = diff_ssids({"Wi-Fi": "HomeNet", "Wi-Fi 2": ""}, {"Wi-Fi": "Office", "Wi-Fi 2": ""})
+        self.assertEqual(events, [AdapterEvent(adapter_monitor.SSID_CHANGED, "Wi-Fi", "HomeNet", "Office")])
+
+
+class TestAdapterMonitor(unittest.TestCase):
+    """Tests for the monitor with fake snapshot and Wi-Fi sources."""
+
+    def setUp(self):
+        self.snapshot = [make_entry("Ethernet"), make_entry("Wi-Fi", media_type="wireless")]
+        self.ssid = "HomeNet"
+        self.snapshots_taken = 0
+
+        def fake_snapshot():
+            self.snapshots_taken += 1
+            return [dict(entry) for entry in self.snapshot], None
+
+        def fake_wlan():
+            return [WlanInterfaceState("Wi-Fi", "connected" if self.ssid else "disconnected", self.ssid, "", 80)], None
+
+        self.monitor = AdapterMonitor(
+            PollingChangeSource(), poll_interval=60.0, settle_delay=0.0, snapshot_func=fake_snapshot, wlan_func=fake_wlan
+        )
+        self.addCleanup(self.monitor.stop)
+
+    def test_first_check_records_state_only(self):
+        seen = []
+        self.monitor.add_listener(seen.append)
+        self.assertEqual(self.monitor.check_now(), [])
+        self.assertEqual(seen, [])
+        self.assertEqual(self.monitor.connected_ssids(), {"Wi-Fi": "HomeNet"})
+
+    def test_listeners_filter_by_kind(self):
+        all_events, ssid_events = [], []
+        self.monitor.add_listener(all_events.extend)
+        self.monitor.add_listener(ssid_events.extend, kinds=[adapter_monitor.SSID_CHANGED])
+        self.monitor.check_now()
+        self.snapshot[0]["status"] = "Disconnected"
+        self.monitor.check_now()
+        self.ssid = ""
+        self.monitor.check_now()
+        self.assertEqual([event.kind for event in all_events], [adapter_monitor.LINK_DOWN, adapter_monitor.SSID_CHANGED])
+        self.assertEqual(ssid_events, [AdapterEvent(adapter_monitor.SSID_CHANGED, "Wi-Fi", "HomeNet", "")])
+
+    def test_notify_change_wakes_the_monitor(self):
+        changed = threading.Event()
+        self.monitor.add_listener(lambda events: changed.set())
+        self.monitor.start()
+        while self.monitor.check_count == 0:
+            time.sleep(0.01)
+        self.snapshot.append(make_entry("Ethernet 2"))
+        self.monitor.notify_change()
+        self.assertTrue(changed.wait(5))
+        self.assertEqual(self.snapshots_taken, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
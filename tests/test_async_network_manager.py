@@ -0,0 +1,165 @@
+import unittest
+import asyncio
+import gc
+import weakref
+import subprocess
+import sys
+import os
+import threading
+import time
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import async_network_manager as async_nm
+import deadlines
+import network_manager
+from command_runner import ReplayRunner
+
+
+def python_command(code):
+    return [sys.executable, "-c", code]
+
+
+class SlowRunner:
+    """Records command lines; each command takes `delay` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.commands = []
+
+    def run_command(self, command_line, timeout=None):
+        self.commands.append(command_line)
+        time.sleep(self.delay)
+        return subprocess.CompletedProcess(command_line, 0, stdout="", stderr="")
+
+    def run_powershell(self, script, timeout=None):
+        return self.run_command(script, timeout)
+
+
+class TestAsyncRunCommand(unittest.TestCase):
+    """Tests for the asyncio command execution layer."""
+
+    def test_output_and_exit_code(self):
+        result = asyncio.run(async_nm.run_command(python_command("print('hello')")))
+        self.assertEqual(result.stdout.strip(), "hello")
+        with self.assertRaises(subprocess.CalledProcessError):
+            asyncio.run(async_nm.run_command(python_command("import sys; sys.exit(2)")))
+
+    def test_timeout_raises_timeout_expired(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            asyncio.run(async_nm.run_command(python_command("import time; time.sleep(10)"), timeout=0.3))
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than MAX_CONCURRENT_COMMANDS commands run at once."""
+        original_limit = async_nm.MAX_CONCURRENT_COMMANDS
+        async_nm.MAX_CONCURRENT_COMMANDS = 2
+        self.addCleanup(setattr, async_nm, "MAX_CONCURRENT_COMMANDS", original_limit)
+
+        async def run_four():
+            return await asyncio.gather(
+                *(async_nm.run_command(python_command("import time; time.sleep(0.3)")) for _ in range(4))
+            )
+
+        started = time.monotonic()
+        asyncio.run(run_four())
+        self.assertGreaterEqual(time.monotonic() - started, 0.55)
+
+    def test_cancellation_stops_waiting(self):
+        async def cancel_soon():
+            task = asyncio.create_task(async_nm.run_command(python_command("import time; time.sleep(1)")))
+            await asyncio.sleep(0.2)
+            started = time.monotonic()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return time.monotonic() - started
+
+        self.assertLess(asyncio.run(cancel_soon()), 0.5)
+
+    def test_calls_go_through_command_runner(self):
+        """Test that async calls reach network_manager's runner, so they are recorded and replayed."""
+        runner = ReplayRunner([
+            {"kind": "command", "command": "netsh wlan show networks mode=bssid", "returncode": 0, "stdout": "", "stderr": ""},
+            {"kind": "powershell", "command": "Get-NetAdapter", "returncode": 0, "stdout": "[]", "stderr": ""},
+        ])
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        network_manager.set_command_runner(runner)
+        asyncio.run(async_nm.run_command(["netsh", "wlan", "show", "networks", "mode=bssid"]))
+        self.assertEqual(asyncio.run(async_nm.run_powershell("Get-NetAdapter")).stdout, "[]")
+        self.assertEqual(runner.calls, [
+            ("command", "netsh wlan show networks mode=bssid"), ("powershell", "Get-NetAdapter"),
+        ])
+
+    def test_semaphores_do_not_keep_loops_alive(self):
+        async def use_semaphore():
+            return async_nm._get_semaphore()
+
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(use_semaphore())
+        loop.close()
+        loop_ref = weakref.ref(loop)
+        del loop
+        gc.collect()
+        self.assertIsNone(loop_ref())
+
+    def test_sync_shim(self):
+        result = async_nm.run_sync(async_nm.run_command(python_command("print('shim')")), timeout=10)
+        self.assertEqual(result.stdout.strip(), "shim")
+
+    def test_submit_reports_exceptions(self):
+        async def broken():
+            raise ValueError("snapshot unavailable")
+
+        results, errors, done = [], [], threading.Event()
+        future = async_nm.submit(broken(), callback=results.append, on_error=lambda error: (errors.append(error), done.set()))
+        self.assertTrue(done.wait(5))
+        self.assertIsInstance(future.exception(), ValueError)
+        self.assertEqual(results, [])
+        self.assertEqual([str(error) for error in errors], ["snapshot unavailable"])
+
+    def test_operations_issue_the_sync_commands(self):
+        """Test that async operations run the same command lines as the sync ones, so fixtures match."""
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        sync_runner, async_runner = SlowRunner(), SlowRunner()
+        network_manager.set_command_runner(sync_runner)
+        network_manager.set_adapter_to_dhcp("Wi-Fi 2")
+        network_manager.set_command_runner(async_runner)
+        success, _ = asyncio.run(async_nm.set_adapter_to_dhcp("Wi-Fi 2"))
+        self.assertTrue(success)
+        self.assertEqual(async_runner.commands, sync_runner.commands)
+        self.assertIn('name="Wi-Fi 2"', async_runner.commands[0])
+
+    def test_cancelled_operation_stops_before_its_next_command(self):
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        self.addCleanup(deadlines.timeout_counter.reset)
+        deadlines.timeout_counter.reset()
+        runner = SlowRunner(delay=0.3)
+        network_manager.set_command_runner(runner)
+
+        async def cancel_soon():
+            task = asyncio.create_task(async_nm.set_adapter_to_dhcp("Ethernet"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_soon())
+        time.sleep(0.4) # the first command finishes; the second one must not start
+        self.assertEqual(len(runner.commands), 1)
+        self.assertEqual(deadlines.timeout_stats(), {}) # a cancellation is not a timeout
+
+    def test_invalid_config_is_rejected_before_running(self):
+        config = {
+            "ip_address": "300.1.1.1", "subnet_mask": "255.255.255.0", "gateway": "",
+            "dns_primary": "", "dns_secondary": "", "router_ip": "",
+        }
+        success, message = asyncio.run(async_nm.apply_network_config("Ethernet", config))
+        self.assertFalse(success)
+        self.assertIn("Invalid ip_address", message)
+
+
+if __name__ == "__main__":
+    unittest.main()
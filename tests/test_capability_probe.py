@@ -0,0 +1,79 @@
+import unittest
+import json
+import sys
+import os
+import tempfile
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import capability_probe
+import network_manager
+
+
+class TestCapabilityProbe(unittest.TestCase):
+    """Tests for the persisted hardware capability record."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "capabilities.json")
+        self.index = {
+            "Ethernet": network_manager.InterfaceInfo("Ethernet", "wired", "Up", "Connected"),
+            "Wi-Fi": network_manager.InterfaceInfo("Wi-Fi", "wireless", "Up", "Connected"),
+        }
+        self.probe_calls = 0
+
+        def fake_get_interface_index(use_cache=True):
+            self.probe_calls += 1
+            return dict(self.index), None
+
+        for name, fake in [
+            ("get_interface_index", fake_get_interface_index),
+            ("get_wifi_profile_names", lambda: (["HomeNet", "Office"], None)),
+        ]:
+            self.addCleanup(setattr, network_manager, name, getattr(network_manager, name))
+            setattr(network_manager, name, fake)
+
+    def test_probe_record(self):
+        record = capability_probe.probe_capabilities()
+        self.assertEqual(record["wifi_adapters"], ["Wi-Fi"])
+        self.assertEqual(record["interface_types"], {"Ethernet": "wired", "Wi-Fi": "wireless"})
+        self.assertEqual(record["profile_count"], 2)
+        self.assertTrue(record["has_wifi_support"])
+
+    def test_startup_reads_without_probing(self):
+        self.assertFalse(capability_probe.cached_wifi_support(self.path))
+        capability_probe.refresh_capabilities(self.path)
+        self.probe_calls = 0
+        self.assertTrue(capability_probe.cached_wifi_support(self.path))
+        self.assertEqual(self.probe_calls, 0)
+
+    def test_other_hardware_is_ignored(self):
+        record = capability_probe.probe_capabilities()
+        record["fingerprint"] = "someone-else"
+        capability_probe.save_capabilities(record, self.path)
+        self.assertIsNone(capability_probe.load_capabilities(self.path))
+
+    def test_corrupt_file_is_ignored(self):
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(capability_probe.load_capabilities(self.path))
+
+    def test_on_change_only_when_result_differs(self):
+        changes = []
+        capability_probe.refresh_capabilities_in_background(self.path, on_change=changes.append).join(10)
+        capability_probe.refresh_capabilities_in_background(self.path, on_change=changes.append).join(10)
+        self.assertEqual(len(changes), 1)
+
+        del self.index["Wi-Fi"]
+        capability_probe.refresh_capabilities(self.path, on_change=changes.append)
+        self.assertEqual(len(changes), 2)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["wifi_adapters"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
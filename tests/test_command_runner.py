@@ -0,0 +1,165 @@
+import unittest
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import os
+import tempfile
+
+import pytest
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import async_network_manager as async_nm
+import command_runner
+import connectivity
+import network_manager
+import router_prober
+from command_runner import CommandNotRecordedError, RecordingRunner, ReplayRunner
+
+TRAY_MENU_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "commands", "tray_menu.json")
+
+
+class FakeRunner:
+    """Inner backend answering from a dict of command -> (exit code, stdout)."""
+
+    def __init__(self, answers):
+        self.answers = answers
+
+    def run_command(self, command_line, timeout=None):
+        if command_line == "hang":
+            raise subprocess.TimeoutExpired(command_line, timeout)
+        returncode, stdout = self.answers[command_line]
+        return subprocess.CompletedProcess(command_line, returncode, stdout=stdout, stderr="")
+
+    def run_powershell(self, script, timeout=None):
+        return self.run_command(script, timeout)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.25
+        return self.now
+
+
+class TestRecordAndReplay(unittest.TestCase):
+    """Tests for the recording and replay command runners."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "recording.json")
+
+    def test_recording_round_trips_through_replay(self):
+        recorder = RecordingRunner(FakeRunner({"netsh one": (0, "first"), "Get-NetAdapter": (1, "")}), self.path, clock=FakeClock())
+        recorder.run_command("netsh one")
+        recorder.run_powershell("Get-NetAdapter")
+        with self.assertRaises(subprocess.TimeoutExpired):
+            recorder.run_command("hang", timeout=2)
+        recorder.save()
+
+        self.assertEqual([r["latency"] for r in recorder.records], [0.25, 0.25, 0.25])
+        replay = ReplayRunner(self.path)
+        self.assertEqual(replay.run_command("netsh one").stdout, "first")
+        self.assertEqual(replay.run_powershell("Get-NetAdapter").returncode, 1)
+        with self.assertRaises(subprocess.TimeoutExpired):
+            replay.run_command("hang", timeout=2)
+        with pytest.raises(CommandNotRecordedError):
+            replay.run_powershell("netsh one") # recorded as a command, not a script
+
+    def test_repeated_commands_replay_in_order(self):
+        records = [
+            {"kind": "command", "command": "scan", "returncode": 0, "stdout": out, "stderr": "", "latency": 0.5}
+            for out in ("a", "b")
+        ]
+        sleeps = []
+        replay = ReplayRunner(records, latency_scale=2.0, sleep=sleeps.append)
+        self.assertEqual([replay.run_command("scan").stdout for _ in range(3)], ["a", "b", "b"])
+        self.assertEqual(sleeps, [1.0, 1.0, 1.0])
+
+
+class TestNetworkManagerReplay(unittest.TestCase):
+    """Tests that network_manager runs offline against a recorded fixture."""
+
+    def setUp(self):
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        self.replay = ReplayRunner(TRAY_MENU_FIXTURE)
+        network_manager.set_command_runner(self.replay)
+        network_manager.invalidate_adapter_state()
+        self.addCleanup(network_manager.invalidate_adapter_state)
+
+    def test_menu_data_from_fixture(self):
+        statuses, error = network_manager.get_adapter_statuses({"networks": {}})
+        self.assertIsNone(error)
+        self.assertEqual(statuses, {"Ethernet": "Static: (Custom/Unsaved)", "Wi-Fi": "DHCP"})
+        networks, error = network_manager.get_available_networks()
+        self.assertIsNone(error)
+        self.assertTrue(networks)
+        self.assertTrue(network_manager.has_wifi_support())
+        self.assertEqual(self.replay.calls.count((command_runner.KIND_POWERSHELL, network_manager.ADAPTER_SNAPSHOT_PS_COMMAND)), 1)
+
+    def test_recorded_failure_raises(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            network_manager._run_command('netsh interface show interface name="Bluetooth Network Connection"')
+
+
+class TestProbeRecording(unittest.TestCase):
+    """Tests that async commands and network probes are recorded and replayed like sync commands."""
+
+    def setUp(self):
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        network_manager.invalidate_adapter_state()
+        self.addCleanup(network_manager.invalidate_adapter_state)
+
+    def test_connectivity_probes_replayed_without_network(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        port = listener.getsockname()[1]
+        recorder = RecordingRunner(FakeRunner({}))
+        network_manager.set_command_runner(recorder)
+        recorded = connectivity.verify_connectivity("127.0.0.1", [], window=1.0, gateway_port=port)
+        listener.close()
+        self.assertTrue(recorded.ok)
+        self.assertEqual([(r["kind"], r["command"]) for r in recorder.records], [("probe", f"tcp 127.0.0.1:{port}")])
+
+        network_manager.set_command_runner(ReplayRunner(recorder.records))
+        replayed = connectivity.verify_connectivity("127.0.0.1", [], window=1.0, gateway_port=port)
+        self.assertTrue(replayed.ok) # the listener is gone: the answer came from the recording
+        with pytest.raises(CommandNotRecordedError):
+            connectivity.verify_connectivity("127.0.0.2", [], window=1.0, gateway_port=port)
+
+    def test_async_commands_and_router_probes_recorded(self):
+        recorder = RecordingRunner(FakeRunner({"netsh wlan show interfaces": (0, "connected")}))
+        network_manager.set_command_runner(recorder)
+        result = asyncio.run(async_nm.run_command(["netsh", "wlan", "show", "interfaces"]))
+        self.assertEqual(result.stdout, "connected")
+        port = socket.socket()
+        port.bind(("127.0.0.1", 0))
+        target = router_prober.RouterTarget("127.0.0.1", port.getsockname()[1], "http")
+        port.close()
+        status = asyncio.run(router_prober.probe_router(target))
+        self.assertEqual(status.status, router_prober.STATUS_REFUSED)
+        self.assertEqual([r["kind"] for r in recorder.records], ["command", "probe"])
+
+        network_manager.set_command_runner(ReplayRunner(json.loads(json.dumps(recorder.records))))
+        self.assertEqual(asyncio.run(router_prober.probe_router(target)).status, router_prober.STATUS_REFUSED)
+
+    def test_unrecorded_command_is_not_turned_into_an_error_message(self):
+        self.assertTrue(issubclass(CommandNotRecordedError, Exception)) # worker threads and UI handlers can catch it
+        network_manager.set_command_runner(ReplayRunner([]))
+        with pytest.raises(CommandNotRecordedError):
+            network_manager.get_adapter_snapshot(use_cache=False)
+        with pytest.raises(CommandNotRecordedError):
+            asyncio.run(async_nm.get_adapter_snapshot(use_cache=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import socket
+import struct
+import sys
+import os
+import threading
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import connectivity
+import network_manager
+
+
+class StandInDNSServer:
+    """UDP listener on 127.0.0.1 that answers every query after ignoring the first `ignore` ones."""
+
+    def __init__(self, ignore=0, answer=True):
+        self.ignore = ignore
+        self.answer = answer
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(512)
+            except OSError:
+                return
+            self.queries.append(data)
+            if self.answer and len(self.queries) > self.ignore:
+                query_id = struct.unpack("!H", data[:2])[0]
+                self.sock.sendto(struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 0, 0) + data[12:], address) # NXDOMAIN
+
+    def close(self):
+        self.sock.close()
+
+
+class TestConnectivityVerifier(unittest.TestCase):
+    """Tests for the post-switch connectivity probes against local stand-in listeners."""
+
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.addCleanup(self.listener.close)
+        self.tcp_port = self.listener.getsockname()[1]
+
+    def dns_server(self, **kwargs):
+        server = StandInDNSServer(**kwargs)
+        self.addCleanup(server.close)
+        return server
+
+    def test_gateway_and_dns_reachable(self):
+        dns = self.dns_server()
+        report = connectivity.verify_connectivity(
+            "127.0.0.1", ["127.0.0.1", "", "127.0.0.1"], targets=[f"127.0.0.1:{self.tcp_port}"],
+            window=2.0, gateway_port=self.tcp_port, dns_port=dns.port,
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual([(r.target.kind, r.target.role) for r in report.results], [
+            ("tcp", "gateway"), ("dns", "dns"), ("tcp", "target"),
+        ])
+        self.assertTrue(all(r.success for r in report.results))
+        self.assertLess(report.time_to_first_packet, 2.0)
+        self.assertIn("first packet after", connectivity.describe_report(report))
+        self.assertIn("DNS after", connectivity.describe_report(report))
+
+    def test_refused_connection_counts_as_reachable(self):
+        port = self.tcp_port
+        self.listener.close()
+        self.assertIsNone(connectivity.tcp_probe("127.0.0.1", port, 1.0))
+
+    def test_dns_retried_until_answered(self):
+        dns = self.dns_server(ignore=1)
+        report = connectivity.verify_connectivity(
+            "", ["127.0.0.1"], window=3.0, attempt_timeout=0.2, retry_interval=0.05, dns_port=dns.port,
+        )
+        self.assertEqual(report.results[0].attempts, 2)
+        self.assertGreaterEqual(report.time_to_dns, 0.2)
+        self.assertTrue(report.ok)
+
+    def test_silent_dns_reported(self):
+        dns = self.dns_server(answer=False)
+        report = connectivity.verify_connectivity(
+            "127.0.0.1", ["127.0.0.1"], window=0.5, attempt_timeout=0.1, retry_interval=0.05,
+            gateway_port=self.tcp_port, dns_port=dns.port,
+        )
+        self.assertFalse(report.ok)
+        self.assertIsNone(report.time_to_dns)
+        self.assertGreater(len(dns.queries), 1)
+        self.assertIn("no DNS answer", connectivity.describe_report(report))
+
+    def test_live_values_fill_missing_profile_fields(self):
+        dns = self.dns_server()
+        live = {"gateway": "127.0.0.1", "dns_servers": "127.0.0.1"}
+        self.addCleanup(setattr, network_manager, "get_current_adapter_config", network_manager.get_current_adapter_config)
+        network_manager.get_current_adapter_config = lambda adapter_name: (live, None)
+        report = connectivity.verify_adapter_connectivity(
+            "Ethernet", {"gateway": "", "dns_primary": "", "dns_secondary": ""},
+            window=2.0, gateway_port=self.tcp_port, dns_port=dns.port,
+        )
+        self.assertEqual([r.target.host for r in report.results], ["127.0.0.1", "127.0.0.1"])
+        self.assertTrue(report.ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
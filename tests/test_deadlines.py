@@ -0,0 +1,113 @@
+import unittest
+import subprocess
+import sys
+import os
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import deadlines
+import network_manager
+from command_runner import ReplayRunner, load_fixture
+
+TRAY_MENU_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "commands", "tray_menu.json")
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestDeadlines(unittest.TestCase):
+    """Tests for deadline budgets and command timeouts."""
+
+    def setUp(self):
+        deadlines.timeout_counter.reset()
+        self.addCleanup(deadlines.timeout_counter.reset)
+        self.clock = ManualClock()
+
+    def test_timeouts_capped_by_budget(self):
+        self.assertEqual(deadlines.command_timeout(), deadlines.DEFAULT_COMMAND_TIMEOUT)
+        self.assertEqual(deadlines.command_timeout(5), 5)
+        with deadlines.budget(2.0, "outer", clock=self.clock) as outer:
+            self.clock.sleep(0.5)
+            self.assertEqual(deadlines.command_timeout(5), 1.5)
+            self.assertEqual(deadlines.command_timeout(1), 1)
+            with deadlines.budget(10.0, "inner", clock=self.clock) as inner:
+                self.assertIs(deadlines.current_deadline(), inner)
+                self.assertEqual(inner.remaining(), 1.5)
+            self.assertIs(deadlines.current_deadline(), outer)
+        self.assertIsNone(deadlines.current_deadline())
+
+    def test_command_labels(self):
+        self.assertEqual(deadlines.command_label('netsh wlan connect name="Home" interface="Wi-Fi"'), "netsh wlan connect")
+        self.assertEqual(deadlines.command_label('netsh -f "C:\\Temp\\script.txt"'), "netsh -f")
+        self.assertEqual(deadlines.command_label(["netsh", "wlan", "show", "networks"]), "netsh wlan show")
+        self.assertEqual(deadlines.command_label("$ErrorActionPreference = 'Stop'; Get-NetAdapter | Select Name"), "Get-NetAdapter")
+
+
+class TestPartialResults(unittest.TestCase):
+    """Tests that calls finishing within a budget keep their results when later calls time out."""
+
+    def setUp(self):
+        deadlines.timeout_counter.reset()
+        self.addCleanup(deadlines.timeout_counter.reset)
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        network_manager.invalidate_adapter_state()
+        self.addCleanup(network_manager.invalidate_adapter_state)
+        self.clock = ManualClock()
+        self.records = load_fixture(TRAY_MENU_FIXTURE)
+
+    def use_records(self):
+        self.replay = ReplayRunner(self.records, latency_scale=1.0, sleep=self.clock.sleep)
+        network_manager.set_command_runner(self.replay)
+
+    def test_hung_command_does_not_lose_other_results(self):
+        for record in self.records:
+            if record["command"] == "netsh wlan show networks mode=bssid":
+                record["timed_out"] = True
+        self.use_records()
+        with deadlines.budget(1.5, "menu refresh", clock=self.clock) as deadline:
+            snapshot, snapshot_error = network_manager.get_adapter_snapshot()
+            bssids, scan_error = network_manager.get_available_bssids()
+        self.assertIsNone(snapshot_error)
+        self.assertEqual([entry["name"] for entry in snapshot], ["Ethernet", "Wi-Fi", "Ethernet 2"])
+        self.assertEqual(bssids, [])
+        self.assertTrue(scan_error)
+        self.assertEqual(deadline.timed_out, ["netsh wlan show"])
+        self.assertEqual(deadlines.timeout_stats(), {"netsh wlan show": 1})
+
+    def test_spent_budget_skips_remaining_commands(self):
+        self.use_records()
+        with deadlines.budget(0.5, "menu refresh", clock=self.clock) as deadline:
+            snapshot, _ = network_manager.get_adapter_snapshot() # recorded latency 0.412s
+            self.clock.sleep(0.2)
+            with self.assertRaises(subprocess.TimeoutExpired):
+                network_manager._run_command("netsh wlan show profiles")
+        self.assertTrue(snapshot)
+        self.assertEqual(len(self.replay.calls), 1)
+        self.assertEqual(deadline.timed_out, ["netsh wlan show"])
+
+    def test_timed_out_snapshot_reports_short_message(self):
+        for record in self.records:
+            if record["kind"] == "powershell":
+                record["timed_out"] = True
+        self.use_records()
+        with deadlines.budget(1.5, "menu refresh", clock=self.clock):
+            snapshot, snapshot_error = network_manager.get_adapter_snapshot()
+        self.assertIsNone(snapshot)
+        self.assertIn("timed out", snapshot_error)
+        self.assertNotIn("unexpected", snapshot_error)
+        self.assertLess(len(snapshot_error), 80) # not the whole script
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import linux_netlink
+import network_manager
+from linux_netlink import AddressInfo, LinkInfo, RouteInfo
+
+
+def rtattr(attr_type, value):
+    length = 4 + len(value)
+    return struct.pack("=HH", length, attr_type) + value + b"\0" * ((4 - length % 4) % 4)
+
+
+def nlmsg(msg_type, payload):
+    return struct.pack("=IHHII", 16 + len(payload), msg_type, 0, 1, 0) + payload
+
+
+class TestNetlinkParsing(unittest.TestCase):
+    """Tests for decoding rtnetlink messages."""
+
+    def test_link_address_and_route_messages(self):
+        link = struct.pack("=BxHiII", socket.AF_UNSPEC, 1, 2, 0x1 | 0x10000, 0) + rtattr(
+            linux_netlink.IFLA_IFNAME, b"eth0\0") + rtattr(linux_netlink.IFLA_OPERSTATE, bytes([6]))
+        address = struct.pack("=BBBBI", socket.AF_INET, 24, 0, 0, 2) + rtattr(
+            linux_netlink.IFA_LOCAL, socket.inet_aton("10.0.0.5")) + rtattr(linux_netlink.IFA_FLAGS, struct.pack("=I", 0x80))
+        route = struct.pack("=BBBBBBBBI", socket.AF_INET, 0, 0, 0, 254, 3, 0, 1, 0) + rtattr(
+            linux_netlink.RTA_GATEWAY, socket.inet_aton("10.0.0.1")) + rtattr(linux_netlink.RTA_OIF, struct.pack("=i", 2))
+        data = nlmsg(16, link) + nlmsg(20, address) + nlmsg(24, route) + nlmsg(linux_netlink.NLMSG_DONE, b"\0" * 4)
+
+        messages = list(linux_netlink.iter_messages(data))
+        self.assertEqual([msg_type for msg_type, _ in messages], [16, 20, 24, linux_netlink.NLMSG_DONE])
+        self.assertEqual(linux_netlink.parse_link(messages[0][1]), LinkInfo(2, "eth0", 0x10001, 6, 1))
+        self.assertEqual(linux_netlink.parse_address(messages[1][1]), AddressInfo(2, "10.0.0.5", 24, 0x80))
+        self.assertEqual(linux_netlink.parse_route(messages[2][1]), RouteInfo(2, "", 0, "10.0.0.1", 0))
+
+    def test_error_message_raises(self):
+        with self.assertRaises(OSError):
+            list(linux_netlink.iter_messages(nlmsg(linux_netlink.NLMSG_ERROR, struct.pack("=i", -1) + b"\0" * 16)))
+
+    def test_proc_net_route(self):
+        text = (
+            "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+            "eth0\t00000000\t010200C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n"
+            "eth0\t000200C0\t00000000\t0001\t0\t0\t0\t00FFFFFF\t0\t0\t0\n"
+            "tun9\t00000000\t01000A0A\t0003\t0\t0\t0\t00000000\t0\t0\t0\n"
+        )
+        self.assertEqual(linux_netlink.parse_proc_net_route(text, {"eth0": 2}), [
+            RouteInfo(2, "", 0, "192.0.2.1", 100),
+            RouteInfo(2, "192.0.2.0", 24, "", 0),
+        ])
+
+
+class TestLinuxSnapshot(unittest.TestCase):
+    """Tests that netlink records become the same snapshot entries and configs as on Windows."""
+
+    def setUp(self):
+        self.links = [
+            LinkInfo(1, "lo", 0x1 | 0x8 | 0x10000, linux_netlink.IF_OPER_UNKNOWN, linux_netlink.ARPHRD_LOOPBACK),
+            LinkInfo(2, "eth0", 0x1 | 0x10000, linux_netlink.IF_OPER_UP, 1),
+            LinkInfo(3, "wlan0", 0x1, linux_netlink.IF_OPER_DOWN, 1),
+            LinkInfo(4, "eth1", 0, linux_netlink.IF_OPER_DOWN, 1),
+        ]
+        self.addresses = [
+            AddressInfo(1, "127.0.0.1", 8, linux_netlink.IFA_F_PERMANENT),
+            AddressInfo(2, "10.0.0.99", 24, linux_netlink.IFA_F_SECONDARY),
+            AddressInfo(2, "10.0.0.5", 24, 0), # finite lifetime: a DHCP lease
+        ]
+        self.routes = [
+            RouteInfo(2, "", 0, "10.0.0.254", 600),
+            RouteInfo(2, "", 0, "10.0.0.1", 100),
+            RouteInfo(2, "10.0.0.0", 24, "", 0),
+        ]
+        self.snapshot = linux_netlink.build_snapshot(
+            self.links, self.addresses, self.routes, ["1.1.1.1", "8.8.8.8"], {"wlan0": network_manager.MEDIA_WIRELESS}
+        )
+
+    def test_snapshot_entries(self):
+        by_name = {entry["name"]: entry for entry in self.snapshot}
+        self.assertEqual([entry["status"] for entry in self.snapshot], ["Up", "Up", "Disconnected", "Disabled"])
+        self.assertEqual(by_name["lo"]["media_type"], network_manager.MEDIA_LOOPBACK)
+        self.assertEqual(by_name["lo"]["dns_servers"], [])
+        self.assertEqual(by_name["wlan0"]["media_type"], network_manager.MEDIA_WIRELESS)
+        self.assertEqual(by_name["eth1"]["admin_state"], "Down")
+        self.assertEqual(set(by_name["eth0"]), set(network_manager.parse_adapter_snapshot([{"Name": "x"}])[0]))
+
+    def test_same_shapes_as_network_manager(self):
+        config, error = linux_netlink.get_current_adapter_config("eth0", snapshot=self.snapshot)
+        self.assertIsNone(error)
+        self.assertEqual(config, {
+            "adapter_name": "eth0",
+            "ip_address": "10.0.0.5",
+            "subnet_mask": "255.255.255.0",
+            "gateway": "10.0.0.1",
+            "dns_primary": "1.1.1.1",
+            "dns": "8.8.8.8",
+            "dns_servers": "1.1.1.1, 8.8.8.8",
+            "dhcp_enabled": True,
+        })
+        self.assertEqual(linux_netlink.list_adapters(snapshot=self.snapshot), ([("lo", "lo"), ("eth0", "eth0")], None))
+        self.assertEqual(linux_netlink.list_adapters(snapshot=self.snapshot), network_manager.list_adapters(snapshot=self.snapshot))
+        config, error = linux_netlink.get_current_adapter_config("missing", snapshot=self.snapshot)
+        self.assertIsNone(config)
+        self.assertIn("not found", error)
+
+    def test_resolv_conf(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".conf", delete=False) as f:
+            f.write("# generated\nsearch example.com\nnameserver 10.0.0.53\nnameserver fe80::1\nnameserver 9.9.9.9\n")
+        self.addCleanup(os.unlink, f.name)
+        self.assertEqual(linux_netlink.read_dns_servers(f.name), ["10.0.0.53", "9.9.9.9"])
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and linux_netlink.netlink_available(), "needs Linux netlink")
+class TestLiveNetlink(unittest.TestCase):
+    """Reads this machine's adapters and checks that no process is spawned."""
+
+    def setUp(self):
+        def no_spawn(*args, **kwargs):
+            raise AssertionError("A process was spawned.")
+
+        self.addCleanup(setattr, subprocess, "Popen", subprocess.Popen)
+        subprocess.Popen = no_spawn
+
+    def test_reads_loopback_without_spawning(self):
+        snapshot, error = linux_netlink.get_adapter_snapshot()
+        self.assertIsNone(error)
+        loopback = [entry for entry in snapshot if entry["media_type"] == network_manager.MEDIA_LOOPBACK]
+        self.assertEqual(loopback[0]["ip_address"], "127.0.0.1")
+
+    def test_sysfs_fallback_agrees(self):
+        links, addresses, _ = linux_netlink.read_state_sysfs()
+        netlink_links, netlink_addresses, _ = linux_netlink.read_state_netlink()
+        self.assertEqual({link.name for link in links}, {link.name for link in netlink_links})
+        primary = {a.index: a.address for a in netlink_addresses if not a.flags & linux_netlink.IFA_F_SECONDARY}
+        self.assertEqual({a.index: a.address for a in addresses}, primary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,351 @@
+import unittest
+import shutil
+import subprocess
+import sys
+import os
+import re
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import netsh_parser
+import network_manager
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "netsh")
+EXPORT_DIR = os.path.join(FIXTURES_DIR, "export")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestIPConfigParser(unittest.TestCase):
+    """Tests for 'netsh interface ip show config' and 'show dnsservers' parsing."""
+
+    def test_multi_adapter_stream(self):
+        records = list(netsh_parser.iter_ip_configs(load_fixture("ip_show_config_multi.txt")))
+        self.assertEqual([r.adapter_name for r in records], ["Ethernet", "Wi-Fi", "Ethernet 2", "Loopback Pseudo-Interface 1"])
+        ethernet, wifi, disconnected, loopback = records
+        self.assertEqual(ethernet, netsh_parser.AdapterIPConfig(
+            "Ethernet", False, "192.168.1.100", "255.255.255.0", "192.168.1.1", ("8.8.8.8", "8.8.4.4")
+        ))
+        self.assertTrue(wifi.dhcp_enabled)
+        self.assertEqual(wifi.dns_servers, ("10.0.0.1",))
+        self.assertEqual((disconnected.ip_address, disconnected.dns_servers), ("", ()))
+        self.assertEqual((loopback.subnet_mask, loopback.gateway), ("255.0.0.0", ""))
+
+    def test_first_address_and_continued_gateway(self):
+        record = netsh_parser.parse_ip_config(load_fixture("ip_show_config_multi_ip.txt"))
+        self.assertEqual(record.ip_address, "192.168.1.100")
+        self.assertEqual(record.gateway, "192.168.1.1")
+        self.assertEqual(record.dns_servers, ("1.1.1.1",))
+
+    def test_select_adapter_and_crlf(self):
+        output = load_fixture("ip_show_config_multi.txt").replace("\n", "\r\n")
+        self.assertEqual(netsh_parser.parse_ip_config(output, "Wi-Fi").ip_address, "10.0.0.23")
+        self.assertIsNone(netsh_parser.parse_ip_config(output, "Missing"))
+
+    def test_dns_servers_output(self):
+        self.assertEqual(
+            network_manager.parse_dns_servers_output(load_fixture("dnsservers_static.txt")),
+            ["8.8.8.8", "8.8.4.4", "1.1.1.1"],
+        )
+        self.assertEqual(network_manager.parse_dns_servers_output(load_fixture("dnsservers_dhcp.txt")), ["10.0.0.1"])
+
+    def test_network_manager_config_fill(self):
+        config = network_manager._new_adapter_config("Wi-Fi")
+        network_manager.parse_ip_config_output(load_fixture("ip_show_config_multi.txt"), config)
+        self.assertEqual((config["ip_address"], config["subnet_mask"], config["gateway"]), ("10.0.0.23", "255.255.0.0", "10.0.0.1"))
+        self.assertTrue(config["dhcp_enabled"])
+
+
+class TestWifiParsers(unittest.TestCase):
+    """Tests for the netsh wlan parsers."""
+
+    def test_networks_multi_bssid_and_interfaces(self):
+        networks = list(netsh_parser.iter_wifi_networks(load_fixture("wlan_show_networks_multi_bssid.txt")))
+        self.assertEqual([(n.interface_name, n.ssid) for n in networks], [
+            ("Wi-Fi", "HomeNet"), ("Wi-Fi", "CoffeeShop"), ("Wi-Fi", ""), ("Wi-Fi 2", "Office: Guest"),
+        ])
+        home = networks[0]
+        self.assertEqual((home.auth_type, home.encryption, home.signal, home.bssid_count), ("WPA2PSK", "CCMP", "90%", 2))
+        self.assertEqual(home.best_bssid, "aa:bb:cc:dd:ee:02")
+        self.assertEqual(networks[1].auth_type, "open")
+        self.assertEqual(networks[2].auth_type, "WPA3SAE")
+
+    def test_bssid_records(self):
+        bssids = list(netsh_parser.iter_bssids(load_fixture("wlan_show_networks_multi_bssid.txt")))
+        self.assertEqual(len(bssids), 5)
+        first, second = bssids[:2]
+        self.assertEqual((first.bssid, first.signal, first.radio_type, first.band, first.channel),
+                         ("aa:bb:cc:dd:ee:01", 62, "802.11n", "2.4 GHz", 6))
+        self.assertEqual(first.basic_rates, (1.0, 2.0, 5.5, 11.0))
+        self.assertEqual((second.signal, second.band, second.channel, second.basic_rates), (90, "5 GHz", 36, (6.0, 12.0, 24.0)))
+        self.assertEqual(bssids[-1].interface_name, "Wi-Fi 2")
+
+    def test_ssid_without_bssid_details(self):
+        output = "Interface name : Wi-Fi\nSSID 1 : Lab\n    Network type : Infrastructure\n    Authentication : Open\n    Encryption : None\n"
+        (record,) = netsh_parser.iter_bssids(output)
+        self.assertEqual((record.ssid, record.bssid, record.signal), ("Lab", "", -1))
+        (network,) = netsh_parser.iter_wifi_networks(output)
+        self.assertEqual((network.signal, network.bssid_count), ("Unknown", 0))
+
+    def test_strongest_bssid_selection(self):
+        bssids = network_manager.parse_available_bssids(load_fixture("wlan_show_networks_multi_bssid.txt"))
+        strongest = network_manager.select_strongest_bssid(bssids, "HomeNet")
+        self.assertEqual(strongest.bssid, "aa:bb:cc:dd:ee:02")
+        self.assertEqual(network_manager.describe_bssid(strongest), "aa:bb:cc:dd:ee:02 (90%, 5 GHz channel 36)")
+        self.assertEqual(network_manager.choose_wifi_adapter(["Wi-Fi", "Wi-Fi 2"], "Office: Guest", bssids), "Wi-Fi 2")
+        self.assertEqual(network_manager.choose_wifi_adapter(["Wi-Fi", "Wi-Fi 2"], "Unknown", bssids), "Wi-Fi")
+
+    def test_parse_available_networks_tuples(self):
+        networks = network_manager.parse_available_networks(load_fixture("wlan_show_networks_multi_bssid.txt"))
+        self.assertEqual(networks[0], ("HomeNet", "WPA2PSK", "90%"))
+        self.assertEqual(networks[3], ("Office: Guest", "WPA2PSK", "75%"))
+
+    def test_wlan_interfaces(self):
+        connected, idle = netsh_parser.iter_wlan_interfaces(load_fixture("wlan_show_interfaces.txt"))
+        self.assertEqual(connected, netsh_parser.WlanInterfaceState("Wi-Fi", "connected", "HomeNet", "aa:bb:cc:dd:ee:02", 90))
+        self.assertEqual((idle.name, idle.state, idle.ssid, idle.signal), ("Wi-Fi 2", "disconnected", "", -1))
+
+    def test_profile_names(self):
+        names = list(netsh_parser.iter_wifi_profile_names(load_fixture("wlan_show_profiles.txt")))
+        self.assertEqual(names, ["HomeNet", "CoffeeShop", "Office: Guest"])
+
+    def test_profile_details(self):
+        secured = netsh_parser.parse_wifi_profile(load_fixture("wlan_show_profile_key_clear.txt"))
+        self.assertEqual(secured, netsh_parser.WifiProfileDetails("HomeNet", "WPA2-Personal", "WPA2PSK", "s3cret:pass word"))
+        open_profile = netsh_parser.parse_wifi_profile(load_fixture("wlan_show_profile_open.txt"))
+        self.assertEqual((open_profile.auth_type, open_profile.key_content), ("open", None))
+
+    def test_auth_type_map(self):
+        self.assertEqual(netsh_parser.map_auth_type("WPA-Personal"), "WPAPSK")
+        self.assertEqual(netsh_parser.map_auth_type("WPA2-PSK (TKIP)"), "WPA2PSK")
+        self.assertEqual(netsh_parser.map_auth_type("WPA2-Enterprise"), "WPA2PSK")
+        self.assertEqual(netsh_parser.map_auth_type(None), "WPA2PSK")
+
+    def test_profile_xml(self):
+        with open(os.path.join(EXPORT_DIR, "Wi-Fi-HomeNet.xml"), "rb") as f:
+            record = netsh_parser.parse_wifi_profile_xml(f.read())
+        self.assertEqual(record, netsh_parser.WifiProfileDetails("HomeNet", "WPA2PSK", "WPA2PSK", "s3cret:pass word"))
+        with open(os.path.join(EXPORT_DIR, "Wi-Fi-Lab.xml"), "rb") as f:
+            protected = netsh_parser.parse_wifi_profile_xml(f.read())
+        self.assertEqual((protected.auth_type, protected.key_content), ("WPA3SAE", None))
+
+    def test_generated_profile_xml_round_trip(self):
+        xml = network_manager.generate_wifi_profile_xml("Lab", "pw", "WEP")
+        self.assertEqual(netsh_parser.parse_wifi_profile_xml(xml), netsh_parser.WifiProfileDetails("Lab", "open", "WEP", "pw"))
+
+
+class TestWifiProfileExport(unittest.TestCase):
+    """Tests that Wi-Fi profiles are read with one bulk export instead of one netsh call per profile."""
+
+    def setUp(self):
+        self.commands = []
+        self.export_fails = False
+        original = network_manager._run_command
+        network_manager._run_command = self.fake_run_command
+        self.addCleanup(setattr, network_manager, "_run_command", original)
+
+    def fake_run_command(self, command, timeout=None, runner=None):
+        self.commands.append(command)
+        if command.startswith("netsh wlan export profile"):
+            if self.export_fails:
+                raise subprocess.CalledProcessError(1, command, output="", stderr="export failed")
+            folder = re.search(r'folder="([^"]+)"', command).group(1)
+            for file_name in os.listdir(EXPORT_DIR):
+                shutil.copy(os.path.join(EXPORT_DIR, file_name), folder)
+            return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+        if command == "netsh wlan show profiles":
+            return subprocess.CompletedProcess(command, 0, stdout=load_fixture("wlan_show_profiles.txt"), stderr="")
+        return subprocess.CompletedProcess(command, 0, stdout=load_fixture("wlan_show_profile_key_clear.txt"), stderr="")
+
+    def test_single_export_call(self):
+        for max_workers in (None, 4):
+            self.commands.clear()
+            profiles, message = network_manager.get_wifi_profile_details(max_workers=max_workers)
+            self.assertIsNone(message)
+            self.assertEqual(len(self.commands), 1)
+            self.assertEqual(
+                [(p.name, p.auth_type, p.key_content) for p in profiles],
+                [("CoffeeShop", "open", None), ("HomeNet", "WPA2PSK", "s3cret:pass word"), ("Lab", "WPA3SAE", None)],
+            )
+
+    def test_get_wifi_profiles_tuples(self):
+        profiles, message = network_manager.get_wifi_profiles()
+        self.assertEqual(profiles, [("CoffeeShop", "open"), ("HomeNet", "WPA2PSK"), ("Lab", "WPA3SAE")])
+        self.assertEqual(len(self.commands), 1)
+
+    def test_fallback_when_export_fails(self):
+        self.export_fails = True
+        profiles, message = network_manager.get_wifi_profile_details()
+        self.assertIsNone(message)
+        self.assertEqual([p.name for p in profiles], ["HomeNet", "CoffeeShop", "Office: Guest"])
+        self.assertEqual(len(self.commands), 2 + len(profiles))
+
+
+class FakeDB:
+    def get_wifi_profiles(self, config_name=None):
+        rows = [
+            ("Office", "Site-A", "password-a", "WPA2PSK"),
+            ("Office", "Guest", "", "open"),
+            ("Lab", "Site-B", "DECRYPTION_FAILED", "WPA2PSK"),
+        ]
+        return [row for row in rows if config_name in (None, row[0])], None
+
+
+class TestWifiProvisioning(unittest.TestCase):
+    """Tests for adding many Wi-Fi profiles with one batched netsh call."""
+
+    def setUp(self):
+        self.commands = []
+        self.rejected = set()
+        self.temp_dirs = []
+        self.installed = {} # name -> profile XML held by the "system"
+        self.localized = False
+        original = network_manager._run_command
+        network_manager._run_command = self.fake_run_command
+        self.addCleanup(setattr, network_manager, "_run_command", original)
+
+    def fake_run_command(self, command, timeout=None, runner=None):
+        """Stand-in for 'netsh -f' (adds the profile files the script names) and 'netsh wlan export'."""
+        self.commands.append(command)
+        export = re.match(r'netsh wlan export profile folder="([^"]+)" key=clear', command)
+        if export:
+            for number, profile_xml in enumerate(self.installed.values()):
+                with open(os.path.join(export.group(1), f"profile_{number}.xml"), "w", encoding="utf-8") as f:
+                    f.write(profile_xml)
+            return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+        script_path = re.match(r'netsh -f "([^"]+)"', command).group(1)
+        self.temp_dirs.append(os.path.dirname(script_path))
+        with open(script_path, encoding="utf-8") as f:
+            script = f.read()
+        output = []
+        for profile_path in re.findall(r'filename="([^"]+)"', script):
+            with open(profile_path, encoding="utf-8") as f:
+                profile_xml = f.read()
+            name = netsh_parser.parse_wifi_profile_xml(profile_xml).name
+            if name in self.rejected:
+                output.append("Das Netzwerkverbindungsprofil ist beschädigt." if self.localized else "The network connection profile is corrupted.")
+            else:
+                self.installed[name] = profile_xml
+                output.append(f"Profil {name} wurde der Schnittstelle WLAN hinzugefügt." if self.localized else f"Profile {name} is added on interface Wi-Fi.")
+        result = subprocess.CompletedProcess(command, 1 if self.rejected else 0, stdout="\n".join(output), stderr="")
+        if result.returncode:
+            raise subprocess.CalledProcessError(1, command, output=result.stdout, stderr="")
+        return result
+
+    def test_one_batched_call_with_per_profile_results(self):
+        self.rejected = {"Site-C"}
+        entries = [("Site-A", "password-a", "WPA2PSK"), ("Site-B", "password-b", "WPA3SAE"), ("Site-C", "password-c", "WPA2PSK"),
+                   ("Site-A", "other", "WPA2PSK"), ("", "x", "open"), ("Site-D", "", "WPA2PSK")]
+        results, error = network_manager.provision_wifi_profiles(entries, adapter_name="Wi-Fi")
+        self.assertIsNone(error)
+        self.assertEqual(len([command for command in self.commands if command.startswith("netsh -f")]), 1)
+        self.assertEqual([(r.ssid, r.success) for r in results], [
+            ("Site-A", True), ("Site-B", True), ("Site-C", False), ("Site-A", False), ("", False), ("Site-D", False),
+        ])
+        self.assertIn("corrupted", results[2].message)
+        self.assertFalse(os.path.exists(self.temp_dirs[0]))
+
+    def test_localized_output_confirmed_by_export(self):
+        self.localized = True
+        self.rejected = {"Site-C"}
+        # An older Site-C is still installed; its key differs, so the rejected update is not confirmed.
+        self.installed["Site-C"] = network_manager.generate_wifi_profile_xml("Site-C", "old-password", "WPA2PSK")
+        entries = [("Site-A", "password-a", "WPA2PSK"), ("Guest", "", "open"), ("Site-C", "password-c", "WPA2PSK")]
+        results, error = network_manager.provision_wifi_profiles(entries, adapter_name="Wi-Fi")
+        self.assertIsNone(error)
+        self.assertEqual([(r.ssid, r.success) for r in results], [("Site-A", True), ("Guest", True), ("Site-C", False)])
+        self.assertEqual(len(self.commands), 2) # the batch and one export
+        self.assertTrue(network_manager.wifi_profile_cache.matches("Site-A", "Wi-Fi", network_manager.generate_wifi_profile_xml("Site-A", "password-a", "WPA2PSK")))
+
+    def test_batch_that_never_ran_fails_every_profile(self):
+        self.installed["Site-A"] = network_manager.generate_wifi_profile_xml("Site-A", "password-a", "WPA2PSK")
+
+        def broken_script(profile_paths, adapter_name=None):
+            raise OSError("disk full")
+
+        self.addCleanup(setattr, network_manager, "compile_wifi_provisioning_script", network_manager.compile_wifi_provisioning_script)
+        network_manager.compile_wifi_provisioning_script = broken_script
+        entries = [("Site-A", "password-a", "WPA2PSK"), ("Site-B", "password-b", "WPA2PSK")]
+        results, error = network_manager.provision_wifi_profiles(entries, adapter_name="Wi-Fi")
+        self.assertIn("disk full", error)
+        self.assertEqual(self.commands, []) # no batch, and no export to mistake Site-A for a new profile
+        self.assertEqual([(r.ssid, r.success) for r in results], [("Site-A", False), ("Site-B", False)])
+        self.assertEqual(results[0].message, error)
+
+    def test_entries_from_database(self):
+        results, error = network_manager.provision_wifi_profiles_from_db(FakeDB())
+        self.assertIsNone(error)
+        self.assertEqual([(r.ssid, r.success) for r in results], [("Site-A", True), ("Guest", True), ("Site-B", False)])
+        results, _ = network_manager.provision_wifi_profiles_from_db(FakeDB(), config_name="Lab")
+        self.assertEqual(results[0].message, "The stored password could not be decrypted.")
+        self.assertEqual(len(self.commands), 1) # nothing valid to add for Lab
+
+
+class TestWifiProfileHashCache(unittest.TestCase):
+    """Tests that an unchanged Wi-Fi profile is not reinstalled before connecting."""
+
+    def setUp(self):
+        self.commands = []
+        self.connect_failures = 0
+        original = network_manager._run_command
+        network_manager._run_command = self.fake_run_command
+        self.addCleanup(setattr, network_manager, "_run_command", original)
+        network_manager.invalidate_wifi_profile_cache()
+        self.addCleanup(network_manager.invalidate_wifi_profile_cache)
+
+    def fake_run_command(self, command, timeout=None, runner=None):
+        self.commands.append(command.split(" filename=")[0].split(" name=")[0])
+        if command.startswith("netsh wlan connect") and self.connect_failures:
+            self.connect_failures -= 1
+            raise subprocess.CalledProcessError(1, command, output="", stderr="There is no profile")
+        return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+    def apply(self, password="secret-pass", auth_type="WPA2PSK", adapter_name="Wi-Fi"):
+        success, message = network_manager.apply_wifi_profile("HomeNet", password, adapter_name, auth_type)
+        self.assertTrue(success, message)
+
+    def test_unchanged_profile_skips_add(self):
+        self.apply()
+        self.apply()
+        self.assertEqual(self.commands, [
+            "netsh wlan add profile", "netsh wlan connect", "netsh wlan connect",
+        ])
+
+    def test_changed_content_or_interface_reinstalls(self):
+        self.apply()
+        self.apply(password="new-pass")
+        self.apply(password="new-pass", auth_type="WPA3SAE")
+        self.apply(password="new-pass", auth_type="WPA3SAE", adapter_name="Wi-Fi 2")
+        self.assertEqual(self.commands.count("netsh wlan add profile"), 4)
+
+    def test_invalidate_forces_reinstall(self):
+        self.apply()
+        network_manager.invalidate_wifi_profile_cache("HomeNet")
+        self.apply()
+        self.assertEqual(self.commands.count("netsh wlan add profile"), 2)
+
+    def test_failed_connect_on_cache_hit_reinstalls_once(self):
+        self.apply()
+        self.commands.clear()
+        self.connect_failures = 1
+        self.apply()
+        self.assertEqual(self.commands, ["netsh wlan connect", "netsh wlan add profile", "netsh wlan connect"])
+
+    def test_failure_forgets_hash(self):
+        self.apply()
+        self.connect_failures = 2
+        success, _ = network_manager.apply_wifi_profile("HomeNet", "secret-pass", "Wi-Fi")
+        self.assertFalse(success)
+        self.commands.clear()
+        self.apply()
+        self.assertEqual(self.commands, ["netsh wlan add profile", "netsh wlan connect"])
+
+
+if __name__ == "__main__":
+    unittest.main()
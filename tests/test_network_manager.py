@@ -1,4 +1,7 @@
 import unittest
+import contextlib
+import io
+import subprocess
 import sys
 import os
 
@@ -8,7 +11,15 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from network_manager import validate_ip
+from network_manager import (
+    validate_ip,
+    parse_adapter_snapshot,
+    list_adapters,
+    get_current_adapter_config,
+    get_adapter_statuses,
+    AdapterStateCache,
+)
+import network_manager
 
 
 class TestValidateIP(unittest.TestCase):
@@ -66,6 +77,360 @@ class TestValidateIP(unittest.TestCase):
         self.assertTrue(validate_ip(None), "None should be considered valid.")
 
 
+SAMPLE_SNAPSHOT_RAW = [
+    {
+        "Name": "Ethernet",
+        "InterfaceDescription": "Intel(R) Ethernet Connection I219-V",
+        "Status": "Up",
+        "Dhcp": "Disabled",
+        "IPAddress": "192.168.1.100",
+        "PrefixLength": 24,
+        "Gateway": "192.168.1.1",
+        "DnsServers": ["8.8.8.8", "8.8.4.4"],
+        "MediaType": "802.3",
+        "InterfaceType": 6,
+        "Virtual": False,
+        "AdminStatus": "Up",
+        "MediaConnectionState": "Connected",
+    },
+    {
+        "Name": "Wi-Fi",
+        "InterfaceDescription": "Intel(R) Wi-Fi 6 AX201 160MHz",
+        "Status": "Up",
+        "Dhcp": "Enabled",
+        "IPAddress": "10.0.0.23",
+        "PrefixLength": 16,
+        "Gateway": "10.0.0.1",
+        "DnsServers": "10.0.0.1",
+        "MediaType": "Native 802.11",
+        "InterfaceType": 71,
+        "Virtual": False,
+        "AdminStatus": "Up",
+        "MediaConnectionState": "Connected",
+    },
+    {
+        "Name": "Ethernet 2",
+        "InterfaceDescription": "Realtek USB GbE Family Controller",
+        "Status": "Disconnected",
+        "Dhcp": "Enabled",
+        "IPAddress": None,
+        "PrefixLength": None,
+        "Gateway": None,
+        "DnsServers": [],
+        "MediaType": "802.3",
+        "InterfaceType": 6,
+        "Virtual": False,
+        "AdminStatus": "Up",
+        "MediaConnectionState": "Disconnected",
+    },
+]
+
+
+class TestAdapterSnapshot(unittest.TestCase):
+    """Unit tests for the single-query adapter snapshot helpers."""
+
+    def setUp(self):
+        self.snapshot = parse_adapter_snapshot(SAMPLE_SNAPSHOT_RAW)
+
+    def test_parse_normalizes_entries(self):
+        """Test that prefixes become masks and DHCP/DNS fields are normalized."""
+        ethernet, wifi, usb = self.snapshot
+        self.assertEqual(ethernet["subnet_mask"], "255.255.255.0")
+        self.assertFalse(ethernet["dhcp_enabled"])
+        self.assertEqual(ethernet["dns_servers"], ["8.8.8.8", "8.8.4.4"])
+        self.assertEqual(wifi["subnet_mask"], "255.255.0.0")
+        self.assertTrue(wifi["dhcp_enabled"])
+        self.assertEqual(wifi["dns_servers"], ["10.0.0.1"])
+        self.assertEqual(usb["ip_address"], "")
+        self.assertEqual(usb["subnet_mask"], "")
+
+    def test_list_adapters_only_returns_connected(self):
+        """Test that list_adapters served from a snapshot skips adapters that are not Up."""
+        adapters, message = list_adapters(snapshot=self.snapshot)
+        self.assertIsNone(message)
+        self.assertEqual(
+            adapters,
+            [
+                ("Ethernet", "Intel(R) Ethernet Connection I219-V"),
+                ("Wi-Fi", "Intel(R) Wi-Fi 6 AX201 160MHz"),
+            ],
+        )
+
+    def test_get_current_adapter_config_from_snapshot(self):
+        """Test that the adapter config dictionary is built from the snapshot entry."""
+        config, error = get_current_adapter_config("Ethernet", snapshot=self.snapshot)
+        self.assertIsNone(error)
+        self.assertEqual(config["ip_address"], "192.168.1.100")
+        self.assertEqual(config["subnet_mask"], "255.255.255.0")
+        self.assertEqual(config["gateway"], "192.168.1.1")
+        self.assertEqual(config["dns_primary"], "8.8.8.8")
+        self.assertEqual(config["dns"], "8.8.4.4")
+
+    def test_get_adapter_statuses_from_snapshot(self):
+        """Test that statuses are resolved against saved profiles without extra queries."""
+        saved_configs = {
+            "networks": {
+                "Office": {
+                    "adapter_name": "Ethernet",
+                    "ip_address": "192.168.1.100",
+                    "subnet_mask": "255.255.255.0",
+                    "gateway": "192.168.1.1",
+                }
+            }
+        }
+        statuses, error = get_adapter_statuses(saved_configs, snapshot=self.snapshot)
+        self.assertIsNone(error)
+        self.assertEqual(statuses, {"Ethernet": "Static: Office", "Wi-Fi": "DHCP"})
+
+    def test_profile_index_matches_first_profile(self):
+        """Test that the index keeps the first of several identical profiles and the reverse map finds it."""
+        office = {"adapter_name": "Ethernet", "ip_address": "192.168.1.100", "subnet_mask": "255.255.255.0", "gateway": "192.168.1.1"}
+        saved_configs = {"networks": {
+            "Office": dict(office),
+            "Office copy": dict(office),
+            "Lab": dict(office, ip_address="192.168.1.101"),
+        }}
+        index = network_manager.build_profile_index(saved_configs)
+        self.assertEqual(len(index), 2)
+        statuses, _ = get_adapter_statuses(saved_configs, snapshot=self.snapshot, profile_index=index)
+        self.assertEqual(statuses["Ethernet"], "Static: Office")
+        self.assertEqual(network_manager.active_profiles(statuses), {"Office": "Ethernet"})
+
+        statuses, _ = get_adapter_statuses({"networks": {"Lab": saved_configs["networks"]["Lab"]}}, snapshot=self.snapshot)
+        self.assertEqual(statuses["Ethernet"], "Static: (Custom/Unsaved)")
+        self.assertEqual(network_manager.active_profiles(statuses), {})
+
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdapterStateCache(unittest.TestCase):
+    """Unit tests for the TTL adapter-state cache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = AdapterStateCache(ttl=5.0, clock=self.clock)
+        self.snapshot = parse_adapter_snapshot(SAMPLE_SNAPSHOT_RAW)
+
+    def test_hits_until_ttl_expires(self):
+        self.assertIsNone(self.cache.get_snapshot())
+        self.cache.put_snapshot(self.snapshot)
+        self.assertEqual(self.cache.get_snapshot(), self.snapshot)
+        self.clock.now += 5.0
+        self.assertIsNone(self.cache.get_snapshot())
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_invalidate_one_adapter(self):
+        """Test that invalidating one adapter keeps the others but drops the complete snapshot."""
+        self.cache.put_snapshot(self.snapshot)
+        self.cache.invalidate("Ethernet")
+        self.assertIsNone(self.cache.get_entry("Ethernet"))
+        self.assertEqual(self.cache.get_entry("Wi-Fi")["ip_address"], "10.0.0.23")
+        self.assertIsNone(self.cache.get_snapshot())
+
+    def test_cached_entries_are_copies(self):
+        self.cache.put_snapshot(self.snapshot)
+        self.cache.get_entry("Ethernet")["ip_address"] = "1.2.3.4"
+        self.assertEqual(self.cache.get_entry("Ethernet")["ip_address"], "192.168.1.100")
+
+
+class TestAdapterSnapshotCaching(unittest.TestCase):
+    """Tests that snapshot consumers share one query through the process-wide cache."""
+
+    def setUp(self):
+        self.queries = 0
+
+        def fake_run_powershell_json(ps_command):
+            self.queries += 1
+            return SAMPLE_SNAPSHOT_RAW, None
+
+        original = network_manager._run_powershell_json
+        network_manager._run_powershell_json = fake_run_powershell_json
+        self.addCleanup(setattr, network_manager, "_run_powershell_json", original)
+        network_manager.invalidate_adapter_state()
+        self.addCleanup(network_manager.invalidate_adapter_state)
+
+    def test_consumers_share_one_query(self):
+        list_adapters()
+        get_adapter_statuses({"networks": {}})
+        get_current_adapter_config("Wi-Fi")
+        self.assertEqual(self.queries, 1)
+
+    def test_invalidation_forces_new_query(self):
+        list_adapters()
+        network_manager.invalidate_adapter_state("Ethernet")
+        config, _ = get_current_adapter_config("Ethernet")
+        self.assertEqual(config["ip_address"], "192.168.1.100")
+        self.assertEqual(self.queries, 2)
+
+
+class TestInterfaceIndex(unittest.TestCase):
+    """Tests for the interface index built from the adapter snapshot."""
+
+    def setUp(self):
+        self.queries = 0
+        self.commands = []
+
+        def fake_run_powershell_json(ps_command):
+            self.queries += 1
+            return SAMPLE_SNAPSHOT_RAW, None
+
+        for name, fake in [
+            ("_run_powershell_json", fake_run_powershell_json),
+            ("_run_command", lambda command, timeout=None: self.commands.append(command)),
+        ]:
+            self.addCleanup(setattr, network_manager, name, getattr(network_manager, name))
+            setattr(network_manager, name, fake)
+        network_manager.invalidate_adapter_state()
+        self.addCleanup(network_manager.invalidate_adapter_state)
+
+    def test_classify_media_type(self):
+        cases = [
+            ({"MediaType": "802.3", "InterfaceType": 6}, "wired"),
+            ({"MediaType": "Native 802.11", "InterfaceType": 71}, "wireless"),
+            ({"MediaType": "802.3", "InterfaceType": 6, "Virtual": True, "Name": "vEthernet (Default Switch)"}, "virtual"),
+            ({"InterfaceType": 24, "Name": "Loopback Pseudo-Interface 1"}, "loopback"),
+            ({"Name": "Wi-Fi", "InterfaceDescription": "Intel(R) Wi-Fi 6 AX201"}, "wireless"),
+            ({"Name": "Ethernet", "InterfaceDescription": "Intel(R) Ethernet Connection"}, "wired"),
+        ]
+        for raw_entry, expected in cases:
+            with self.subTest(raw_entry=raw_entry):
+                self.assertEqual(network_manager.classify_media_type(raw_entry), expected)
+
+    def test_index_from_one_snapshot(self):
+        index, error = network_manager.get_interface_index()
+        self.assertIsNone(error)
+        self.assertEqual(index["Wi-Fi"].media_type, "wireless")
+        self.assertEqual(index["Ethernet 2"].connection_state, "Disconnected")
+        for name in ("Ethernet", "Wi-Fi", "Ethernet 2", "Unknown"):
+            network_manager.is_wifi_adapter(name)
+        self.assertTrue(network_manager.has_wifi_support())
+        self.assertEqual(network_manager.wifi_adapter_names(index), ["Wi-Fi"])
+        self.assertEqual((self.queries, self.commands), (1, []))
+
+    def test_lookups_follow_the_adapter_state_refresh(self):
+        self.assertTrue(network_manager.is_wifi_adapter("Wi-Fi"))
+        network_manager.invalidate_adapter_state()
+        self.assertFalse(network_manager.is_wifi_adapter("Ethernet"))
+        self.assertEqual(self.queries, 2)
+
+
+STATIC_CONFIG = {
+    "adapter_name": "Ethernet", "ip_address": "192.168.1.100", "subnet_mask": "255.255.255.0",
+    "gateway": "192.168.1.1", "dns_primary": "8.8.8.8", "dns_secondary": "8.8.4.4", "router_ip": "",
+}
+
+
+class TestCompiledApply(unittest.TestCase):
+    """Tests that apply_network_config runs one compiled netsh script."""
+
+    def setUp(self):
+        self.commands = []
+        self.scripts = []
+
+        def fake_run_command(command, timeout=None, runner=None):
+            self.commands.append(command)
+            self.script_path = command.split('"')[1]
+            with open(self.script_path) as f:
+                self.scripts.append(f.read())
+            return subprocess.CompletedProcess(command, 0, stdout="", stderr="")
+
+        original = network_manager._run_command
+        network_manager._run_command = fake_run_command
+        self.addCleanup(setattr, network_manager, "_run_command", original)
+        original_json = network_manager._run_powershell_json
+        network_manager._run_powershell_json = lambda ps_command: (SAMPLE_SNAPSHOT_RAW, None)
+        self.addCleanup(setattr, network_manager, "_run_powershell_json", original_json)
+        self.addCleanup(network_manager.invalidate_adapter_state)
+
+    def test_single_netsh_process(self):
+        success, _ = network_manager.apply_network_config("Wi-Fi", STATIC_CONFIG)
+        self.assertTrue(success)
+        self.assertEqual(len(self.commands), 1)
+        self.assertTrue(self.commands[0].startswith("netsh -f "))
+        self.assertEqual(self.scripts[0].splitlines(), [
+            'interface ip set address name="Wi-Fi" source=static addr=192.168.1.100 mask=255.255.255.0 gateway=192.168.1.1',
+            'interface ip set dns name="Wi-Fi" source=static addr=8.8.8.8',
+            'interface ip add dns name="Wi-Fi" addr=8.8.4.4 index=2',
+        ])
+        self.assertFalse(os.path.exists(self.script_path))
+
+    def test_active_profile_is_not_reapplied(self):
+        success, message, plan = network_manager.apply_network_config_with_plan("Ethernet", STATIC_CONFIG)
+        self.assertTrue(success)
+        self.assertEqual(plan.changed_fields, ())
+        self.assertIn("nothing was changed", message)
+        self.assertEqual(self.commands, [])
+
+    def test_only_differing_commands_run(self):
+        success, message, plan = network_manager.apply_network_config_with_plan(
+            "Ethernet", dict(STATIC_CONFIG, dns_secondary="1.1.1.1")
+        )
+        self.assertTrue(success)
+        self.assertEqual(plan.changed_fields, ("dns_secondary",))
+        self.assertEqual(plan.skipped_fields, ("ip_address", "subnet_mask", "gateway", "dns_primary"))
+        self.assertNotIn("set address", self.scripts[0])
+        self.assertIn("addr=1.1.1.1 index=2", self.scripts[0])
+        self.assertIn("unchanged: ip_address", message)
+
+    def test_script_is_cached_until_profile_changes(self):
+        first = network_manager.compile_network_config_script("Ethernet", STATIC_CONFIG)
+        self.assertIs(network_manager.compile_network_config_script("Ethernet", dict(STATIC_CONFIG)), first)
+        changed = network_manager.compile_network_config_script("Ethernet", dict(STATIC_CONFIG, dns_secondary=""))
+        self.assertNotIn("add dns", changed)
+
+    def test_dry_run_does_not_execute(self):
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            success, script = network_manager.apply_network_config("Wi-Fi", STATIC_CONFIG, dry_run=True)
+        self.assertTrue(success)
+        self.assertIn(script, printed.getvalue())
+        self.assertEqual(self.commands, [])
+
+    def test_invalid_config_is_rejected(self):
+        success, message = network_manager.apply_network_config("Ethernet", dict(STATIC_CONFIG, gateway="1.2.3"))
+        self.assertFalse(success)
+        self.assertIn("Invalid gateway", message)
+        self.assertEqual(self.commands, [])
+
+
+class TestNetworkConfigPlan(unittest.TestCase):
+    """Unit tests for diffing a profile against the live adapter configuration."""
+
+    def setUp(self):
+        snapshot = parse_adapter_snapshot(SAMPLE_SNAPSHOT_RAW)
+        self.ethernet = network_manager.snapshot_entry_to_config(snapshot[0])
+        self.wifi = network_manager.snapshot_entry_to_config(snapshot[1])
+
+    def test_gateway_change_only_sets_address(self):
+        plan = network_manager.plan_network_config("Ethernet", dict(STATIC_CONFIG, gateway="192.168.1.254"), self.ethernet)
+        self.assertEqual(plan.changed_fields, ("gateway",))
+        self.assertEqual(len(plan.script.splitlines()), 1)
+
+    def test_dhcp_adapter_is_switched_to_static(self):
+        plan = network_manager.plan_network_config("Wi-Fi", dict(STATIC_CONFIG, ip_address="10.0.0.23",
+            subnet_mask="255.255.0.0", gateway="10.0.0.1", dns_primary="10.0.0.1", dns_secondary=""), self.wifi)
+        self.assertEqual(plan.changed_fields, ("dhcp_enabled",))
+        self.assertIn("set address", plan.script)
+        self.assertIn("set dns", plan.script)
+
+    def test_extra_dns_servers_are_dropped(self):
+        live = dict(self.ethernet, dns_servers="8.8.8.8, 8.8.4.4, 9.9.9.9")
+        plan = network_manager.plan_network_config("Ethernet", STATIC_CONFIG, live)
+        self.assertEqual(plan.changed_fields, ("dns_servers",))
+        self.assertNotIn("set address", plan.script)
+
+    def test_unknown_live_config_applies_everything(self):
+        plan = network_manager.plan_network_config("Ethernet", STATIC_CONFIG, None)
+        self.assertEqual(plan.skipped_fields, ())
+        self.assertEqual(len(plan.script.splitlines()), 3)
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,215 @@
+import unittest
+import subprocess
+import sys
+import os
+import threading
+import time
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import deadlines
+import network_manager
+from command_runner import WorkerRunner
+from powershell_worker import WORKER_SCRIPT, PowerShellWorker, RequestAbandonedError, WorkerError, WorkerTimeoutError, split_command_line
+
+FAKE_WORKER_COMMAND = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_powershell_worker.py")]
+
+
+class TestPowerShellWorker(unittest.TestCase):
+    """Tests for the persistent worker protocol, using a stand-in worker script."""
+
+    def setUp(self):
+        self.worker = PowerShellWorker(command=FAKE_WORKER_COMMAND, request_timeout=5.0, startup_timeout=10.0)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_requests_reuse_one_process(self):
+        """Test that consecutive requests are answered by the same worker process."""
+        first = self.worker.run_powershell("echo hello")
+        pid = self.worker._process.pid
+        second = self.worker.run_powershell("echo world")
+        self.assertEqual(first.stdout, "hello")
+        self.assertEqual(second.stdout, "world")
+        self.assertEqual(self.worker._process.pid, pid)
+        self.assertEqual(self.worker.restart_count, 0)
+
+    def test_health_check(self):
+        """Test that ping reports a live worker and fails once it is stopped."""
+        self.worker.start()
+        self.assertTrue(self.worker.ping())
+        self.worker.stop()
+        self.assertFalse(self.worker.ping())
+
+    def test_ping_waits_for_a_running_request(self):
+        """Test that a health check from another thread waits for the request holding the worker."""
+        self.worker.start()
+        request_running = threading.Event()
+
+        def hold_worker():
+            with self.worker._lock:
+                request_running.set()
+                time.sleep(0.3)
+
+        request = threading.Thread(target=hold_worker)
+        request.start()
+        request_running.wait(5)
+        started = time.monotonic()
+        self.assertTrue(self.worker.ping(timeout=2.0))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        request.join(5)
+
+    def test_scripts_run_in_a_child_scope(self):
+        """Test that the worker loop does not evaluate scripts in its own scope."""
+        self.assertIn("& ([scriptblock]::Create($req.script))", WORKER_SCRIPT)
+        self.assertNotIn("Invoke-Expression", WORKER_SCRIPT)
+
+    def test_unframed_output_is_ignored(self):
+        """Test that stray stdout lines do not break the framing."""
+        self.assertEqual(self.worker.run_powershell("noise").returncode, 0)
+        self.assertEqual(self.worker.run_powershell("echo still-in-sync").stdout, "still-in-sync")
+
+    def test_failure_exit_code_is_reported(self):
+        """Test that a failing script is reported through the exit code and stderr."""
+        result = self.worker.run_powershell("fail broken")
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stderr, "broken")
+
+    def test_timeout_kills_and_next_request_restarts(self):
+        """Test the worker's own request timeout and that the worker comes back afterwards."""
+        self.worker.request_timeout = 0.3
+        with self.assertRaises(WorkerTimeoutError):
+            self.worker.run_powershell("sleep 5")
+        self.assertFalse(self.worker.is_alive())
+        self.worker.request_timeout = 5.0
+        self.assertEqual(self.worker.run_powershell("echo back").stdout, "back")
+        self.assertEqual(self.worker.restart_count, 1)
+
+    def test_shorter_timeout_abandons_request_and_keeps_worker(self):
+        """Test that a caller's shorter timeout (e.g. a deadline budget) does not kill the worker."""
+        self.worker.start()
+        pid = self.worker._process.pid
+        with self.assertRaises(RequestAbandonedError):
+            self.worker.run_powershell("sleep 0.5", timeout=0.1)
+        self.assertTrue(self.worker.is_alive())
+        # The late reply to the abandoned request is not mistaken for this one.
+        self.assertEqual(self.worker.run_powershell("echo next").stdout, "next")
+        self.assertEqual(self.worker._process.pid, pid)
+        self.assertEqual(self.worker.restart_count, 0)
+        self.assertEqual(self.worker._abandoned, {})
+
+    def test_slow_cold_start_is_capped_by_the_callers_timeout(self):
+        """Test that a short timeout does not wait out startup_timeout and leaves the worker starting."""
+        worker = PowerShellWorker(command=FAKE_WORKER_COMMAND + ["--startup-delay", "0.5"], request_timeout=5.0, startup_timeout=10.0)
+        self.addCleanup(worker.stop)
+        started = time.monotonic()
+        with self.assertRaises(RequestAbandonedError):
+            worker.run_powershell("echo early", timeout=0.1)
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertTrue(worker.is_alive())
+        self.assertEqual(worker.run_powershell("echo later").stdout, "later")
+        self.assertEqual(worker.restart_count, 0)
+
+    def test_worker_still_busy_with_abandoned_request_is_restarted(self):
+        """Test that a worker stuck on an abandoned request past request_timeout is replaced."""
+        self.worker.request_timeout = 0.3
+        with self.assertRaises(RequestAbandonedError):
+            self.worker.run_powershell("sleep 5", timeout=0.1)
+        time.sleep(0.3)
+        self.assertEqual(self.worker.run_powershell("echo fresh").stdout, "fresh")
+        self.assertEqual(self.worker.restart_count, 1)
+
+    def test_restart_after_crash(self):
+        """Test that a crashed worker is restarted on the next request."""
+        self.worker.start()
+        with self.assertRaises(WorkerError):
+            self.worker.run_powershell("crash")
+        self.assertEqual(self.worker.run_powershell("echo recovered").stdout, "recovered")
+        self.assertEqual(self.worker.restart_count, 1)
+
+    def test_exec_runs_command_line(self):
+        """Test that exec requests run a command line and return its output."""
+        result = self.worker.run_command("echo from-shell")
+        self.assertEqual(result.stdout.strip(), "from-shell")
+
+    def test_command_line_split_for_direct_start(self):
+        """Test that exec requests name the executable and pass the rest of the line verbatim."""
+        self.assertEqual(
+            split_command_line('netsh interface ip set address name="Wi-Fi 2" source=dhcp'),
+            ("netsh", 'interface ip set address name="Wi-Fi 2" source=dhcp'),
+        )
+        self.assertEqual(split_command_line('"C:\\Windows\\System32\\netsh.exe" -f "C:\\t.txt"'),
+                         ("C:\\Windows\\System32\\netsh.exe", '-f "C:\\t.txt"'))
+        self.assertEqual(split_command_line("netsh"), ("netsh", ""))
+
+
+class CountingRunner:
+    def __init__(self):
+        self.calls = []
+
+    def run_command(self, command_line, timeout=None):
+        self.calls.append(command_line)
+        return subprocess.CompletedProcess(command_line, 0, stdout="spawned", stderr="")
+
+    def run_powershell(self, script, timeout=None):
+        return self.run_command(script, timeout)
+
+
+class TestWorkerRunnerFallback(unittest.TestCase):
+    """Tests that only requests that never reached the worker are spawned instead."""
+
+    def setUp(self):
+        self.fallback = CountingRunner()
+
+    def test_request_delivered_before_crash_is_not_run_again(self):
+        worker = PowerShellWorker(command=FAKE_WORKER_COMMAND, request_timeout=5.0, startup_timeout=10.0)
+        self.addCleanup(worker.stop)
+        result = WorkerRunner(worker, fallback=self.fallback).run_powershell("crash")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("not run again", result.stderr)
+        self.assertEqual(self.fallback.calls, [])
+
+    def test_worker_that_cannot_start_falls_back(self):
+        worker = PowerShellWorker(command=[os.path.join(project_root, "no-such-worker")])
+        result = WorkerRunner(worker, fallback=self.fallback).run_command("netsh wlan show interfaces")
+        self.assertEqual(result.stdout, "spawned")
+        self.assertEqual(self.fallback.calls, ["netsh wlan show interfaces"])
+
+
+class TestNetworkManagerRouting(unittest.TestCase):
+    """Tests that network_manager routes its commands through an enabled worker."""
+
+    def setUp(self):
+        self.worker = PowerShellWorker(command=FAKE_WORKER_COMMAND, request_timeout=5.0, startup_timeout=10.0)
+        network_manager.enable_powershell_worker(self.worker)
+
+    def tearDown(self):
+        network_manager.disable_powershell_worker()
+        self.worker.stop()
+
+    def test_run_command_uses_worker(self):
+        result = network_manager._run_command("echo routed")
+        self.assertEqual(result.stdout.strip(), "routed")
+        self.assertTrue(self.worker.is_alive())
+
+    def test_non_zero_exit_raises_called_process_error(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            network_manager._run_command("exit 4")
+
+    def test_worker_timeout_raises_timeout_expired(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            network_manager._run_powershell("sleep 5", timeout=0.3)
+
+    def test_spent_budget_keeps_worker(self):
+        with deadlines.budget(0.2, "menu refresh"):
+            with self.assertRaises(subprocess.TimeoutExpired):
+                network_manager._run_powershell("sleep 0.5")
+        self.assertTrue(self.worker.is_alive())
+        self.assertEqual(self.worker.restart_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
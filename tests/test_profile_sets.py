@@ -0,0 +1,159 @@
+import unittest
+import subprocess
+import sys
+import os
+import threading
+import time
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import command_runner
+import network_manager
+
+
+def make_config(adapter_name, ip_address):
+    return {
+        "adapter_name": adapter_name, "ip_address": ip_address, "subnet_mask": "255.255.255.0",
+        "gateway": "192.168.1.1", "dns_primary": "1.1.1.1", "dns_secondary": "", "router_ip": "",
+    }
+
+
+class SlowScriptRunner:
+    """Runs 'netsh -f' scripts by sleeping for the adapter's delay; fails the adapters in `failing`."""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.scripts = []
+        self.queries = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def run_command(self, command_line, timeout=None):
+        if not command_line.startswith("netsh -f"): # live-config query of an adapter missing from the snapshot
+            with self._lock:
+                self.queries.append(command_line)
+                self.threads.add(threading.get_ident())
+            return subprocess.CompletedProcess(command_line, 0, stdout="", stderr="")
+        with open(command_line.split('"')[1]) as f:
+            script = f.read()
+        adapter_name = script.split('name="')[1].split('"')[0]
+        with self._lock:
+            self.scripts.append(adapter_name)
+            self.threads.add(threading.get_ident())
+        time.sleep(self.delays[adapter_name])
+        if adapter_name in self.failing:
+            return subprocess.CompletedProcess(command_line, 1, stdout="", stderr="The interface is disabled.")
+        return subprocess.CompletedProcess(command_line, 0, stdout="", stderr="")
+
+    def run_powershell(self, script, timeout=None):
+        return subprocess.CompletedProcess(script, 0, stdout="[]", stderr="")
+
+
+class UnusableWorker:
+    """Stands in for the shared PowerShell worker, which profile sets must not use."""
+
+    request_timeout = 30.0
+
+    def run_command(self, command_line, timeout=None):
+        raise AssertionError(f"Profile set call went to the shared worker: {command_line}")
+
+    run_powershell = run_command
+
+
+class TestProfileSets(unittest.TestCase):
+    """Tests for applying profile sets across several adapters concurrently."""
+
+    def setUp(self):
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        for name in ("get_adapter_snapshot", "get_current_adapter_config"):
+            self.addCleanup(setattr, network_manager, name, getattr(network_manager, name))
+        self.snapshot_reads = 0
+        self.original_get_current_adapter_config = network_manager.get_current_adapter_config
+
+        def get_adapter_snapshot(use_cache=True):
+            self.snapshot_reads += 1
+            return [], None
+
+        network_manager.get_adapter_snapshot = get_adapter_snapshot
+        network_manager.get_current_adapter_config = lambda adapter_name, snapshot=None, runner=None: (None, "not found")
+
+    def test_adapters_applied_concurrently(self):
+        runner = SlowScriptRunner({"Ethernet": 0.3, "Wi-Fi": 0.3, "Ethernet 2": 0.3})
+        network_manager.set_command_runner(runner)
+        members = [
+            ("Office LAN", make_config("Ethernet", "192.168.1.10")),
+            ("Office Wi-Fi", make_config("Wi-Fi", "192.168.1.11")),
+            ("Lab", make_config("Ethernet 2", "192.168.1.12")),
+        ]
+        started = time.perf_counter()
+        success, message, results = network_manager.apply_profile_set("Office", members)
+        elapsed = time.perf_counter() - started
+        self.assertTrue(success, message)
+        self.assertLess(elapsed, 0.75) # about the slowest adapter, not the 0.9s sum
+        self.assertEqual(len(runner.threads), 3)
+        self.assertEqual(self.snapshot_reads, 1)
+        self.assertEqual([r.config_name for r in results], ["Office LAN", "Office Wi-Fi", "Lab"])
+        self.assertIn("applied to Ethernet, Wi-Fi, Ethernet 2", message)
+
+    def test_adapters_missing_from_snapshot_bypass_the_shared_worker(self):
+        network_manager.get_current_adapter_config = self.original_get_current_adapter_config
+        spawner = SlowScriptRunner({"Ethernet": 0.2, "Wi-Fi": 0.2})
+        network_manager.set_command_runner(command_runner.WorkerRunner(worker=UnusableWorker(), fallback=spawner))
+        success, message, _ = network_manager.apply_profile_set("Office", [
+            ("Office LAN", make_config("Ethernet", "192.168.1.10")),
+            ("Office Wi-Fi", make_config("Wi-Fi", "192.168.1.11")),
+        ])
+        self.assertTrue(success, message)
+        self.assertEqual(len(spawner.queries), 4) # address and DNS query per adapter
+        self.assertEqual(len(spawner.threads), 2)
+
+    def test_failed_adapter_fails_the_set(self):
+        network_manager.set_command_runner(SlowScriptRunner({"Ethernet": 0.0, "Wi-Fi": 0.0}, failing={"Wi-Fi"}))
+        success, message, results = network_manager.apply_profile_set("Office", [
+            ("Office LAN", make_config("Ethernet", "192.168.1.10")),
+            ("Office Wi-Fi", make_config("Wi-Fi", "192.168.1.11")),
+        ])
+        self.assertFalse(success)
+        self.assertEqual([r.success for r in results], [True, False])
+        self.assertIn("failed on Wi-Fi", message)
+        self.assertIn("applied on Ethernet", message)
+
+    def test_invalid_member_applies_nothing(self):
+        runner = SlowScriptRunner({"Ethernet": 0.0, "Wi-Fi": 0.0})
+        network_manager.set_command_runner(runner)
+        success, message, results = network_manager.apply_profile_set("Office", [
+            ("Office LAN", make_config("Ethernet", "192.168.1.10")),
+            ("Office Wi-Fi", make_config("Wi-Fi", "192.168.1.300")),
+        ])
+        self.assertFalse(success)
+        self.assertEqual(results, [])
+        self.assertIn("Office Wi-Fi", message)
+        self.assertEqual(runner.scripts, [])
+
+    def test_missing_member_fails_the_whole_set(self):
+        network_configs = {"Office LAN": make_config("Ethernet", "192.168.1.10")}
+        members, error = network_manager.profile_set_members("Office", ["Office LAN", "Office Wi-Fi", "Lab"], network_configs)
+        self.assertIsNone(members)
+        self.assertIn("missing profiles Office Wi-Fi, Lab", error)
+        members, error = network_manager.profile_set_members("Office", ["Office LAN"], network_configs)
+        self.assertIsNone(error)
+        self.assertEqual(members, [("Office LAN", network_configs["Office LAN"])])
+
+    def test_duplicate_adapter_rejected(self):
+        runner = SlowScriptRunner({"Ethernet": 0.0})
+        network_manager.set_command_runner(runner)
+        success, message, _ = network_manager.apply_profile_set("Office", [
+            ("A", make_config("Ethernet", "192.168.1.10")),
+            ("B", make_config("Ethernet", "192.168.1.11")),
+        ])
+        self.assertFalse(success)
+        self.assertIn("several profiles for Ethernet", message)
+        self.assertEqual(runner.scripts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import asyncio
+import socket
+import sys
+import os
+import threading
+import time
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import router_prober
+from router_prober import RouterProber, RouterTarget
+
+
+class StandInRouter:
+    """TCP listener on 127.0.0.1 that answers each request with `reply` (or stays silent if None)."""
+
+    def __init__(self, reply=b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"):
+        self.reply = reply
+        self.connections = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._answer, args=(conn,), daemon=True).start()
+
+    def _answer(self, conn):
+        with conn:
+            try:
+                conn.recv(1024)
+                if self.reply is not None:
+                    conn.sendall(self.reply)
+                else:
+                    conn.recv(1024) # hold the connection until the prober gives up
+            except OSError:
+                pass
+
+    def close(self):
+        self.sock.close()
+
+
+def closed_port():
+    """A port on 127.0.0.1 that refuses connections."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def profile(port, router_ip="127.0.0.1", protocol="http"):
+    return {"router_ip": router_ip, "router_port": str(port), "router_protocol": protocol, "gateway": "10.0.0.1"}
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRouterProber(unittest.TestCase):
+    """Tests for the router reachability prober against local stand-in listeners."""
+
+    def router(self, **kwargs):
+        router = StandInRouter(**kwargs)
+        self.addCleanup(router.close)
+        return router
+
+    def test_router_targets(self):
+        targets = router_prober.router_targets({
+            "Office": profile("8080"),
+            "Home": {"router_ip": "", "router_port": "", "router_protocol": "https", "gateway": "192.168.1.1"},
+            "Bare": {"router_ip": "", "gateway": ""},
+        })
+        self.assertEqual(targets, {
+            "Office": RouterTarget("127.0.0.1", 8080, "http"),
+            "Home": RouterTarget("192.168.1.1", 443, "https"),
+        })
+
+    def test_statuses(self):
+        up, silent = self.router(), self.router(reply=None)
+        refused = closed_port()
+        prober = RouterProber(connect_timeout=0.5, head_timeout=0.2)
+        statuses = asyncio.run(prober.probe({"Up": profile(up.port), "Silent": profile(silent.port), "Closed": profile(refused)}))
+        self.assertEqual(statuses["Up"].status, router_prober.STATUS_UP)
+        self.assertEqual(statuses["Up"].http_status, 200)
+        self.assertEqual(statuses["Silent"].status, router_prober.STATUS_OPEN)
+        self.assertEqual(statuses["Closed"].status, router_prober.STATUS_REFUSED)
+        self.assertTrue(all(status.reachable for status in statuses.values()))
+        annotations = prober.annotations({"Up": profile(up.port), "Closed": profile(refused)})
+        self.assertTrue(annotations["Up"].startswith("router up, "))
+        self.assertEqual(annotations["Closed"], "router port closed")
+
+    def test_hundreds_of_refusing_profiles_under_a_second(self):
+        up = self.router()
+        configs = {f"Profile {i}": profile(closed_port()) for i in range(300)}
+        configs.update({f"Shared {i}": profile(up.port) for i in range(50)})
+        started = time.perf_counter()
+        statuses = asyncio.run(RouterProber().probe(configs))
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(len(statuses), 350)
+        self.assertEqual(up.connections, 1) # one probe per distinct router
+
+    def test_results_cached_for_ttl(self):
+        up = self.router()
+        clock = ManualClock()
+        prober = RouterProber(ttl=30.0, clock=clock)
+        configs = {"Office": profile(up.port)}
+        asyncio.run(prober.probe(configs))
+        self.assertEqual(prober.stale_targets(configs), set())
+        asyncio.run(prober.probe(configs))
+        self.assertEqual(up.connections, 1)
+        clock.now += 31.0
+        self.assertEqual(prober.stale_targets(configs), {RouterTarget("127.0.0.1", up.port, "http")})
+        self.assertIn("Office", prober.cached_statuses(configs)) # last known result still shown
+        prober.invalidate()
+        self.assertEqual(prober.cached_statuses(configs), {})
+
+    def test_background_refresh(self):
+        up = self.router()
+        prober = RouterProber()
+        configs = {"Office": profile(up.port)}
+        delivered = threading.Event()
+        future = prober.refresh_in_background(configs, callback=lambda statuses: delivered.set())
+        self.assertIsNotNone(future)
+        future.result(timeout=5)
+        self.assertTrue(delivered.wait(5))
+        self.assertIsNone(prober.refresh_in_background(configs)) # everything fresh
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import signal_history
+from signal_history import SignalHistory
+from netsh_parser import BssidRecord
+from wifi_scanner import ScanResult
+
+
+def make_bssid(ssid, bssid, signal):
+    return BssidRecord("Wi-Fi", ssid, "Infrastructure", "WPA2-Personal", "WPA2PSK", "CCMP", bssid, signal, "802.11ax", "5 GHz", 36, (6.0,))
+
+
+class TestSignalHistory(unittest.TestCase):
+    """Tests for the fixed-size signal history ring buffer."""
+
+    def setUp(self):
+        # Exercise the pure-Python path; the NumPy path is compared against it below.
+        self.original_np = signal_history.np
+        self.addCleanup(setattr, signal_history, "np", self.original_np)
+        signal_history.np = None
+
+    def test_ring_overwrites_oldest_samples(self):
+        history = SignalHistory(capacity=4)
+        buffer_bytes = history._timestamps.buffer_info()[1]
+        for i in range(10):
+            history.append(float(i), "HomeNet", "aa:bb:cc:dd:ee:01", 50 + i)
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history._timestamps.buffer_info()[1], buffer_bytes)
+        self.assertEqual([s[0] for s in history.pending_samples()], [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(history.stats()["min"], 56.0)
+
+    def test_stats_per_ssid_bssid_and_since(self):
+        history = SignalHistory(capacity=16)
+        for t, signal in enumerate([10, 20, 30, 40]):
+            history.append(float(t), "HomeNet", "aa:bb:cc:dd:ee:01", signal)
+        history.append(5.0, "HomeNet", "aa:bb:cc:dd:ee:02", 90)
+        history.append(5.0, "CoffeeShop", "11:22:33:44:55:66", 70)
+
+        stats = history.stats(bssid="aa:bb:cc:dd:ee:01")
+        self.assertEqual((stats["count"], stats["mean"], stats["min"], stats["max"]), (4, 25.0, 10.0, 40.0))
+        self.assertEqual((stats["p50"], stats["p90"]), (25.0, 37.0))
+        self.assertEqual(history.stats(ssid="HomeNet")["count"], 5)
+        self.assertEqual(history.stats(ssid="HomeNet", since=2.0)["count"], 3)
+        self.assertIsNone(history.stats(ssid="Unknown"))
+
+    @unittest.skipUnless(signal_history.np is not None, "NumPy is not installed")
+    def test_numpy_stats_match_python_stats(self):
+        history = SignalHistory(capacity=64)
+        for i in range(100):
+            history.append(float(i), "HomeNet" if i % 3 else "Lab", f"aa:bb:cc:dd:ee:{i % 5:02x}", (i * 37) % 101)
+        expected = history.stats(ssid="HomeNet", since=50.0, percentiles=(10, 50, 95))
+        signal_history.np = self.original_np
+        self.assertEqual(history.stats(ssid="HomeNet", since=50.0, percentiles=(10, 50, 95)), expected)
+
+    def test_flush_saves_only_new_samples(self):
+        history = SignalHistory(capacity=8)
+        saved = []
+
+        def save(samples):
+            saved.append(samples)
+            return True, "ok"
+
+        history.append(1.0, "HomeNet", "aa:bb:cc:dd:ee:01", 80)
+        history.append(2.0, "HomeNet", "aa:bb:cc:dd:ee:01", 70)
+        self.assertEqual(history.flush(save), 2)
+        self.assertEqual(history.flush(save), 0)
+        history.append(3.0, "HomeNet", "aa:bb:cc:dd:ee:01", 60)
+        self.assertEqual(history.flush(save), 1)
+        self.assertEqual(saved[1], [(3.0, "HomeNet", "aa:bb:cc:dd:ee:01", 60)])
+
+        history.append(4.0, "HomeNet", "aa:bb:cc:dd:ee:01", 50)
+        self.assertEqual(history.flush(lambda samples: (False, "Database error")), 0)
+        self.assertEqual(len(history.pending_samples()), 1)
+
+    def test_evicted_bssids_are_forgotten(self):
+        history = SignalHistory(capacity=2, max_tracked_bssids=3)
+        for i in range(20):
+            history.append(float(i), "HomeNet", f"aa:bb:cc:dd:ee:{i:02x}", 50)
+        self.assertLessEqual(len(history._keys), 3)
+        self.assertEqual([s[2] for s in history.pending_samples()], ["aa:bb:cc:dd:ee:12", "aa:bb:cc:dd:ee:13"])
+
+    def test_record_scan(self):
+        history = SignalHistory(capacity=8)
+        result = ScanResult([], [make_bssid("HomeNet", "aa:bb:cc:dd:ee:01", 90), make_bssid("Hidden", "", 40)], None, 123.0, 0.0, True)
+        history.record_scan(result)
+        self.assertEqual(history.pending_samples(), [(123.0, "HomeNet", "aa:bb:cc:dd:ee:01", 90)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import subprocess
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import network_manager
+import switch_timing
+from switch_timing import SwitchTrace, TimingStore
+
+
+class StepClock:
+    """Advances by `step` seconds on every reading."""
+
+    def __init__(self, step=0.01):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def create_switch_spans_table(db_file):
+    """The switch_spans table as DBManager.init_db creates it."""
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS switch_spans "
+        "(switch_id INTEGER NOT NULL, profile TEXT NOT NULL, span TEXT NOT NULL, duration_us INTEGER NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+
+class CountingStore(TimingStore):
+    """Counts the writes to the database."""
+
+    def __init__(self, db_file):
+        super().__init__(db_file)
+        self.writes = []
+
+    def save_spans(self, switch_id, profile, spans):
+        self.writes.append([span.name for span in spans])
+        super().save_spans(switch_id, profile, spans)
+
+
+class EchoRunner:
+    def run_command(self, command_line, timeout=None):
+        return subprocess.CompletedProcess(command_line, 0, stdout="", stderr="")
+
+    def run_powershell(self, script, timeout=None):
+        return self.run_command(script, timeout)
+
+
+class TestSwitchTiming(unittest.TestCase):
+    """Tests for profile-switch span timings and their percentile rollups."""
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        db_file = os.path.join(temp_dir.name, "timings.db")
+        create_switch_spans_table(db_file)
+        self.store = CountingStore(db_file)
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([switch_timing.percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(switch_timing.percentile([7.0], 99), 7.0)
+        self.assertEqual(switch_timing.percentile([], 50), 0.0)
+
+    def test_spans_saved_and_rolled_up(self):
+        for duration_ms in range(1, 21):
+            trace = SwitchTrace("Office", self.store)
+            trace.add(switch_timing.SPAN_APPLY, duration_ms / 2000)
+            trace.add(switch_timing.SPAN_SWITCH, duration_ms / 1000)
+        SwitchTrace("Home", self.store).add(switch_timing.SPAN_SWITCH, 0.5)
+
+        rollups = self.store.rollups()
+        self.assertEqual(set(rollups), {"Office", "Home"})
+        self.assertEqual(rollups["Office"][switch_timing.SPAN_SWITCH], switch_timing.SpanStats(20, 10.0, 19.0, 20.0))
+        self.assertEqual(rollups["Office"][switch_timing.SPAN_APPLY].p50, 5.0)
+        self.assertEqual(self.store.rollups("Home"), {"Home": {"switch": switch_timing.SpanStats(1, 500.0, 500.0, 500.0)}})
+
+    def test_old_switches_pruned(self):
+        self.addCleanup(setattr, switch_timing, "MAX_SWITCHES_PER_PROFILE", switch_timing.MAX_SWITCHES_PER_PROFILE)
+        switch_timing.MAX_SWITCHES_PER_PROFILE = 3
+        for duration_ms in range(1, 6):
+            trace = SwitchTrace("Office", self.store)
+            trace.add(switch_timing.SPAN_LOAD_CONFIGS, 0.001)
+            trace.add(switch_timing.SPAN_SWITCH, duration_ms / 1000)
+        stats = self.store.rollups("Office")["Office"]
+        self.assertEqual(stats[switch_timing.SPAN_SWITCH].count, 3)
+        self.assertEqual(stats[switch_timing.SPAN_SWITCH].p50, 4.0)
+        self.assertEqual(stats[switch_timing.SPAN_LOAD_CONFIGS].count, 3)
+
+    def test_commands_recorded_only_inside_an_active_trace(self):
+        self.addCleanup(network_manager.set_command_runner, network_manager._command_runner)
+        network_manager.set_command_runner(EchoRunner())
+        trace = SwitchTrace("Office", self.store, clock=StepClock())
+        network_manager._run_command("netsh wlan show profiles") # not traced
+        with trace.activate():
+            with trace.span(switch_timing.SPAN_SWITCH):
+                with switch_timing.timed(switch_timing.SPAN_APPLY):
+                    network_manager._run_command('netsh -f "C:\\Temp\\script.txt"')
+        self.assertIsNone(switch_timing.current_trace())
+        self.assertEqual([span.name for span in trace.spans], ["command: netsh -f", "apply_network_config", "switch"])
+        self.assertEqual(trace.breakdown(), [
+            "switch: 50 ms", "command: netsh -f: 10 ms", "apply_network_config: 30 ms",
+        ])
+        self.assertAlmostEqual(trace.total(), 0.05)
+        self.assertEqual(self.store.rollups("Office")["Office"]["command: netsh -f"].count, 1)
+
+    def test_spans_buffered_until_the_switch_finishes(self):
+        trace = SwitchTrace("Office", self.store, clock=StepClock())
+        with trace.activate():
+            with trace.span(switch_timing.SPAN_SWITCH):
+                with switch_timing.timed(switch_timing.SPAN_APPLY):
+                    pass
+                self.assertEqual(self.store.writes, []) # nothing written while the switch is measured
+        self.assertEqual(self.store.writes, [["apply_network_config", "switch"]])
+        with trace.span(switch_timing.SPAN_MENU_REBUILD): # finishes after the switch, on another thread
+            pass
+        self.assertEqual(self.store.writes[-1], ["menu_rebuild"])
+        self.assertEqual(self.store.rollups("Office")["Office"][switch_timing.SPAN_MENU_REBUILD].count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+import threading
+
+# Adjust the Python path to include the project root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from netsh_parser import BssidRecord
+from wifi_scanner import WifiScanner, format_age
+
+
+def make_bssid(ssid, signal, bssid="aa:bb:cc:dd:ee:01", auth="WPA2-Personal", auth_type="WPA2PSK"):
+    return BssidRecord("Wi-Fi", ssid, "Infrastructure", auth, auth_type, "CCMP", bssid, signal, "802.11ax", "5 GHz", 36, (6.0,))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWifiScanner(unittest.TestCase):
+    """Tests for the background Wi-Fi scanner and its cached results."""
+
+    def setUp(self):
+        self.scans = 0
+        self.bssids = [make_bssid("HomeNet", 90)]
+        self.clock = FakeClock()
+
+        def fake_scan():
+            self.scans += 1
+            return list(self.bssids), None
+
+        self.scanner = WifiScanner(interval=60.0, freshness=30.0, scan_func=fake_scan, clock=self.clock)
+        self.addCleanup(self.scanner.stop)
+
+    def test_reading_does_not_scan(self):
+        result = self.scanner.get_results()
+        self.assertEqual((result.networks, result.age, result.fresh), ([], None, False))
+        self.scanner.scan_now()
+        for _ in range(5):
+            self.scanner.get_results()
+        self.assertEqual(self.scans, 1)
+
+    def test_age_and_freshness(self):
+        self.scanner.scan_now()
+        self.clock.now += 12
+        result = self.scanner.get_results()
+        self.assertEqual(result.age, 12)
+        self.assertTrue(result.fresh)
+        self.clock.now += 30
+        self.assertFalse(self.scanner.get_results().fresh)
+
+    def test_listeners_only_see_changes(self):
+        seen = []
+        self.scanner.add_listener(seen.append)
+        self.scanner.scan_now()
+        self.scanner.scan_now()
+        self.bssids = [make_bssid("HomeNet", 40)] # only the signal changed
+        self.scanner.scan_now()
+        self.bssids = [make_bssid("HomeNet", 40), make_bssid("HomeNet", 60, bssid="aa:bb:cc:dd:ee:02")]
+        self.scanner.scan_now()
+        self.bssids = [make_bssid("HomeNet", 60, auth="WPA3-Personal", auth_type="WPA3SAE")]
+        self.scanner.scan_now()
+        self.assertEqual([len(r.bssids) for r in seen], [1, 2, 1])
+        self.assertEqual(seen[-1].networks, [("HomeNet", "WPA3SAE", "60%")])
+
+    def test_listeners_get_a_refresh_once_the_last_result_ages_out(self):
+        seen = []
+        self.scanner.add_listener(seen.append)
+        self.scanner.scan_now()
+        self.bssids = [make_bssid("HomeNet", 40)] # only the signal changed
+        self.clock.now += 29
+        self.scanner.scan_now()
+        self.assertEqual(len(seen), 1)
+        self.clock.now += 1 # the result the listener has is now past the freshness window
+        self.scanner.scan_now()
+        self.assertEqual([r.networks for r in seen], [[("HomeNet", "WPA2PSK", "90%")], [("HomeNet", "WPA2PSK", "40%")]])
+
+    def test_listener_can_see_every_scan(self):
+        seen = []
+        self.scanner.add_listener(seen.append, only_changes=False)
+        self.scanner.scan_now()
+        self.scanner.scan_now()
+        self.assertEqual(len(seen), 2)
+        self.scanner.remove_listener(seen.append)
+        self.scanner.scan_now()
+        self.assertEqual(len(seen), 2)
+
+    def test_background_scan_and_rescan_request(self):
+        scanned = threading.Event()
+        self.scanner.add_listener(lambda result: scanned.set())
+        self.scanner.start()
+        self.assertTrue(scanned.wait(5))
+        self.assertEqual(self.scanner.get_results().networks, [("HomeNet", "WPA2PSK", "90%")])
+
+        scanned.clear()
+        self.bssids = [make_bssid("Office", 70, auth="Open", auth_type="open")]
+        self.scanner.request_rescan() # interval is 60s, so only the request can trigger this scan
+        self.assertTrue(scanned.wait(5))
+        self.scanner.stop()
+        self.assertFalse(self.scanner.is_running())
+
+    def test_networks_are_aggregated_from_bssids(self):
+        self.bssids = [make_bssid("HomeNet", 55), make_bssid("HomeNet", 81, bssid="aa:bb:cc:dd:ee:02")]
+        result = self.scanner.scan_now()
+        self.assertEqual(result.networks, [("HomeNet", "WPA2PSK", "81%")])
+        self.assertEqual(len(result.bssids), 2)
+
+    def test_format_age(self):
+        self.assertEqual(format_age(None), "not scanned yet")
+        self.assertEqual(format_age(2), "just now")
+        self.assertEqual(format_age(42.5), "42s ago")
+        self.assertEqual(format_age(600), "10 min ago")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,26 +3,59 @@ from PIL import Image
 import sys
 from PyQt6.QtWidgets import QApplication, QMessageBox # Added QMessageBox
 from PyQt6.QtCore import QObject, pyqtSignal
+import contextlib
 import threading
 from functools import partial
 from datetime import datetime
 from db_manager import DBManager
 from network_manager import (
-    apply_network_config,
+    apply_network_config_with_plan,
+    apply_profile_set,
+    profile_set_members,
     list_adapters,
     get_current_adapter_config,
     set_adapter_to_dhcp,
-    apply_wifi_profile,
-    has_wifi_support,
-    is_wifi_adapter,
-    get_available_networks, # Keep get_available_networks
-    get_adapter_statuses
+    get_adapter_statuses,
+    get_adapter_snapshot,
+    build_profile_index,
+    active_profiles,
+    choose_wifi_adapter,
+    wifi_adapter_names,
+    invalidate_wifi_profile_cache,
+    _sanitize_message_for_notification,
 )
+import async_network_manager as async_nm
+import adapter_monitor
+import capability_probe
+import connectivity
+import deadlines
+import router_prober
+import signal_history
+import switch_timing
+import wifi_scanner
+from async_network_manager import submit as submit_async
 from router_browser import open_router_page
 from settings_gui import SettingsGUI
 
 ICON_PATH = "network.ico"
 
+# Independently rebuilt parts of the tray menu.
+MENU_SECTIONS = ("network", "wifi")
+
+# Seconds a menu rebuild may spend on adapter/Wi-Fi queries. A section whose queries time out
+# keeps its previous items, marked as stale.
+MENU_REFRESH_BUDGET = 1.5
+
+# Which menu section each adapter change affects.
+EVENT_MENU_SECTIONS = {
+    adapter_monitor.ADDRESS_CHANGED: "network",
+    adapter_monitor.LINK_UP: "network",
+    adapter_monitor.LINK_DOWN: "network",
+    adapter_monitor.ADAPTER_ADDED: "network",
+    adapter_monitor.ADAPTER_REMOVED: "network",
+    adapter_monitor.SSID_CHANGED: "wifi",
+}
+
 
 class TrayApp(QObject):
     """System tray application for network configuration."""
@@ -30,39 +63,100 @@ class TrayApp(QObject):
     show_settings_signal = pyqtSignal()
     prepare_settings_for_save_current_signal = pyqtSignal(str)
     request_tray_menu_refresh_signal = pyqtSignal()
+    request_menu_sections_refresh_signal = pyqtSignal(object) # tuple of MENU_SECTIONS names
     open_router_signal = pyqtSignal(str, str, int, str) # router_ip, port, interval, protocol
+    capabilities_changed_signal = pyqtSignal(dict)
 
     def __init__(self):
         super().__init__()
-        self.db = DBManager()
+        self.db = DBManager(on_wifi_profile_changed=invalidate_wifi_profile_cache)
+        self.timing_store = switch_timing.TimingStore(self.db.db_file)
+        self._switch_timing_lock = threading.Lock()
+        self._last_switch_trace = None
+        self._last_switch_stats = None
+        self._pending_switch_spans = set() # spans of the last switch measured on other threads
         self.icon = None
         self.settings_window = None
         self.router_windows = []
-        self.wifi_supported = has_wifi_support()
+        # Last probed capabilities are read from disk; the probe itself runs in the background.
+        self.wifi_supported = capability_probe.cached_wifi_support()
         self.show_settings_signal.connect(self._slot_run_settings_gui)
         self.prepare_settings_for_save_current_signal.connect(
             self._slot_prepare_settings_for_save_current
         )
         self.request_tray_menu_refresh_signal.connect(self.update_tray_menu)
+        self.request_menu_sections_refresh_signal.connect(self.update_tray_menu)
+        self._menu_sections = {} # section name -> menu items of the last build
+        self._stale_menu_sections = set() # sections whose last rebuild timed out
+        self._menu_lock = threading.Lock()
         self.open_router_signal.connect(self._slot_open_router_page)
+        self.capabilities_changed_signal.connect(self._slot_capabilities_changed)
+        capability_probe.refresh_capabilities_in_background(on_change=self.capabilities_changed_signal.emit)
+        # Nearby networks come from the background scanner; the menu only reads its cached result.
+        self.wifi_scanner = wifi_scanner.get_shared_scanner()
+        self.wifi_scanner.add_listener(lambda result: self.request_menu_sections_refresh_signal.emit(("wifi",)))
+        # Every scan is also recorded (bounded memory) and flushed to the database periodically.
+        self.signal_history = signal_history.SignalHistory()
+        self.wifi_scanner.add_listener(self.signal_history.record_scan, only_changes=False)
+        self.signal_history.start_periodic_flush(self.db.save_signal_samples)
+        if self.wifi_supported:
+            self.wifi_scanner.start()
+        # Adapter changes refresh only the menu section they affect.
+        self.adapter_monitor = adapter_monitor.AdapterMonitor()
+        self.adapter_monitor.add_listener(self._on_adapter_events)
+        self.adapter_monitor.start()
+        # Router reachability of every profile, probed in the background and cached.
+        self.router_prober = router_prober.RouterProber()
+
+    def _on_adapter_events(self, events):
+        """Called from the adapter monitor thread with the changes found by one check."""
+        sections = tuple(sorted({EVENT_MENU_SECTIONS[event.kind] for event in events}))
+        if "network" in sections:
+            self.router_prober.invalidate() # reachability depends on the link
+        self.request_menu_sections_refresh_signal.emit(sections)
+
+    def _slot_capabilities_changed(self, capabilities):
+        """Called when the background probe found different hardware capabilities."""
+        wifi_supported = bool(capabilities.get("has_wifi_support"))
+        if wifi_supported != self.wifi_supported:
+            self.wifi_supported = wifi_supported
+            if wifi_supported:
+                self.wifi_scanner.start()
+            else:
+                self.wifi_scanner.stop()
+            self.update_tray_menu()
 
     def _internal_save_current_settings_handler(self, adapter_name, icon=None, item=None):
         """Handler for saving current settings menu item."""
         self._request_save_current_settings(adapter_name)
 
-    def get_pystray_menu(self):
-        """Update the tray menu with current configurations and adapter statuses."""
+    def _build_network_section(self):
+        """
+        Menu items that depend on the adapter state: status errors and saved profiles (with the
+        active one checked), and the "Adapter Actions" submenu. Returns (profile_items, adapter_items).
+        """
         menu_items = []
+        deadline = deadlines.current_deadline()
+        timeouts_before = len(deadline.timed_out) if deadline else 0
         saved_configs_all = self.db.load_configs()
+        # Indexed once per load, so matching adapters to profiles is one lookup per adapter.
+        profile_index = build_profile_index(saved_configs_all)
+
+        # One adapter snapshot serves both the status map and the adapter list below.
+        adapter_snapshot, snapshot_err = get_adapter_snapshot()
 
         # Get adapter statuses.
         # adapter_statuses_map: dict where key is short_name, value is status string.
         # overall_status_fetch_err: error message if listing/getting config failed within get_adapter_statuses.
-        adapter_statuses_map, overall_status_fetch_err = get_adapter_statuses(saved_configs_all)
+        if snapshot_err:
+            adapter_statuses_map, overall_status_fetch_err = {}, snapshot_err
+        else:
+            adapter_statuses_map, overall_status_fetch_err = get_adapter_statuses(
+                saved_configs_all, snapshot=adapter_snapshot, profile_index=profile_index
+            )
 
         if overall_status_fetch_err:
-            if self.icon:
-                self.icon.notify(overall_status_fetch_err, "Adapter Status Error")
+            self._notify_section_error(overall_status_fetch_err, "Adapter Status Error", timeouts_before)
             menu_items.append(
                 pystray.MenuItem(
                     f"Error fetching adapter statuses: {overall_status_fetch_err}", action=None, enabled=False
@@ -72,13 +166,14 @@ class TrayApp(QObject):
             # We might still attempt to list adapters for basic actions if list_adapters() itself works.
 
         # Get (short_name, detailed_name) tuples for menu construction, especially for "Adapter Actions".
-        active_adapters_list_of_tuples, list_adapters_err_separate_call = list_adapters()
+        if snapshot_err:
+            active_adapters_list_of_tuples, list_adapters_err_separate_call = [], None
+        else:
+            active_adapters_list_of_tuples, list_adapters_err_separate_call = list_adapters(snapshot=adapter_snapshot)
 
         if list_adapters_err_separate_call:
-            # If get_adapter_statuses didn't report an error (or even if it did, this is a more direct check for list_adapters)
-            # and this separate call to list_adapters fails, note it.
-            if self.icon:
-                self.icon.notify(list_adapters_err_separate_call, "Adapter Listing Error")
+            # The snapshot was fetched but contains no connected adapters, note it.
+            self._notify_section_error(list_adapters_err_separate_call, "Adapter Listing Error", timeouts_before)
             menu_items.append(
                 pystray.MenuItem(
                     f"Error listing adapters: {list_adapters_err_separate_call}", action=None, enabled=False
@@ -87,54 +182,30 @@ class TrayApp(QObject):
             # active_adapters_list_of_tuples might be empty if this call fails.
 
         # 2. Indicate Active Profile in Main Menu
-        for name, profile_data in saved_configs_all.get("networks", {}).items():
-            # Check against the statuses derived from get_adapter_statuses
-            is_active = any(status == f"Static: {name}" for status in adapter_statuses_map.values())
+        active_profile_adapters = active_profiles(adapter_statuses_map) # profile name -> adapter
+        network_configs = saved_configs_all.get("networks", {})
+        router_annotations = self.router_prober.annotations(network_configs)
+        for name, profile_data in network_configs.items():
+            is_active = name in active_profile_adapters
             display_name = f"✔ {name}" if is_active else name
+            if name in router_annotations:
+                display_name += f" ({router_annotations[name]})"
             menu_items.append(pystray.MenuItem(display_name, partial(self._internal_apply_config_handler, name)))
 
-        # --- Wi-Fi Section ---
-        if self.wifi_supported:
-            wifi_profiles_data, wifi_profiles_msg = self.db.get_wifi_profiles()
-            if wifi_profiles_msg and self.icon:
-                self.icon.notify(wifi_profiles_msg, "Wi-Fi Profile Loading Error")
-            if wifi_profiles_data:
-                wifi_menu_items = []
-                for profile in wifi_profiles_data:
-                    config_name, ssid, password, auth_type = profile
-                    wifi_menu_items.append(
-                        pystray.MenuItem(
-                            f"{config_name}: {ssid} ({auth_type})",
-                            partial(
-                                self._internal_apply_wifi_handler,
-                                config_name,
-                                ssid,
-                                password,
-                                auth_type,
-                            ),
-                        )
-                    )
-                if wifi_menu_items:
-                    menu_items.append(pystray.Menu.SEPARATOR)
-                    menu_items.append(
-                        pystray.MenuItem("Wi-Fi Profiles", pystray.Menu(*wifi_menu_items))
-                    )
-            networks_data, networks_msg = get_available_networks()
-            if networks_msg and self.icon:
-                self.icon.notify(networks_msg, "Nearby Wi-Fi Scan Error")
-
-            if networks_data:
-                nearby_menu_items = []
-                for ssid, auth_type, signal in networks_data:
-                    nearby_menu_items.append(
-                        pystray.MenuItem(
-                            f"{ssid} ({auth_type}, {signal})",
-                            partial(self._internal_connect_nearby_network, ssid, auth_type),
-                        )
-                    )
-                if nearby_menu_items:
-                    menu_items.append(
-                        pystray.MenuItem("Nearby Networks", pystray.Menu(*nearby_menu_items)))
+        # Expired router results are probed again; the section is rebuilt when they arrive.
+        self.router_prober.refresh_in_background(
+            network_configs, callback=lambda statuses: self.request_menu_sections_refresh_signal.emit(("network",))
+        )
+
+        profile_sets = self.db.load_profile_sets()
+        if profile_sets:
+            set_items = []
+            for set_name, config_names in profile_sets.items():
+                missing = [name for name in config_names if name not in network_configs]
+                label = f"{set_name} ({len(config_names) - len(missing)} adapters"
+                label += f", {len(missing)} missing)" if missing else ")"
+                set_items.append(pystray.MenuItem(label, partial(self._internal_apply_profile_set_handler, set_name)))
+            menu_items.append(pystray.MenuItem("Profile Sets", pystray.Menu(*set_items)))
 
         # --- Adapter Actions Section ---
         adapter_actions_menu_items = []
@@ -192,14 +263,108 @@ class TrayApp(QObject):
                 )
 
         if adapter_actions_menu_items: # If there are any adapter-specific actions
-            menu_items.append(pystray.Menu.SEPARATOR)
+            adapter_section_items = [
+                pystray.Menu.SEPARATOR,
+                pystray.MenuItem("Adapter Actions", pystray.Menu(*adapter_actions_menu_items)),
+            ]
+        else:
+            adapter_section_items = []
+        return menu_items, adapter_section_items
+
+
+    def _build_wifi_section(self):
+        """Menu items for saved Wi-Fi profiles (the connected SSID checked) and nearby networks."""
+        menu_items = []
+        if not self.wifi_supported:
+            return menu_items
+        connected_ssids = set(self.adapter_monitor.connected_ssids().values())
+        wifi_profiles_data, wifi_profiles_msg = self.db.get_wifi_profiles()
+        if wifi_profiles_msg and self.icon:
+            self.icon.notify(wifi_profiles_msg, "Wi-Fi Profile Loading Error")
+        if wifi_profiles_data:
+            wifi_menu_items = []
+            for profile in wifi_profiles_data:
+                config_name, ssid, password, auth_type = profile
+                wifi_menu_items.append(
+                    pystray.MenuItem(
+                        f"{'✔ ' if ssid in connected_ssids else ''}{config_name}: {ssid} ({auth_type})",
+                        partial(
+                            self._internal_apply_wifi_handler,
+                            config_name,
+                            ssid,
+                            password,
+                            auth_type,
+                        ),
+                    )
+                )
+            if wifi_menu_items:
+                menu_items.append(pystray.Menu.SEPARATOR)
+                menu_items.append(
+                    pystray.MenuItem("Wi-Fi Profiles", pystray.Menu(*wifi_menu_items))
+                )
+        scan_result = self.wifi_scanner.get_results()
+        if scan_result.error and self.icon:
+            self.icon.notify(scan_result.error, "Nearby Wi-Fi Scan Error")
+
+        if scan_result.networks:
+            nearby_menu_items = []
+            for ssid, auth_type, signal in scan_result.networks:
+                nearby_menu_items.append(
+                    pystray.MenuItem(
+                        f"{ssid} ({auth_type}, {signal})",
+                        partial(self._internal_connect_nearby_network, ssid, auth_type),
+                    )
+                )
+            nearby_menu_items.append(pystray.Menu.SEPARATOR)
+            nearby_menu_items.append(pystray.MenuItem("Rescan Now", lambda icon, item: self.wifi_scanner.request_rescan()))
+            stale_note = "" if scan_result.fresh else ", stale"
             menu_items.append(
                 pystray.MenuItem(
-                    "Adapter Actions", pystray.Menu(*adapter_actions_menu_items)
+                    # The label is only redrawn on a rebuild, so it shows when the scan ran, not a relative age.
+                    f"Nearby Networks (scanned {wifi_scanner.format_scan_time(scan_result.scanned_at)}{stale_note})",
+                    pystray.Menu(*nearby_menu_items),
                 )
             )
+        return menu_items
+
+    def _notify_section_error(self, message, title, timeouts_before):
+        """Notify a menu section's error, unless one of its queries timed out: the section is then only marked stale."""
+        deadline = deadlines.current_deadline()
+        if deadline is not None and len(deadline.timed_out) > timeouts_before:
+            return
+        if self.icon:
+            self.icon.notify(message, title)
+
+    def _stale_note(self, section):
+        if section not in self._stale_menu_sections:
+            return []
+        label = {"network": "Network status", "wifi": "Wi-Fi"}[section]
+        return [pystray.MenuItem(f"{label} not refreshed (query timed out)", None, enabled=False)]
+
+    def get_pystray_menu(self, sections=None):
+        """
+        Build the tray menu. Only the given sections (MENU_SECTIONS names; all if None) are rebuilt,
+        the others are reused from the previous build. Rebuilding shares one MENU_REFRESH_BUDGET deadline.
+        """
+        builders = {"network": self._build_network_section, "wifi": self._build_wifi_section}
+        with self._menu_lock, deadlines.budget(MENU_REFRESH_BUDGET, "menu refresh") as deadline:
+            for section in MENU_SECTIONS:
+                if sections is None or section in sections or section not in self._menu_sections:
+                    timeouts_before = len(deadline.timed_out)
+                    items = builders[section]()
+                    if len(deadline.timed_out) > timeouts_before and section in self._menu_sections:
+                        self._stale_menu_sections.add(section) # keep what the last complete build showed
+                    else:
+                        self._menu_sections[section] = items
+                        self._stale_menu_sections.discard(section)
+            profile_items, adapter_items = self._menu_sections["network"]
+            menu_items = (
+                self._stale_note("network") + profile_items
+                + self._stale_note("wifi") + self._menu_sections["wifi"] + adapter_items
+            )
 
         menu_items.append(pystray.Menu.SEPARATOR)
+        menu_items.extend(self._switch_timing_items())
         menu_items.append(pystray.MenuItem("Settings", self._request_open_settings))
         menu_items.append(pystray.MenuItem("Exit", self._request_exit_app))
         return pystray.Menu(*menu_items)
@@ -227,6 +392,14 @@ class TrayApp(QObject):
         )
         thread.start()
 
+    def _request_apply_profile_set(self, set_name):
+        thread = threading.Thread(
+            target=self._internal_apply_profile_set_task,
+            args=(set_name,),
+            daemon=True,
+        )
+        thread.start()
+
     def _request_set_adapter_to_dhcp(self, adapter_name):
         thread = threading.Thread(
             target=self._execute_set_dhcp_task,
@@ -239,6 +412,9 @@ class TrayApp(QObject):
         self.prepare_settings_for_save_current_signal.emit(adapter_name)
 
     def _request_exit_app(self, icon=None, item=None):
+        self.wifi_scanner.stop(timeout=1.0)
+        self.adapter_monitor.stop(timeout=1.0)
+        self.signal_history.stop_periodic_flush(self.db.save_signal_samples)
         if self.icon:
             self.icon.stop()
         app_instance = QApplication.instance()
@@ -248,6 +424,9 @@ class TrayApp(QObject):
     def _internal_apply_config_handler(self, config_name, icon=None, item=None):
         self._request_apply_config(config_name)
 
+    def _internal_apply_profile_set_handler(self, set_name, icon=None, item=None):
+        self._request_apply_profile_set(set_name)
+
     def _internal_open_router_handler(
         self, router_ip, router_port, refresh_interval, protocol, icon=None, item=None
     ):
@@ -259,12 +438,10 @@ class TrayApp(QObject):
     def _internal_apply_wifi_handler(
         self, config_name, ssid, password, auth_type, icon=None, item=None
     ):
-        thread = threading.Thread(
-            target=self._execute_wifi_task,
-            args=(config_name, ssid, password, auth_type),
-            daemon=True,
+        submit_async(
+            self._execute_wifi_task(config_name, ssid, password, auth_type),
+            on_error=lambda error: self._notify_task_error("Wi-Fi apply error", error, "Wi-Fi Error"),
         )
-        thread.start()
 
     def _internal_connect_nearby_network(self, network_ssid, auth_type, icon=None, item=None):
         """Open settings GUI to input password for a nearby network."""
@@ -280,36 +457,121 @@ class TrayApp(QObject):
             self.icon.notify("Settings window not available for nearby network connection.", "Error")
 
     def _internal_apply_config_task(self, config_name):
-        configs = self.db.load_configs()
-        network_configs = configs.get("networks", {})
-
-        if config_name not in network_configs:
-            if self.icon:
-                self.icon.notify(
-                    f"Configuration '{config_name}' not found.", "Error"
-                )
-            return
+        # Every step of the switch is timed; commands run by network_manager add their own spans.
+        trace = switch_timing.SwitchTrace(config_name, self.timing_store)
+        with trace.activate():
+            self._apply_config_traced(config_name, trace)
+
+    def _apply_config_traced(self, config_name, trace):
+        # The connectivity check is part of the switch, so SPAN_SWITCH (and its percentiles) covers it.
+        with trace.span(switch_timing.SPAN_SWITCH):
+            with trace.span(switch_timing.SPAN_LOAD_CONFIGS):
+                configs = self.db.load_configs()
+            network_configs = configs.get("networks", {})
+
+            if config_name not in network_configs:
+                if self.icon:
+                    self.icon.notify(
+                        f"Configuration '{config_name}' not found.", "Error"
+                    )
+                return
 
-        config_to_apply = network_configs[config_name]
-        success, message = apply_network_config(config_to_apply["adapter_name"], config_to_apply)
+            config_to_apply = network_configs[config_name]
+            with trace.span(switch_timing.SPAN_APPLY):
+                success, message, plan = apply_network_config_with_plan(config_to_apply["adapter_name"], config_to_apply)
 
-        title = "Success" if success else "Error"
+            title = "Success" if success else "Error"
 
-        if self.icon:
-            self.icon.notify(message, title)
+            if self.icon:
+                self.icon.notify(message, title)
+
+            # Spans measured on other threads (menu rebuild, router page) look up this trace.
+            pending_spans = set()
+            if success and (plan is None or plan.script):
+                pending_spans.add(switch_timing.SPAN_MENU_REBUILD)
+            if success and config_to_apply.get("open_router") and config_to_apply.get("router_ip"):
+                pending_spans.add(switch_timing.SPAN_OPEN_ROUTER)
+            with self._switch_timing_lock:
+                self._last_switch_trace = trace
+                self._pending_switch_spans = pending_spans
+                self._last_switch_stats = None
+
+            if success:
+                if config_to_apply.get("open_router"):
+                    router_ip_to_open = config_to_apply.get("router_ip")
+                    if router_ip_to_open: # Only open if router_ip is set
+                        self.open_router_signal.emit(
+                            router_ip_to_open,
+                            config_to_apply.get("router_port", ""),
+                            config_to_apply.get("router_refresh_interval", 5),
+                            config_to_apply.get("router_protocol", "http")
+                        )
+                if plan is None or plan.script: # nothing to refresh or verify if the profile was already active
+                    self.request_tray_menu_refresh_signal.emit()
+                    # Check that traffic actually flows; takes at most connectivity.DEFAULT_WINDOW seconds.
+                    with trace.span(switch_timing.SPAN_CONNECTIVITY):
+                        report = connectivity.verify_adapter_connectivity(config_to_apply["adapter_name"], config_to_apply)
+                    if self.icon:
+                        self.icon.notify(connectivity.describe_report(report), "Connectivity" if report.ok else "Connectivity Problem")
+
+        # Rolled up only now that the whole switch, connectivity check included, is stored.
+        stats = self.timing_store.rollups(config_name).get(config_name, {}).get(switch_timing.SPAN_SWITCH)
+        with self._switch_timing_lock:
+            if self._last_switch_trace is trace:
+                self._last_switch_stats = stats
+        if success and (plan is None or plan.script):
+            self.request_menu_sections_refresh_signal.emit(()) # no section rebuilt: shows the final switch time
+
+    def _internal_apply_profile_set_task(self, set_name):
+        """Apply every profile of a set at once (one worker per adapter) and report the set as a whole."""
+        trace = switch_timing.SwitchTrace(set_name, self.timing_store)
+        with trace.activate(), trace.span(switch_timing.SPAN_SWITCH):
+            with trace.span(switch_timing.SPAN_LOAD_CONFIGS):
+                network_configs = self.db.load_configs().get("networks", {})
+                config_names = self.db.load_profile_sets().get(set_name)
+            if not config_names:
+                if self.icon:
+                    self.icon.notify(f"Profile set '{set_name}' not found.", "Error")
+                return
+            members, error_msg = profile_set_members(set_name, config_names, network_configs)
+            if error_msg:
+                if self.icon:
+                    self.icon.notify(error_msg, "Error")
+                return
+            with trace.span(switch_timing.SPAN_APPLY):
+                success, message, results = apply_profile_set(set_name, members)
+            if self.icon:
+                self.icon.notify(message, "Success" if success else "Error")
 
-        if success:
-            if config_to_apply.get("open_router"):
-                router_ip_to_open = config_to_apply.get("router_ip")
-                if router_ip_to_open: # Only open if router_ip is set
-                    self.open_router_signal.emit(
-                        router_ip_to_open,
-                        config_to_apply.get("router_port", ""),
-                        config_to_apply.get("router_refresh_interval", 5),
-                        config_to_apply.get("router_protocol", "http")
-                    )
+        with self._switch_timing_lock:
+            self._last_switch_trace = trace
+            self._pending_switch_spans = {switch_timing.SPAN_MENU_REBUILD} if results else set()
+            self._last_switch_stats = self.timing_store.rollups(set_name).get(set_name, {}).get(switch_timing.SPAN_SWITCH)
+        if results: # some adapters may have changed even if the set failed
             self.request_tray_menu_refresh_signal.emit()
 
+    def _pending_switch_span(self, name):
+        """Time the block into the last switch trace if that switch is still waiting for this span."""
+        with self._switch_timing_lock:
+            if name not in self._pending_switch_spans:
+                return contextlib.nullcontext()
+            self._pending_switch_spans.discard(name)
+            return self._last_switch_trace.span(name)
+
+    def _switch_timing_items(self):
+        """'Last switch took X ms' submenu with the span breakdown and the profile's percentiles."""
+        with self._switch_timing_lock:
+            trace, stats = self._last_switch_trace, self._last_switch_stats
+        if trace is None or trace.total() is None:
+            return []
+        lines = trace.breakdown()
+        if stats:
+            lines.append(f"p50 / p95 / p99 over {stats.count} switches: {stats.p50:.0f} / {stats.p95:.0f} / {stats.p99:.0f} ms")
+        items = [pystray.MenuItem(line, None, enabled=False) for line in lines]
+        return [pystray.MenuItem(
+            f"Last switch ({trace.profile}) took {trace.total() * 1000:.0f} ms", pystray.Menu(*items)
+        )]
+
     def _execute_set_dhcp_task(self, adapter_name):
         success, message = set_adapter_to_dhcp(adapter_name)
         title = "Success" if success else "Error"
@@ -320,23 +582,33 @@ class TrayApp(QObject):
         if success:
             self.request_tray_menu_refresh_signal.emit()
 
-    def _execute_wifi_task(self, config_name, ssid, password, auth_type):
-        all_system_adapters, list_err = list_adapters()
-        if list_err: # Handle error from list_adapters
+    def _notify_task_error(self, prefix, error, title):
+        """Report a background task that raised instead of returning its (result, message)."""
+        if self.icon:
+            self.icon.notify(_sanitize_message_for_notification(f"{prefix}: {error}"), title)
+
+    async def _execute_wifi_task(self, config_name, ssid, password, auth_type):
+        # One adapter snapshot classifies every interface; no per-adapter netsh calls.
+        interface_index, index_err = await async_nm.get_interface_index()
+        if index_err:
             if self.icon:
-                self.icon.notify(f"Wi-Fi apply error: Could not list adapters. {list_err}", "Wi-Fi Error")
+                self.icon.notify(f"Wi-Fi apply error: Could not list adapters. {index_err}", "Wi-Fi Error")
             return
 
-        wifi_adapters_present = [name for name in all_system_adapters if is_wifi_adapter(name)]
+        wifi_adapters_present = wifi_adapter_names(interface_index)
 
         if not wifi_adapters_present:
             if self.icon:
                 self.icon.notify("No Wi-Fi adapter found on the system to apply the profile.", "Wi-Fi Error")
             return
 
-        adapter_to_use_for_wifi = wifi_adapters_present[0]
+        # With several Wi-Fi adapters, use the one that hears the strongest access point of this SSID.
+        latest_bssids = self.wifi_scanner.get_results().bssids
+        adapter_to_use_for_wifi = choose_wifi_adapter(wifi_adapters_present, ssid, latest_bssids)
 
-        success, message = apply_wifi_profile(ssid, password, adapter_to_use_for_wifi, auth_type)
+        success, message = await async_nm.apply_wifi_profile(
+            ssid, password, adapter_to_use_for_wifi, auth_type, bssids=latest_bssids
+        )
         title = "Success" if success else "Error"
         if self.icon:
             self.icon.notify(message, title)
@@ -381,14 +653,17 @@ class TrayApp(QObject):
     def _slot_open_router_page(
         self, router_ip, router_port, refresh_interval, protocol
     ):
-        browser = open_router_page(router_ip, router_port, refresh_interval, protocol)
+        with self._pending_switch_span(switch_timing.SPAN_OPEN_ROUTER):
+            browser = open_router_page(router_ip, router_port, refresh_interval, protocol)
         if browser:
             self.router_windows.append(browser)
             self.router_windows = [w for w in self.router_windows if w.isVisible()]
 
-    def update_tray_menu(self):
+    def update_tray_menu(self, sections=None):
+        """Rebuild the menu; only the given sections if any are given, otherwise all of them."""
         if self.icon:
-            self.icon.menu = self.get_pystray_menu()
+            with self._pending_switch_span(switch_timing.SPAN_MENU_REBUILD):
+                self.icon.menu = self.get_pystray_menu(sections)
             try:
                 self.icon.update_menu()  # Some pystray versions support this
             except AttributeError:
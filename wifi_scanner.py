@@ -0,0 +1,178 @@
+"""
+Background Wi-Fi scanner.
+
+Runs 'netsh wlan show networks mode=bssid' (network_manager.get_available_bssids) on its own thread
+every `interval` seconds and keeps the latest per-BSSID records, and the per-SSID view aggregated
+from them, with their timestamp. The tray menu and the settings
+window read that cached result, with its age, instead of scanning on every menu rebuild; a fresh
+scan is only run when a caller explicitly asks for one.
+"""
+import threading
+import time
+from typing import NamedTuple
+
+import network_manager
+
+DEFAULT_SCAN_INTERVAL = 30.0 # seconds between background scans
+DEFAULT_FRESHNESS = 60.0 # results older than this are reported as stale
+
+
+class ScanResult(NamedTuple):
+    """Latest scan: (ssid, auth_type, signal) tuples as returned by get_available_networks, and the BssidRecords behind them."""
+    networks: list
+    bssids: list
+    error: str | None
+    scanned_at: float | None # time.time() of the scan, None before the first scan
+    age: float | None # seconds since the scan
+    fresh: bool
+
+
+def network_list_key(bssids) -> frozenset:
+    """
+    What the change listeners compare between scans: which access points are heard, per SSID and
+    authentication. Signal strength varies on nearly every scan and is left out, so change
+    listeners are also called once the result they last got is older than the freshness window,
+    which bounds how old the signals they show get; listeners that need every scan (signal
+    history) register with only_changes=False.
+    """
+    return frozenset((record.ssid, record.bssid, record.auth_type) for record in bssids)
+
+
+def format_scan_time(scanned_at: float | None) -> str:
+    """Wall-clock time of a scan, for labels that are not redrawn as the result ages."""
+    if scanned_at is None:
+        return "not scanned yet"
+    return time.strftime("%H:%M", time.localtime(scanned_at))
+
+
+def format_age(age: float | None) -> str:
+    """Human-readable age of a scan result."""
+    if age is None:
+        return "not scanned yet"
+    if age < 5:
+        return "just now"
+    if age < 90:
+        return f"{int(age)}s ago"
+    return f"{int(age // 60)} min ago"
+
+
+class WifiScanner:
+    """Scans for nearby Wi-Fi networks in the background and caches the result."""
+
+    def __init__(self, interval=DEFAULT_SCAN_INTERVAL, freshness=DEFAULT_FRESHNESS, scan_func=None, clock=time.monotonic):
+        self.interval = interval
+        self.freshness = freshness
+        self._scan_func = scan_func or network_manager.get_available_bssids # returns (bssids, error)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock() # one netsh scan at a time
+        self._bssids = []
+        self._networks = []
+        self._error = None
+        self._scanned_at = None
+        self._scanned_clock = None
+        self._notified_clock = None # when the change listeners last got a result
+        self._listeners = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self.scan_count = 0
+
+    def add_listener(self, callback, only_changes=True):
+        """
+        Register callback(result), called from the scanning thread when the network list changes
+        (see network_list_key) or the last result it got is older than the freshness window, or
+        after every scan with only_changes=False, e.g. to record signal history.
+        """
+        with self._lock:
+            self._listeners.append((callback, only_changes))
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = [entry for entry in self._listeners if entry[0] != callback]
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start background scanning (the first scan runs immediately)."""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, name="wifi-scanner", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def get_results(self) -> ScanResult:
+        """Return the cached result without scanning."""
+        with self._lock:
+            if self._scanned_clock is None:
+                return ScanResult([], [], self._error, None, None, False)
+            age = max(0.0, self._clock() - self._scanned_clock)
+            return ScanResult(
+                list(self._networks), list(self._bssids), self._error, self._scanned_at, age, age < self.freshness
+            )
+
+    def scan_now(self) -> ScanResult:
+        """Scan in the calling thread and return the new result."""
+        with self._scan_lock:
+            bssids, error = self._scan_func()
+            bssids = list(bssids or [])
+            with self._lock:
+                now = self._clock()
+                changed = (
+                    network_list_key(bssids) != network_list_key(self._bssids)
+                    or error != self._error
+                    or self._notified_clock is None
+                    or now - self._notified_clock >= self.freshness
+                )
+                if changed:
+                    self._notified_clock = now
+                self._bssids = bssids
+                self._networks = network_manager.networks_from_bssids(bssids)
+                self._error = error
+                self._scanned_at = time.time()
+                self._scanned_clock = now
+                self.scan_count += 1
+                listeners = list(self._listeners)
+        result = self.get_results()
+        for listener, only_changes in listeners:
+            if changed or not only_changes:
+                try:
+                    listener(result)
+                except Exception as e:
+                    print(f"Wi-Fi scan listener failed: {e}")
+        return result
+
+    def request_rescan(self):
+        """Ask the background thread to scan now instead of waiting for the interval."""
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.scan_now()
+            except Exception as e:
+                print(f"Background Wi-Fi scan failed: {e}")
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+
+
+_shared_scanner = None
+_shared_scanner_lock = threading.Lock()
+
+
+def get_shared_scanner() -> WifiScanner:
+    """Process-wide scanner shared by the tray menu and the settings window (not started here)."""
+    global _shared_scanner
+    with _shared_scanner_lock:
+        if _shared_scanner is None:
+            _shared_scanner = WifiScanner()
+        return _shared_scanner